@@ -0,0 +1,7 @@
+"""
+Autenticação e sessões: registro de sessões, tokens de retomada e sessões desconectadas em período de graça
+"""
+
+from .sessions import ResumeTokens, DetachedSessions, Session, SessionRegistry, DEFAULT_GRACE_PERIOD
+
+__all__ = ['ResumeTokens', 'DetachedSessions', 'Session', 'SessionRegistry', 'DEFAULT_GRACE_PERIOD']
@@ -0,0 +1,149 @@
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import math
+import multiprocessing
+import os
+import secrets
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from net.metrics import LatencyHistogram
+
+PBKDF2_ITERATIONS = 100000
+
+# Pool de hashing: "process" (padrão) ou "thread"
+DEFAULT_HASH_EXECUTOR = "process"
+DEFAULT_HASH_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# Admissão de logins/registros: quantos hashes em paralelo e quantos esperando
+DEFAULT_MAX_CONCURRENT_LOGINS = DEFAULT_HASH_WORKERS
+DEFAULT_MAX_WAITING_LOGINS = 64
+
+
+def hash_password(password: str, salt: bytes = None) -> tuple:
+    """Gera hash da senha com salt. Retorna (hash, salt)."""
+    if salt is None:
+        salt = secrets.token_bytes(32)
+    pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, PBKDF2_ITERATIONS)
+    return pwd_hash, salt
+
+
+def verify_password(password: str, pwd_hash: bytes, salt: bytes) -> bool:
+    """Verifica se senha confere com hash."""
+    computed_hash, _ = hash_password(password, salt)
+    return hmac.compare_digest(computed_hash, pwd_hash)
+
+
+class PasswordHasher:
+    """
+    Executa o PBKDF2 fora do event loop, em um pool de processos (ou threads).
+    O pool é criado no primeiro uso.
+    """
+
+    def __init__(self, workers: int = DEFAULT_HASH_WORKERS, executor: str = DEFAULT_HASH_EXECUTOR):
+        self.workers = workers
+        self.executor_kind = executor
+        self._executor: Optional[Executor] = None
+        self.hash_time = LatencyHistogram()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                # spawn: com fork os workers herdariam os sockets dos clientes já conectados
+                # e o FIN só sairia quando o worker morresse (desconexões levavam o close_timeout)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwd-hash")
+        return self._executor
+
+    async def _run(self, func, *args):
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.hash_time.record(time.perf_counter() - started)
+
+    async def hash(self, password: str) -> Tuple[bytes, bytes]:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, pwd_hash: bytes, salt: bytes) -> bool:
+        return await self._run(verify_password, password, pwd_hash, salt)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "hash_ms": self.hash_time.summary(),
+        }
+
+
+class LoginAdmission:
+    """
+    Fila de admissão para operações caras de autenticação.
+    No máximo `max_concurrent` em andamento e `max_waiting` aguardando;
+    além disso o cliente recebe "servidor ocupado" com uma estimativa de espera.
+    """
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT_LOGINS,
+                 max_waiting: int = DEFAULT_MAX_WAITING_LOGINS):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_wait = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+
+    def is_full(self) -> bool:
+        return self.waiting >= self.max_waiting
+
+    def reject(self) -> int:
+        """Conta uma recusa e retorna em quantos segundos o cliente deve tentar de novo"""
+        self.rejected += 1
+        return self.retry_after()
+
+    def retry_after(self) -> int:
+        service = self.service_time.mean or 0.1
+        backlog = self.waiting + self.active
+        return max(1, math.ceil(backlog / self.max_concurrent * service))
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Aguarda a vez (medindo a espera) e ocupa uma vaga até o fim do bloco"""
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.queue_wait.record(started - queued_at)
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self.service_time.record(time.perf_counter() - started)
+
+    def get_stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_wait_ms": self.queue_wait.summary(),
+            "service_ms": self.service_time.summary(),
+        }
@@ -0,0 +1,271 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from typing import Dict, Any, Optional, List
+
+# Quanto tempo (s) o ServerPlayer de um cliente que caiu fica em memória esperando reconexão
+DEFAULT_GRACE_PERIOD = 30.0
+# Validade máxima de um token de retomada (s); na prática ele só serve durante o período de graça
+DEFAULT_TOKEN_MAX_AGE = 12 * 3600
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class ResumeTokens:
+    """
+    Tokens de retomada de sessão assinados com HMAC-SHA256.
+    O token identifica a sessão (player_id/user_id/character_id) e carrega um
+    nonce de uso único; verificá-lo não envolve PBKDF2 nem banco de dados.
+    """
+
+    def __init__(self, secret: Optional[bytes] = None, max_age: float = DEFAULT_TOKEN_MAX_AGE):
+        self.secret = secret or secrets.token_bytes(32)
+        self.max_age = max_age
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()
+
+    def issue(self, player_id: str, user_id: str, character_id: str) -> Dict[str, Any]:
+        """Gera um token novo. Retorna {"token", "nonce", "expires_at"}"""
+        expires_at = int(time.time() + self.max_age)
+        nonce = secrets.token_hex(8)
+        claims = {"pid": player_id, "uid": user_id, "cid": character_id, "exp": expires_at, "n": nonce}
+        payload = json.dumps(claims, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        token = f"{_b64encode(payload)}.{_b64encode(self._sign(payload))}"
+        return {"token": token, "nonce": nonce, "expires_at": expires_at}
+
+    def verify(self, token: Any) -> Optional[Dict[str, Any]]:
+        """Retorna as claims de um token válido e não expirado, ou None"""
+        if not isinstance(token, str) or token.count(".") != 1:
+            return None
+        encoded_payload, encoded_signature = token.split(".")
+        try:
+            payload = _b64decode(encoded_payload)
+            signature = _b64decode(encoded_signature)
+        except (ValueError, TypeError):
+            return None
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        try:
+            claims = json.loads(payload.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            return None
+        if not isinstance(claims, dict) or claims.get("exp", 0) < time.time():
+            return None
+        return claims
+
+
+class DetachedSessions:
+    """
+    Sessões cujo websocket caiu, mantidas em memória durante o período de graça.
+    Cada entrada guarda o próprio ServerPlayer, para que a reconexão reaproveite
+    o estado sem recarregar o personagem do banco.
+    """
+
+    def __init__(self, grace_period: float = DEFAULT_GRACE_PERIOD):
+        self.grace_period = grace_period
+        self._sessions: Dict[str, Dict[str, Any]] = {}  # player_id -> {"session", "server_player", "nonce", ...}
+        self.detached = 0
+        self.resumed = 0
+        self.expired = 0
+
+    def detach(self, player_id: str, entry: Dict[str, Any]) -> None:
+        entry["expires_at"] = time.monotonic() + self.grace_period
+        self._sessions[player_id] = entry
+        self.detached += 1
+
+    def take(self, player_id: str, nonce: str) -> Optional[Dict[str, Any]]:
+        """Remove e retorna a sessão se ela existe, não expirou e o nonce confere"""
+        entry = self._sessions.get(player_id)
+        if entry is None or entry.get("nonce") != nonce:
+            return None
+        del self._sessions[player_id]
+        if entry["expires_at"] < time.monotonic():
+            self.expired += 1
+            return None
+        self.resumed += 1
+        return entry
+
+    def discard_character(self, character_id: str) -> Optional[Dict[str, Any]]:
+        """Descarta a sessão desconectada de um personagem (ex.: novo login com senha)"""
+        for player_id, entry in list(self._sessions.items()):
+            if entry["session"].character_id == character_id:
+                return self._sessions.pop(player_id)
+        return None
+
+    def expire(self) -> List[Dict[str, Any]]:
+        """Remove e retorna as sessões cujo período de graça acabou"""
+        now = time.monotonic()
+        expired = [player_id for player_id, entry in self._sessions.items() if entry["expires_at"] < now]
+        self.expired += len(expired)
+        return [self._sessions.pop(player_id) for player_id in expired]
+
+    def items(self) -> List[tuple]:
+        """(player_id, entrada) de todas as sessões desconectadas"""
+        return list(self._sessions.items())
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_stats(self) -> dict:
+        return {
+            "detached": len(self._sessions),
+            "total_detached": self.detached,
+            "resumed": self.resumed,
+            "expired": self.expired,
+        }
+
+
+class Session:
+    """Identidade de uma conexão: usuário, personagem, player_id e mapa atual"""
+
+    __slots__ = ("websocket", "user_id", "username", "character_id", "character_name",
+                 "character_type", "player_id", "map_name", "bound_at")
+
+    def __init__(self, websocket, user_id: str, username: str):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.username = username
+        self.character_id: Optional[str] = None
+        self.character_name: Optional[str] = None
+        self.character_type: Optional[str] = None
+        self.player_id: Optional[str] = None
+        self.map_name: Optional[str] = None
+        self.bound_at = time.time()
+
+    @property
+    def in_game(self) -> bool:
+        return self.player_id is not None
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """Identidade sem a conexão (snapshot do mundo / warm restart)"""
+        return {field: getattr(self, field) for field in self.__slots__ if field != "websocket"}
+
+    @classmethod
+    def from_snapshot(cls, data: Dict[str, Any]) -> "Session":
+        session = cls(None, data["user_id"], data["username"])
+        for field, value in data.items():
+            if field in cls.__slots__ and field != "websocket":
+                setattr(session, field, value)
+        return session
+
+    def to_dict(self) -> Dict[str, Any]:
+        remote = getattr(self.websocket, "remote_address", None)
+        return {
+            "remote_address": f"{remote[0]}:{remote[1]}" if remote else None,
+            "user_id": self.user_id,
+            "username": self.username,
+            "character_id": self.character_id,
+            "character_name": self.character_name,
+            "character_type": self.character_type,
+            "player_id": self.player_id,
+            "map": self.map_name,
+            "bound_for": round(time.time() - self.bound_at, 1),
+        }
+
+
+class SessionRegistry:
+    """
+    Registro websocket <-> user_id <-> character_id <-> player_id <-> mapa.
+    Preenchido no login (usuário) e na entrada no jogo (personagem); os handlers
+    consultam o registro em vez de procurar o player nos mapas ou no banco.
+    """
+
+    def __init__(self):
+        self._by_websocket: Dict[Any, Session] = {}
+        self._by_player: Dict[str, Session] = {}
+        self._by_character: Dict[str, Session] = {}
+
+    def bind_user(self, websocket, user_id: str, username: str) -> Session:
+        """Associa o usuário autenticado à conexão (ainda sem personagem)"""
+        session = self._by_websocket.get(websocket)
+        if session is None or session.user_id != user_id:
+            self.unbind(websocket)
+            session = Session(websocket, user_id, username)
+            self._by_websocket[websocket] = session
+        return session
+
+    def bind_character(self, websocket, character_id: str, character_name: str,
+                       character_type: str, player_id: str, map_name: str) -> Session:
+        """Associa personagem, player_id e mapa à sessão da conexão (bind_user antes)"""
+        session = self._by_websocket[websocket]
+        if session.player_id is not None:
+            self._by_player.pop(session.player_id, None)
+            self._by_character.pop(session.character_id, None)
+        session.character_id = character_id
+        session.character_name = character_name
+        session.character_type = character_type
+        session.player_id = player_id
+        session.map_name = map_name
+        self._by_player[player_id] = session
+        self._by_character[character_id] = session
+        return session
+
+    def attach(self, websocket, session: Session) -> Session:
+        """Reassocia uma sessão existente a uma nova conexão (retomada)"""
+        self.unbind(websocket)
+        session.websocket = websocket
+        self._by_websocket[websocket] = session
+        if session.player_id is not None:
+            self._by_player[session.player_id] = session
+            self._by_character[session.character_id] = session
+        return session
+
+    def set_map(self, websocket, map_name: str) -> None:
+        session = self._by_websocket.get(websocket)
+        if session is not None:
+            session.map_name = map_name
+
+    def unbind(self, websocket) -> Optional[Session]:
+        """Remove a conexão do registro. Retorna a sessão que estava associada (ou None)"""
+        session = self._by_websocket.pop(websocket, None)
+        if session is not None and session.player_id is not None:
+            if self._by_player.get(session.player_id) is session:
+                del self._by_player[session.player_id]
+            if self._by_character.get(session.character_id) is session:
+                del self._by_character[session.character_id]
+        return session
+
+    def get(self, websocket) -> Optional[Session]:
+        return self._by_websocket.get(websocket)
+
+    def by_player(self, player_id: str) -> Optional[Session]:
+        return self._by_player.get(player_id)
+
+    def by_character(self, character_id: str) -> Optional[Session]:
+        return self._by_character.get(character_id)
+
+    def in_game(self) -> List[Session]:
+        """Sessões com personagem no jogo"""
+        return list(self._by_player.values())
+
+    def clear(self) -> None:
+        self._by_websocket.clear()
+        self._by_player.clear()
+        self._by_character.clear()
+
+    def __len__(self) -> int:
+        return len(self._by_websocket)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Estado de todas as sessões (diagnóstico)"""
+        return [session.to_dict() for session in self._by_websocket.values()]
+
+    def get_stats(self) -> dict:
+        per_map: Dict[str, int] = {}
+        for session in self._by_player.values():
+            per_map[session.map_name] = per_map.get(session.map_name, 0) + 1
+        return {
+            "authenticated": len(self._by_websocket),
+            "in_game": len(self._by_player),
+            "per_map": per_map,
+        }
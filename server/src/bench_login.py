@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark das consultas de login/registro com muitas contas.
+
+Para cada tamanho cria um banco novo (schema atual, pragmas padrão), semeia N
+usuários com personagem em transações grandes e mede, numa conexão somente
+leitura como as do AsyncStore:
+  - load_account (login, nome com maiúsculas trocadas para exercitar o NOCASE)
+  - get_user_by_username de um nome inexistente (checagem do registro)
+  - get_character_by_name
+
+Uso (a partir de server/src):
+    python bench_login.py                      # 10k, 100k e 1M contas
+    python bench_login.py --sizes 10000 --lookups 5000 --keep
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db.sqlite_store import SqliteStore, SCHEMA_VERSION
+from net.metrics import LatencyHistogram
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_LOOKUPS = 2000
+SEED_CHUNK = 50_000
+
+
+def _username(i: int) -> str:
+    return f"user{i:07d}"
+
+
+def _character_name(i: int) -> str:
+    return f"Hero{i:07d}"
+
+
+def seed(store: SqliteStore, count: int) -> float:
+    """Insere `count` contas (users + characters + character_attributes). Retorna segundos"""
+    started = time.perf_counter()
+    now = int(time.time())
+    conn = store.conn
+    for first in range(0, count, SEED_CHUNK):
+        users, characters, attributes = [], [], []
+        for i in range(first, min(count, first + SEED_CHUNK)):
+            user_id = str(uuid.uuid4())
+            char_id = str(uuid.uuid4())
+            users.append((user_id, _username(i), os.urandom(32), os.urandom(32), now))
+            characters.append((char_id, user_id, _character_name(i), "warrior", 1 + i % 50, 0, 100, 0,
+                               "Cidade", 0.0, 240.0, 100, 100, now))
+            attributes.append((char_id, 8, 7, 3, 7))
+        conn.executemany("INSERT INTO users(id, username, pwd_hash, salt, created_at) VALUES(?,?,?,?,?)", users)
+        conn.executemany(
+            """
+            INSERT INTO characters(id, user_id, name, character_type, level, xp, xp_max, attr_points,
+                                   map, pos_x, pos_y, hp, hp_max, created_at)
+            VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            characters,
+        )
+        conn.executemany(
+            "INSERT INTO character_attributes(character_id, strength, defense, intelligence, vitality) VALUES(?,?,?,?,?)",
+            attributes,
+        )
+        conn.commit()
+    store.checkpoint("TRUNCATE")
+    return time.perf_counter() - started
+
+
+def measure(func, keys) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    for key in keys:
+        started = time.perf_counter()
+        func(key)
+        histogram.record(time.perf_counter() - started)
+    return histogram
+
+
+def _row(label: str, histogram: LatencyHistogram) -> str:
+    p = [histogram.percentile(q) * 1e6 for q in (50, 95, 99)]
+    return f"  {label:<26} p50 {p[0]:8.1f} µs  p95 {p[1]:8.1f} µs  p99 {p[2]:8.1f} µs  max {histogram.max * 1e6:9.1f} µs"
+
+
+def run(size: int, lookups: int, work_dir: str) -> None:
+    db_path = os.path.join(work_dir, f"bench_{size}.db")
+    writer = SqliteStore(db_path, autocommit=False)
+    writer.create_tables()
+    seconds = seed(writer, size)
+    writer.close()
+    megabytes = os.path.getsize(db_path) / (1024 * 1024)
+    print(f"{size:>9} contas: semeadas em {seconds:.1f} s ({size / seconds:,.0f}/s), banco {megabytes:.0f} MiB")
+
+    reader = SqliteStore(db_path, read_only=True)
+    rng = random.Random(size)
+    hits = [rng.randrange(size) for _ in range(lookups)]
+    logins = [_username(i).swapcase() if i % 2 else _username(i) for i in hits]
+    missing = [f"nobody{i}" for i in range(lookups)]
+    names = [_character_name(i) for i in hits]
+
+    # Aquecer cache/mmap antes de medir (um servidor em regime já tem as páginas quentes)
+    measure(reader.load_account, logins[: lookups // 4])
+    print(_row("load_account (login)", measure(reader.load_account, logins)))
+    print(_row("get_user_by_username miss", measure(reader.get_user_by_username, missing)))
+    print(_row("get_character_by_name", measure(reader.get_character_by_name, names)))
+    reader.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--lookups", type=int, default=DEFAULT_LOOKUPS)
+    parser.add_argument("--dir", help="diretório dos bancos (padrão: temporário)")
+    parser.add_argument("--keep", action="store_true", help="não apagar os bancos no final")
+    args = parser.parse_args()
+
+    work_dir = args.dir or tempfile.mkdtemp(prefix="ally_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    print(f"Schema v{SCHEMA_VERSION}, bancos em {work_dir}")
+    try:
+        for size in args.sizes:
+            run(size, args.lookups, work_dir)
+    finally:
+        if not args.keep and not args.dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
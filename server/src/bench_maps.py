@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark da simulação de inimigos: tudo no processo do servidor x MapWorkerPool.
+
+Para cada quantidade de mapas monta mapas sintéticos (N orcs espalhados e alguns
+players parados entre eles, com HP alto para não morrerem) e mede o tempo de
+parede das fases enemies/combat/respawns do MapManager por tick:
+  - local: todos os mapas no processo atual (como sem MAP_WORKER_GROUPS)
+  - workers: mapas distribuídos em round-robin por W processos worker; a fase
+    espera os workers até o prazo do tick (step_budget) e os passos que perdem o
+    prazo aparecem como "atrasados"
+
+Uso (a partir de server/src):
+    python bench_maps.py                          # 1, 2, 4 e 8 mapas, W = núcleos
+    python bench_maps.py --maps 4 16 --workers 4 --enemies 150 --ticks 300
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from typing import Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from enemies.orc_enemy import OrcEnemy
+from maps.map_instance import MapInstance, MapManager
+from maps.map_workers import MapWorkerPool
+from maps.tick_scheduler import DEFAULT_TICK_RATE
+from net.metrics import LatencyHistogram
+
+DEFAULT_MAP_COUNTS = (1, 2, 4, 8)
+DEFAULT_ENEMIES = 100
+DEFAULT_PLAYERS = 8
+DEFAULT_TICKS = 300
+WARMUP_TICKS = 30
+MIN_X, MAX_X, GROUND_Y = -540.0, 200.0, 265.0
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silencia os prints de debug (inclusive dos workers iniciados aqui dentro, que herdam o stdout)"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+def build_map(map_name: str, enemies: int, players: int) -> MapInstance:
+    map_instance = MapInstance(map_name)
+    step = (MAX_X - MIN_X) / max(1, enemies)
+    for i in range(enemies):
+        enemy_id = f"orc_{map_name}_{i}"
+        map_instance.enemies[enemy_id] = OrcEnemy(enemy_id, (MIN_X + i * step, GROUND_Y), map_name)
+    step = (MAX_X - MIN_X) / max(1, players)
+    for i in range(players):
+        player_id = f"{map_name}_p{i}"
+        map_instance.add_player(player_id, player_id)
+        player = map_instance.players[player_id]
+        player.position = [MIN_X + (i + 0.5) * step, GROUND_Y]
+        player.hp = player.max_hp = 10 ** 9
+    return map_instance
+
+
+async def _run_ticks(manager: MapManager, ticks: int, histogram: LatencyHistogram) -> None:
+    for tick in range(1, WARMUP_TICKS + ticks + 1):
+        started = time.perf_counter()
+        manager.begin_tick(tick)
+        await manager.update_all_enemies()
+        manager.resolve_all_combat()
+        manager.process_all_respawns()
+        if tick > WARMUP_TICKS:
+            histogram.record(time.perf_counter() - started)
+
+
+def run(map_count: int, workers: int, enemies: int, players: int, ticks: int) -> Tuple[LatencyHistogram, int]:
+    """Retorna o histograma por tick e quantos passos de worker perderam o prazo"""
+    names = [f"Bench{i}" for i in range(map_count)]
+    pool = None
+    with _quiet():
+        if workers:
+            pool = MapWorkerPool([names[i::workers] for i in range(min(workers, map_count))])
+            pool.start()
+        manager = MapManager(DEFAULT_TICK_RATE, pool)
+        for name in names:
+            manager.maps[name] = build_map(name, enemies, players)
+            if pool is not None and not pool.attach(manager.maps[name]):
+                raise RuntimeError(f"worker não aceitou o mapa {name}")
+
+    histogram = LatencyHistogram()
+    late = 0
+    try:
+        with _quiet():
+            asyncio.run(_run_ticks(manager, ticks, histogram))
+    finally:
+        if pool is not None:
+            late = sum(worker.late_steps for worker in pool.workers)
+            pool.close()
+    return histogram, late
+
+
+def _row(label: str, histogram: LatencyHistogram, baseline: float) -> str:
+    p50, p99 = histogram.percentile(50) * 1000.0, histogram.percentile(99) * 1000.0
+    speedup = baseline / histogram.mean if histogram.mean else 0.0
+    return (f"  {label:<12} média {histogram.mean * 1000.0:8.2f} ms  p50 {p50:8.2f} ms  p99 {p99:8.2f} ms"
+            f"  ({1.0 / histogram.mean if histogram.mean else 0:7.0f} ticks/s, x{speedup:.2f})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--maps", type=int, nargs="+", default=list(DEFAULT_MAP_COUNTS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--enemies", type=int, default=DEFAULT_ENEMIES, help="orcs por mapa")
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYERS, help="players por mapa")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS)
+    args = parser.parse_args()
+
+    print(f"{args.enemies} orcs e {args.players} players por mapa, {args.ticks} ticks, "
+          f"{args.workers} workers, {os.cpu_count()} núcleos")
+    for map_count in args.maps:
+        print(f"{map_count} mapa(s):")
+        local, _ = run(map_count, 0, args.enemies, args.players, args.ticks)
+        print(_row("local", local, local.mean))
+        parallel, late = run(map_count, args.workers, args.enemies, args.players, args.ticks)
+        print(_row(f"{min(args.workers, map_count)} workers", parallel, local.mean) + f"  {late} atrasados")
+
+
+if __name__ == "__main__":
+    main()
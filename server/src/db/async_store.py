@@ -0,0 +1,257 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Tuple, List
+
+from .store import Store
+from .sqlite_store import SqliteStore
+from .records import CharacterRecord
+
+# Janela de group commit: escritas que chegam dentro dela vão na mesma transação
+DEFAULT_FLUSH_INTERVAL = 0.05
+DEFAULT_MAX_BATCH = 512
+
+_STOP = object()
+
+
+async def resolve(result):
+    """Aguarda o resultado de uma escrita do AsyncStore (ou retorna direto se o store é síncrono)"""
+    if isinstance(result, Future):
+        return await asyncio.wrap_future(result)
+    return result
+
+
+class AsyncStore(Store):
+    """
+    Store com uma única thread escritora e leituras em conexões somente leitura.
+
+    - Escritas (create_*, save_*, update_position) são enfileiradas e retornam um
+      concurrent.futures.Future; a thread escritora junta tudo o que chega dentro de
+      flush_interval em uma transação só (um commit por lote).
+    - Leituras usam uma conexão somente leitura por thread (WAL permite ler enquanto
+      o escritor grava) e só enxergam escritas já commitadas; quem precisa ler o que
+      acabou de escrever deve aguardar o Future (ver resolve()).
+    """
+
+    def __init__(self, db_path: str, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_batch: int = DEFAULT_MAX_BATCH, store_class: type = SqliteStore) -> None:
+        """store_class: SqliteStore ou subclasse (métodos extras via submit()/read())"""
+        self.db_path = db_path
+        self.store_class = store_class
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._writer_error: Optional[BaseException] = None
+
+        # Métricas do escritor
+        self.batches = 0
+        self.writes = 0
+        self.failed_writes = 0
+        self.max_batch_seen = 0
+        self.last_commit_ms = 0.0
+        self.total_commit_ms = 0.0
+
+        self._thread = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._writer_error is not None:
+            raise self._writer_error
+
+    # ======= ESCRITOR =======
+    def _writer_loop(self) -> None:
+        try:
+            writer = self.store_class(self.db_path, autocommit=False)
+        except BaseException as e:
+            self._writer_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._run_batch(writer, batch)
+            if stop:
+                break
+
+        # WAL zerado no desligamento: o próximo startup não precisa reaplicá-lo
+        try:
+            writer.checkpoint("TRUNCATE")
+        except Exception as e:
+            print(f"[DB][WARN] Checkpoint final do WAL falhou: {e}")
+        writer.close()
+
+    def _run_batch(self, writer: SqliteStore, batch: list) -> None:
+        results = []
+        conn = writer.conn
+        for future, method, args in batch:
+            if method is None:
+                # Marcador de flush(): completa junto com o commit do lote
+                results.append((future, None, None))
+                continue
+            # Cada escrita em um savepoint dentro da transação do lote: a que falha no
+            # meio (ex.: create_character depois do INSERT em characters) é desfeita
+            # inteira e não vai junto no commit das demais
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            conn.execute("SAVEPOINT write")
+            try:
+                result = getattr(writer, method)(*args)
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                results.append((future, None, e))
+                continue
+            # create_tables faz o próprio commit (o savepoint já foi junto)
+            if conn.in_transaction:
+                conn.execute("RELEASE write")
+            results.append((future, result, None))
+
+        started = time.perf_counter()
+        try:
+            writer.conn.commit()
+        except Exception as e:
+            writer.conn.rollback()
+            results = [(future, None, e) for future, _, _ in results]
+        commit_ms = (time.perf_counter() - started) * 1000.0
+
+        self.batches += 1
+        self.writes += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.last_commit_ms = commit_ms
+        self.total_commit_ms += commit_ms
+
+        # Só agora (após o commit) as escritas são duráveis
+        for future, result, error in results:
+            if error is not None:
+                self.failed_writes += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def submit(self, method: str, *args) -> Future:
+        """Enfileira uma escrita arbitrária do store_class (ex.: métodos de subclasses)"""
+        return self._submit(method, *args)
+
+    def read(self, method: str, *args):
+        """Executa uma leitura arbitrária do store_class na conexão somente leitura da thread"""
+        return getattr(self._reader(), method)(*args)
+
+    def _submit(self, method: str, *args) -> Future:
+        future: Future = Future()
+        if not self._thread.is_alive():
+            future.set_exception(RuntimeError("AsyncStore fechado"))
+            return future
+        self._queue.put((future, method, args))
+        return future
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Drena a fila (commit final) e fecha todas as conexões"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        with self._readers_lock:
+            for reader in self._readers:
+                try:
+                    reader.close()
+                except Exception:
+                    pass
+            self._readers.clear()
+
+    # ======= LEITURA =======
+    def _reader(self) -> SqliteStore:
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = self.store_class(self.db_path, read_only=True)
+            self._local.reader = reader
+            with self._readers_lock:
+                self._readers.append(reader)
+        return reader
+
+    @property
+    def conn(self):
+        """Conexão somente leitura da thread atual (compatibilidade com acesso direto a store.conn)"""
+        return self._reader().conn
+
+    # ======= CONTRATO Store =======
+    def create_tables(self) -> None:
+        self._submit("create_tables").result()
+
+    def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return self._reader().get_user_by_username(username)
+
+    def create_user(self, username: str, pwd_hash: Optional[bytes], salt: Optional[bytes]) -> Future:
+        return self._submit("create_user", username, pwd_hash, salt)
+
+    def get_character_by_user_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._reader().get_character_by_user_id(user_id)
+
+    def get_character_by_name(self, character_name: str) -> Optional[Dict[str, Any]]:
+        return self._reader().get_character_by_name(character_name)
+
+    def list_character_names(self) -> List[str]:
+        return self._reader().list_character_names()
+
+    def create_character(self, user_id: str, name: str, character_type: str, defaults: Dict[str, Any]) -> Future:
+        return self._submit("create_character", user_id, name, character_type, defaults)
+
+    def load_character_full(self, user_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        return self._reader().load_character_full(user_id)
+
+    def load_account(self, username: str) -> Optional[Tuple[Dict[str, Any], Optional[CharacterRecord]]]:
+        return self._reader().load_account(username)
+
+    def save_character_state(self, character_id: str, state: Dict[str, Any]) -> Future:
+        return self._submit("save_character_state", character_id, dict(state))
+
+    def save_character_attributes(self, character_id: str, attrs: Dict[str, int]) -> Future:
+        return self._submit("save_character_attributes", character_id, dict(attrs))
+
+    def update_position(self, character_id: str, map_name: str, x: float, y: float) -> Future:
+        return self._submit("update_position", character_id, map_name, x, y)
+
+    def flush(self) -> Future:
+        """Future que completa quando tudo o que foi enfileirado antes dele estiver commitado"""
+        return self._submit(None)
+
+    def get_user_id_by_character_id(self, character_id: str) -> Optional[str]:
+        return self._reader().get_user_id_by_character_id(character_id)
+
+    def get_character_by_id(self, character_id: str) -> Optional[Dict[str, Any]]:
+        return self._reader().get_character_by_id(character_id)
+
+    # ======= MÉTRICAS =======
+    def get_stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "writes": self.writes,
+            "failed_writes": self.failed_writes,
+            "avg_batch": round(self.writes / self.batches, 2) if self.batches else 0.0,
+            "max_batch": self.max_batch_seen,
+            "last_commit_ms": round(self.last_commit_ms, 3),
+            "avg_commit_ms": round(self.total_commit_ms / self.batches, 3) if self.batches else 0.0,
+            "readers": len(self._readers),
+        }
@@ -0,0 +1,352 @@
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple, List
+
+from .store import Store
+from .records import CharacterRecord
+
+# Intervalo (s) entre fsyncs do journal: uma queda perde no máximo esse intervalo
+DEFAULT_FSYNC_INTERVAL = 1.0
+# Compactação (journal -> tabelas) por tempo ou por tamanho do arquivo
+DEFAULT_COMPACT_INTERVAL = 30.0
+DEFAULT_COMPACT_BYTES = 4 * 1024 * 1024
+
+# Colunas de characters gravadas por save_character_state/update_position
+_STATE_COLUMNS = ("level", "xp", "xp_max", "attr_points", "map", "pos_x", "pos_y", "hp", "hp_max")
+_ATTRIBUTE_COLUMNS = ("strength", "defense", "intelligence", "vitality")
+
+
+class JournalStore(Store):
+    """
+    Modo de persistência com journal append-only na frente de outro Store.
+
+    - Alterações de estado (save_character_state/attributes, update_position,
+      save_character) viram uma linha JSON no fim de `journal_path`; o arquivo
+      recebe fsync a cada `fsync_interval`.
+    - Um compactador em background aplica o estado acumulado nas tabelas
+      characters/character_attributes do store interno e rotaciona o journal.
+    - Na inicialização, o que sobrou de journal (queda antes da compactação) é
+      reaplicado. As entradas gravam valores de colunas (não incrementos), então
+      reaplicar uma entrada já compactada não muda nada.
+    - Leituras vão ao store interno com o estado ainda não compactado por cima.
+    Criação de usuários/personagens não passa pelo journal.
+    """
+
+    def __init__(self, inner: Store, journal_path: str,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                 compact_interval: float = DEFAULT_COMPACT_INTERVAL,
+                 compact_bytes: int = DEFAULT_COMPACT_BYTES) -> None:
+        self.inner = inner
+        self.journal_path = journal_path
+        self.old_journal_path = journal_path + ".old"
+        self.rotating_journal_path = journal_path + ".rotating"
+        self.fsync_interval = fsync_interval
+        self.compact_interval = compact_interval
+        self.compact_bytes = compact_bytes
+
+        # _lock protege só memória e o write() no buffer: _append roda no event loop
+        self._lock = threading.Lock()
+        # Uma compactação por vez (compactador em background x close/stop_server)
+        self._compact_lock = threading.Lock()
+        # fsync, rotação e fechamento do arquivo (fora do _lock: o disco não trava o append)
+        self._io_lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Dict[str, Any]]] = {}     # character_id -> {"state", "attrs"}
+        self._compacting: Dict[str, Dict[str, Dict[str, Any]]] = {}  # lote sendo aplicado nas tabelas
+        self._seq = 0
+        self._unsynced = False
+
+        # Métricas
+        self.appends = 0
+        self.bytes_appended = 0
+        self.fsyncs = 0
+        self.compactions = 0
+        self.compacted_characters = 0
+        self.replayed_entries = 0
+        self.last_compact_ms = 0.0
+
+        os.makedirs(os.path.dirname(os.path.abspath(journal_path)), exist_ok=True)
+        self._replay()
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_bytes = self._file.tell()
+        self._last_compact = time.monotonic()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._background_loop, name="db-journal", daemon=True)
+        self._thread.start()
+
+    # ======= JOURNAL =======
+    def _append(self, character_id: str, state: Optional[Dict[str, Any]] = None,
+                attrs: Optional[Dict[str, Any]] = None, reason: Optional[str] = None) -> None:
+        state = {k: v for k, v in (state or {}).items() if k in _STATE_COLUMNS}
+        attrs = {k: v for k, v in (attrs or {}).items() if k in _ATTRIBUTE_COLUMNS}
+        if not state and not attrs:
+            return
+        with self._lock:
+            self._seq += 1
+            entry = {"seq": self._seq, "ts": round(time.time(), 3), "cid": character_id}
+            if reason:
+                entry["reason"] = reason
+            if state:
+                entry["state"] = state
+            if attrs:
+                entry["attrs"] = attrs
+            line = json.dumps(entry, separators=(",", ":")) + "\n"
+            self._file.write(line)
+            self._journal_bytes += len(line)
+            self._unsynced = True
+            self.appends += 1
+            self.bytes_appended += len(line)
+            self._fold(self._pending, character_id, state, attrs)
+
+    @staticmethod
+    def _fold(target: Dict[str, Dict[str, Dict[str, Any]]], character_id: str,
+              state: Dict[str, Any], attrs: Dict[str, Any]) -> None:
+        entry = target.setdefault(character_id, {"state": {}, "attrs": {}})
+        entry["state"].update(state)
+        entry["attrs"].update(attrs)
+
+    def _sync(self) -> None:
+        """flush + fsync do journal. Só o flush roda com o _lock; o fsync não bloqueia _append"""
+        with self._io_lock:
+            with self._lock:
+                if not self._unsynced or self._file.closed:
+                    return
+                self._file.flush()
+                self._unsynced = False
+                fd = self._file.fileno()
+            try:
+                os.fsync(fd)
+            except OSError:
+                with self._lock:
+                    self._unsynced = True
+                raise
+            self.fsyncs += 1
+
+    def _read_journal(self, path: str) -> List[Dict[str, Any]]:
+        entries = []
+        if not os.path.exists(path):
+            return entries
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # última linha incompleta (queda durante a escrita)
+        return entries
+
+    def _replay(self) -> None:
+        """Aplica nas tabelas o journal que sobrou da execução anterior"""
+        entries = []
+        for path in (self.old_journal_path, self.rotating_journal_path, self.journal_path):
+            entries += self._read_journal(path)
+        if entries:
+            folded: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for entry in entries:
+                self._fold(folded, entry["cid"], entry.get("state", {}), entry.get("attrs", {}))
+                self._seq = max(self._seq, entry.get("seq", 0))
+            self._apply(folded)
+            self.replayed_entries = len(entries)
+            print(f"[JOURNAL] {len(entries)} entradas reaplicadas ({len(folded)} personagens)")
+        for path in (self.old_journal_path, self.rotating_journal_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _apply(self, folded: Dict[str, Dict[str, Dict[str, Any]]]) -> None:
+        """Grava o estado acumulado no store interno e espera o commit"""
+        results = []
+        for character_id, entry in folded.items():
+            if entry["state"]:
+                results.append(self.inner.save_character_state(character_id, entry["state"]))
+            if entry["attrs"]:
+                results.append(self.inner.save_character_attributes(character_id, entry["attrs"]))
+        done = self.inner.flush()
+        for result in results + [done]:
+            if hasattr(result, "result"):
+                result.result()
+
+    # ======= COMPACTAÇÃO =======
+    def compact(self) -> int:
+        """Aplica o journal nas tabelas e começa um arquivo novo. Retorna quantos personagens foram gravados"""
+        with self._compact_lock:
+            return self._compact()
+
+    def _compact(self) -> int:
+        started = time.perf_counter()
+        with self._io_lock:
+            # Com o _lock só a troca do arquivo (rename + open); fsync e cópia ficam fora
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._file.flush()
+                rotated = self._file
+                os.replace(self.journal_path, self.rotating_journal_path)
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+                self._journal_bytes = 0
+                self._unsynced = False
+                self._compacting = self._pending
+                self._pending = {}
+            os.fsync(rotated.fileno())
+            rotated.close()
+        if os.path.exists(self.old_journal_path):
+            # Compactação anterior falhou: o .old continua valendo, acrescentar a ele
+            with open(self.rotating_journal_path, "r", encoding="utf-8") as src, \
+                    open(self.old_journal_path, "a", encoding="utf-8") as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.rotating_journal_path)
+        else:
+            os.replace(self.rotating_journal_path, self.old_journal_path)
+        batch = self._compacting
+        try:
+            self._apply(batch)
+        except Exception as e:
+            # Mantém o .old no disco: será reaplicado no próximo startup
+            print(f"[JOURNAL][ERROR] Falha na compactação: {e}")
+            with self._lock:
+                # O lote volta a ser pendente com o que chegou depois da rotação por cima
+                for character_id, entry in self._pending.items():
+                    self._fold(batch, character_id, entry["state"], entry["attrs"])
+                self._pending = batch
+                self._compacting = {}
+            return 0
+        with self._lock:
+            self._compacting = {}
+        if os.path.exists(self.old_journal_path):
+            os.remove(self.old_journal_path)
+        self._last_compact = time.monotonic()
+        self.compactions += 1
+        self.compacted_characters += len(batch)
+        self.last_compact_ms = (time.perf_counter() - started) * 1000.0
+        return len(batch)
+
+    def _background_loop(self) -> None:
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self._sync()
+                with self._lock:
+                    journal_bytes = self._journal_bytes
+                if (journal_bytes >= self.compact_bytes
+                        or time.monotonic() - self._last_compact >= self.compact_interval):
+                    self.compact()
+            except Exception as e:
+                print(f"[JOURNAL][ERROR] {e}")
+
+    def close(self) -> None:
+        """Compacta tudo, apaga o journal e fecha o store interno"""
+        self._stop.set()
+        self._thread.join()
+        self.compact()
+        self._sync()
+        with self._io_lock, self._lock:
+            self._file.close()
+        if hasattr(self.inner, "close"):
+            self.inner.close()
+
+    # ======= LEITURA (store interno + estado não compactado) =======
+    def _overlay(self, character_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        state: Dict[str, Any] = {}
+        attrs: Dict[str, Any] = {}
+        with self._lock:
+            for source in (self._compacting, self._pending):
+                entry = source.get(character_id)
+                if entry:
+                    state.update(entry["state"])
+                    attrs.update(entry["attrs"])
+        return state, attrs
+
+    def _overlay_character(self, char: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if char:
+            char.update(self._overlay(char["id"])[0])
+        return char
+
+    # ======= CONTRATO Store =======
+    def create_tables(self) -> None:
+        self.inner.create_tables()
+
+    def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return self.inner.get_user_by_username(username)
+
+    def create_user(self, username: str, pwd_hash: Optional[bytes], salt: Optional[bytes]):
+        return self.inner.create_user(username, pwd_hash, salt)
+
+    def get_character_by_user_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._overlay_character(self.inner.get_character_by_user_id(user_id))
+
+    def get_character_by_name(self, character_name: str) -> Optional[Dict[str, Any]]:
+        return self._overlay_character(self.inner.get_character_by_name(character_name))
+
+    def list_character_names(self) -> List[str]:
+        return self.inner.list_character_names()
+
+    def create_character(self, user_id: str, name: str, character_type: str, defaults: Dict[str, Any]):
+        return self.inner.create_character(user_id, name, character_type, defaults)
+
+    def load_character_full(self, user_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        result = self.inner.load_character_full(user_id)
+        if not result:
+            return result
+        char, attrs = result
+        state, attr_changes = self._overlay(char["id"])
+        char.update(state)
+        if attrs is not None:
+            attrs.update(attr_changes)
+        return (char, attrs)
+
+    def load_account(self, username: str) -> Optional[Tuple[Dict[str, Any], Optional[CharacterRecord]]]:
+        result = self.inner.load_account(username)
+        if not result or result[1] is None:
+            return result
+        user, character = result
+        state, attrs = self._overlay(character.character_id)
+        for column, value in state.items():
+            setattr(character, "map_name" if column == "map" else column, value)
+        for column, value in attrs.items():
+            setattr(character, column, value)
+        return (user, character)
+
+    def save_character_state(self, character_id: str, state: Dict[str, Any]) -> None:
+        self._append(character_id, state=state)
+
+    def save_character_attributes(self, character_id: str, attrs: Dict[str, int]) -> None:
+        self._append(character_id, attrs=attrs)
+
+    def save_character(self, character_id: str, state: Dict[str, Any], attrs: Dict[str, int],
+                       reason: Optional[str] = None) -> list:
+        self._append(character_id, state, attrs, reason)
+        return []
+
+    def update_position(self, character_id: str, map_name: str, x: float, y: float) -> None:
+        self._append(character_id, state={"map": map_name, "pos_x": float(x), "pos_y": float(y)}, reason="position")
+
+    def flush(self):
+        """fsync do journal (a escrita já é durável); retorna o flush do store interno para quem aguarda"""
+        self._sync()
+        return self.inner.flush()
+
+    def get_user_id_by_character_id(self, character_id: str) -> Optional[str]:
+        return self.inner.get_user_id_by_character_id(character_id)
+
+    def get_character_by_id(self, character_id: str) -> Optional[Dict[str, Any]]:
+        return self._overlay_character(self.inner.get_character_by_id(character_id))
+
+    # ======= MÉTRICAS =======
+    def get_stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+            journal_bytes = self._journal_bytes
+        return {
+            "mode": "journal",
+            "appends": self.appends,
+            "bytes_appended": self.bytes_appended,
+            "journal_bytes": journal_bytes,
+            "pending_characters": pending,
+            "fsyncs": self.fsyncs,
+            "compactions": self.compactions,
+            "compacted_characters": self.compacted_characters,
+            "last_compact_ms": round(self.last_compact_ms, 3),
+            "replayed_entries": self.replayed_entries,
+            "inner": self.inner.get_stats() if hasattr(self.inner, "get_stats") else {},
+        }
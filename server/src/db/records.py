@@ -0,0 +1,73 @@
+from typing import Optional, Dict, Any
+
+
+class CharacterRecord:
+    """
+    Personagem completo (usuário + characters + character_attributes), hidratado
+    em uma única consulta. É o que o ServerPlayer recebe no construtor.
+    """
+
+    __slots__ = ("character_id", "user_id", "username", "name", "character_type",
+                 "level", "xp", "xp_max", "attr_points", "map_name", "pos_x", "pos_y",
+                 "hp", "hp_max", "strength", "defense", "intelligence", "vitality")
+
+    def __init__(self, character_id: str, user_id: str, name: str, character_type: str = "warrior",
+                 level: int = 1, xp: int = 0, xp_max: int = 100, attr_points: int = 0,
+                 map_name: str = "Cidade", pos_x: Optional[float] = None, pos_y: Optional[float] = None,
+                 hp: int = 100, hp_max: int = 100, strength: int = 5, defense: int = 5,
+                 intelligence: int = 5, vitality: int = 5, username: Optional[str] = None):
+        self.character_id = character_id
+        self.user_id = user_id
+        self.username = username
+        self.name = name
+        self.character_type = character_type or "warrior"
+        self.level = level
+        self.xp = xp
+        self.xp_max = xp_max
+        self.attr_points = attr_points
+        self.map_name = map_name or "Cidade"
+        self.pos_x = pos_x
+        self.pos_y = pos_y
+        self.hp = hp
+        self.hp_max = hp_max
+        self.strength = strength
+        self.defense = defense
+        self.intelligence = intelligence
+        self.vitality = vitality
+
+    @classmethod
+    def from_row(cls, row) -> "CharacterRecord":
+        """Linha do SELECT de SqliteStore.load_account (colunas com os nomes deste registro)"""
+        row = dict(row)
+        attrs = {}
+        for attr in ("strength", "defense", "intelligence", "vitality"):
+            if row.get(attr) is not None:  # LEFT JOIN sem linha em character_attributes
+                attrs[attr] = row[attr]
+        return cls(
+            row["character_id"], row["user_id"], row["name"], row.get("character_type"),
+            level=row["level"], xp=row["xp"], xp_max=row["xp_max"], attr_points=row["attr_points"],
+            map_name=row["map"], pos_x=row["pos_x"], pos_y=row["pos_y"],
+            hp=row["hp"], hp_max=row["hp_max"], username=row.get("username"), **attrs
+        )
+
+    @classmethod
+    def from_defaults(cls, character_id: str, user_id: str, username: Optional[str], name: str,
+                      character_type: str, defaults: Dict[str, Any]) -> "CharacterRecord":
+        """Registro de um personagem recém-criado com `defaults` (sem reler do banco)"""
+        return cls(
+            character_id, user_id, name, character_type,
+            level=defaults.get("level", 1), xp=defaults.get("xp", 0),
+            xp_max=defaults.get("xp_max", 100), attr_points=defaults.get("attr_points", 0),
+            map_name=defaults.get("map", "Cidade"),
+            pos_x=float(defaults.get("pos_x", 0.0)), pos_y=float(defaults.get("pos_y", 0.0)),
+            hp=defaults.get("hp", 100), hp_max=defaults.get("hp_max", 100),
+            strength=defaults.get("strength", 5), defense=defaults.get("defense", 5),
+            intelligence=defaults.get("intelligence", 5), vitality=defaults.get("vitality", 5),
+            username=username,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"CharacterRecord({self.name!r}, id={self.character_id!r}, level={self.level})"
@@ -0,0 +1,253 @@
+import os
+import threading
+import uuid
+import zlib
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Tuple, List
+
+from .store import Store
+from .sqlite_store import SqliteStore
+from .async_store import AsyncStore, DEFAULT_FLUSH_INTERVAL
+from .records import CharacterRecord
+
+DEFAULT_SHARDS = 4
+
+
+def _gather(futures: List[Future]) -> Future:
+    """Future que completa quando todos completam (com a primeira exceção, se houver)"""
+    combined: Future = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+    if not futures:
+        combined.set_result(None)
+        return combined
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            combined.set_exception(errors[0])
+        else:
+            combined.set_result(None)
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+class CatalogStore(SqliteStore):
+    """
+    Banco catálogo do ShardedStore: users (login/registro) e o diretório de
+    personagens (id, user_id, nome único sem diferenciar maiúsculas, shard).
+    Usa o mesmo schema versionado do SqliteStore; as tabelas de personagem dele ficam vazias.
+    """
+
+    def create_tables(self) -> None:
+        super().create_tables()
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS character_directory (
+                character_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                shard INTEGER NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_directory_name_nocase ON character_directory(name COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_directory_user ON character_directory(user_id);
+
+            CREATE TABLE IF NOT EXISTS catalog_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        self.conn.commit()
+
+    def check_shard_count(self, shards: int) -> None:
+        """Grava o número de shards na primeira execução; depois ele não pode mudar (o roteamento é por hash)"""
+        row = self.conn.execute("SELECT value FROM catalog_meta WHERE key='shards'").fetchone()
+        if row is None:
+            self.conn.execute("INSERT INTO catalog_meta(key, value) VALUES('shards', ?)", (str(shards),))
+            self._commit()
+        elif int(row[0]) != shards:
+            raise RuntimeError(f"Catálogo criado com {row[0]} shards, configurado com {shards}")
+
+    def register_character(self, character_id: str, user_id: str, name: str, shard: int) -> None:
+        self.conn.execute(
+            "INSERT INTO character_directory(character_id, user_id, name, shard) VALUES(?,?,?,?)",
+            (character_id, user_id, name, shard),
+        )
+        self._commit()
+
+    def unregister_character(self, character_id: str) -> None:
+        self.conn.execute("DELETE FROM character_directory WHERE character_id=?", (character_id,))
+        self._commit()
+
+    def directory_by_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM character_directory WHERE user_id=? LIMIT 1", (user_id,)).fetchone()
+        return dict(row) if row else None
+
+    def directory_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM character_directory WHERE name=? COLLATE NOCASE", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def load_user_entry(self, username: str) -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """Usuário + entrada do diretório do seu personagem, em uma consulta"""
+        row = self.conn.execute(
+            """
+            SELECT u.id AS user_id, u.username, u.pwd_hash, u.salt, d.character_id, d.shard
+            FROM users u INDEXED BY idx_users_login
+            LEFT JOIN character_directory d ON d.user_id = u.id
+            WHERE u.username=? COLLATE NOCASE
+            LIMIT 1
+            """,
+            (username,),
+        ).fetchone()
+        if not row:
+            return None
+        user = {"id": row["user_id"], "username": row["username"], "pwd_hash": row["pwd_hash"], "salt": row["salt"]}
+        entry = {"character_id": row["character_id"], "shard": row["shard"]} if row["character_id"] else None
+        return (user, entry)
+
+    def list_character_names(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT name FROM character_directory")]
+
+    def get_user_id_by_character_id(self, character_id: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT user_id FROM character_directory WHERE character_id=?", (character_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+
+class ShardedStore(Store):
+    """
+    Store particionado: characters/character_attributes espalhados em N bancos
+    (shard_<i>.db) pelo hash do character_id, e um catálogo (catalog.db) com users
+    e o diretório de nomes. Cada banco é um AsyncStore com a própria thread escritora,
+    então checkpoints de personagens em shards diferentes commitam em paralelo.
+
+    Mesma interface do AsyncStore: escritas retornam Futures (ver resolve()).
+    create_character grava primeiro no catálogo (garante o nome único) e depois no
+    shard; se o shard falhar, a entrada do catálogo é removida. Uma queda entre os
+    dois deixa uma entrada sem personagem: load_account a trata como "sem personagem".
+    O número de shards fica gravado no catálogo e não pode mudar depois.
+    """
+
+    def __init__(self, data_dir: str, shards: int = DEFAULT_SHARDS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL) -> None:
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self.catalog = AsyncStore(os.path.join(data_dir, "catalog.db"), flush_interval, store_class=CatalogStore)
+        self.shards = [AsyncStore(os.path.join(data_dir, f"shard_{i}.db"), flush_interval)
+                       for i in range(shards)]
+
+    def shard_for(self, character_id: str) -> AsyncStore:
+        # crc32 (e não hash()): o mesmo id cai no mesmo shard em qualquer processo
+        return self.shards[self.shard_index(character_id)]
+
+    def shard_index(self, character_id: str) -> int:
+        return zlib.crc32(character_id.encode("utf-8")) % len(self.shards)
+
+    def close(self, timeout: float = 5.0) -> None:
+        for store in (self.catalog, *self.shards):
+            store.close(timeout)
+
+    # ======= CONTRATO Store =======
+    def create_tables(self) -> None:
+        self.catalog.create_tables()
+        self.catalog.submit("check_shard_count", len(self.shards)).result()
+        for shard in self.shards:
+            shard.create_tables()
+
+    def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return self.catalog.get_user_by_username(username)
+
+    def create_user(self, username: str, pwd_hash: Optional[bytes], salt: Optional[bytes]) -> Future:
+        return self.catalog.create_user(username, pwd_hash, salt)
+
+    def get_character_by_user_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.catalog.read("directory_by_user", user_id)
+        return self.shards[entry["shard"]].get_character_by_id(entry["character_id"]) if entry else None
+
+    def get_character_by_name(self, character_name: str) -> Optional[Dict[str, Any]]:
+        entry = self.catalog.read("directory_by_name", character_name)
+        return self.shards[entry["shard"]].get_character_by_id(entry["character_id"]) if entry else None
+
+    def list_character_names(self) -> List[str]:
+        return self.catalog.list_character_names()
+
+    def create_character(self, user_id: str, name: str, character_type: str, defaults: Dict[str, Any]) -> Future:
+        character_id = str(uuid.uuid4())
+        shard_index = self.shard_index(character_id)
+        result: Future = Future()
+
+        def on_shard(shard_future: Future) -> None:
+            error = shard_future.exception()
+            if error is not None:
+                self.catalog.submit("unregister_character", character_id)
+                result.set_exception(error)
+            else:
+                result.set_result(character_id)
+
+        def on_catalog(catalog_future: Future) -> None:
+            error = catalog_future.exception()
+            if error is not None:
+                result.set_exception(error)
+                return
+            self.shards[shard_index].submit(
+                "create_character", user_id, name, character_type, dict(defaults), character_id
+            ).add_done_callback(on_shard)
+
+        self.catalog.submit("register_character", character_id, user_id, name, shard_index).add_done_callback(on_catalog)
+        return result
+
+    def load_character_full(self, user_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        entry = self.catalog.read("directory_by_user", user_id)
+        return self.shards[entry["shard"]].load_character_full(user_id) if entry else None
+
+    def load_account(self, username: str) -> Optional[Tuple[Dict[str, Any], Optional[CharacterRecord]]]:
+        found = self.catalog.read("load_user_entry", username)
+        if not found:
+            return None
+        user, entry = found
+        if entry is None:
+            return (user, None)
+        character = self.shards[entry["shard"]].read("load_character_record", entry["character_id"])
+        if character is not None:
+            character.username = user["username"]
+        return (user, character)
+
+    def save_character_state(self, character_id: str, state: Dict[str, Any]) -> Future:
+        return self.shard_for(character_id).save_character_state(character_id, state)
+
+    def save_character_attributes(self, character_id: str, attrs: Dict[str, int]) -> Future:
+        return self.shard_for(character_id).save_character_attributes(character_id, attrs)
+
+    def update_position(self, character_id: str, map_name: str, x: float, y: float) -> Future:
+        return self.shard_for(character_id).update_position(character_id, map_name, x, y)
+
+    def flush(self) -> Future:
+        """Future que completa quando catálogo e todos os shards commitaram o que já foi enfileirado"""
+        return _gather([store.flush() for store in (self.catalog, *self.shards)])
+
+    def get_user_id_by_character_id(self, character_id: str) -> Optional[str]:
+        return self.catalog.get_user_id_by_character_id(character_id)
+
+    def get_character_by_id(self, character_id: str) -> Optional[Dict[str, Any]]:
+        return self.shard_for(character_id).get_character_by_id(character_id)
+
+    # ======= MÉTRICAS =======
+    def get_stats(self) -> dict:
+        shard_stats = [shard.get_stats() for shard in self.shards]
+        return {
+            "shards": len(self.shards),
+            "queued": sum(stats["queued"] for stats in shard_stats),
+            "writes": sum(stats["writes"] for stats in shard_stats),
+            "batches": sum(stats["batches"] for stats in shard_stats),
+            "failed_writes": sum(stats["failed_writes"] for stats in shard_stats),
+            "catalog": self.catalog.get_stats(),
+            "per_shard": shard_stats,
+        }
@@ -2,9 +2,29 @@ import os
 import sqlite3
 import time
 import uuid
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List
 
 from .store import Store
+from .records import CharacterRecord
+
+
+# Versão do schema gravada em PRAGMA user_version; _migrate_N leva o banco de N-1 para N
+SCHEMA_VERSION = 2
+
+# Ajustes para um banco de jogo com muita escrita (uma thread escritora, leitores em WAL).
+# synchronous=NORMAL em WAL: sem fsync por commit; um crash do processo não perde nada,
+# uma queda de energia pode perder os últimos commits (nunca corrompe o banco).
+DEFAULT_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -65536,            # KiB (64 MiB) de page cache por conexão
+    "mmap_size": 256 * 1024 * 1024,  # leituras via mmap em vez de read()
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,            # ms
+    "wal_autocheckpoint": 4000,      # páginas (~16 MiB de WAL) antes do checkpoint automático
+    "journal_size_limit": 64 * 1024 * 1024,  # WAL truncado para no máximo isso após checkpoint
+}
+# Pragmas que valem para conexões somente leitura
+READER_PRAGMAS = ("cache_size", "mmap_size", "temp_store", "busy_timeout")
 
 
 def _uuid() -> str:
@@ -12,17 +32,69 @@ def _uuid() -> str:
 
 
 class SqliteStore(Store):
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, read_only: bool = False, autocommit: bool = True,
+                 pragmas: Optional[Dict[str, Any]] = None) -> None:
+        """
+        read_only: conexão somente leitura (leituras concorrentes com o escritor no modo WAL)
+        autocommit: False = quem usa a conexão decide quando fazer commit (group commit do AsyncStore)
+        pragmas: substitui DEFAULT_PRAGMAS (ver acima)
+        """
         self.db_path = db_path
+        self.read_only = read_only
+        self.autocommit = autocommit
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        if read_only:
+            uri = "file:" + os.path.abspath(db_path).replace("?", "%3f") + "?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+            self._apply_pragmas(READER_PRAGMAS)
+            return
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
         # Melhor concorrência
         self.conn.execute("PRAGMA journal_mode=WAL;")
+        self._apply_pragmas(self.pragmas)
+
+    def _apply_pragmas(self, names) -> None:
+        for name in names:
+            if name in self.pragmas:
+                self.conn.execute(f"PRAGMA {name}={self.pragmas[name]}")
+
+    def _commit(self) -> None:
+        if self.autocommit:
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def checkpoint(self, mode: str = "PASSIVE") -> Tuple[int, int, int]:
+        """Checkpoint do WAL (PASSIVE, FULL, RESTART ou TRUNCATE). Retorna (busy, páginas no WAL, páginas copiadas)"""
+        return tuple(self.conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+    @property
+    def schema_version(self) -> int:
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
 
     def create_tables(self) -> None:
-        cur = self.conn.cursor()
-        cur.executescript(
+        """Aplica as migrações pendentes, cada uma em um savepoint junto com o novo user_version"""
+        version = self.schema_version
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            self.conn.execute("SAVEPOINT migrate")
+            try:
+                getattr(self, f"_migrate_{target}")()
+                self.conn.execute(f"PRAGMA user_version={target}")
+            except Exception:
+                self.conn.execute("ROLLBACK TO migrate")
+                self.conn.execute("RELEASE migrate")
+                raise
+            self.conn.execute("RELEASE migrate")
+            print(f"[DB] Schema migrado para a versão {target}")
+        self.conn.commit()
+
+    def _migrate_1(self) -> None:
+        """Tabelas base (bancos anteriores ao versionamento já podem tê-las)"""
+        self.conn.execute(
             """
             CREATE TABLE IF NOT EXISTS users (
                 id TEXT PRIMARY KEY,
@@ -31,8 +103,11 @@ class SqliteStore(Store):
                 pwd_hash BLOB,
                 salt BLOB,
                 created_at INTEGER NOT NULL
-            );
-
+            )
+            """
+        )
+        self.conn.execute(
+            """
             CREATE TABLE IF NOT EXISTS characters (
                 id TEXT PRIMARY KEY,
                 user_id TEXT NOT NULL,
@@ -49,8 +124,11 @@ class SqliteStore(Store):
                 hp_max INTEGER NOT NULL,
                 created_at INTEGER NOT NULL,
                 FOREIGN KEY(user_id) REFERENCES users(id)
-            );
-
+            )
+            """
+        )
+        self.conn.execute(
+            """
             CREATE TABLE IF NOT EXISTS character_attributes (
                 character_id TEXT PRIMARY KEY,
                 strength INTEGER NOT NULL,
@@ -58,26 +136,43 @@ class SqliteStore(Store):
                 intelligence INTEGER NOT NULL,
                 vitality INTEGER NOT NULL,
                 FOREIGN KEY(character_id) REFERENCES characters(id)
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
-            CREATE INDEX IF NOT EXISTS idx_chars_user ON characters(user_id);
-            CREATE INDEX IF NOT EXISTS idx_chars_name ON characters(name);
+            )
             """
         )
-        
-        # Migração: Adicionar coluna character_type se não existir
-        try:
-            cur.execute("ALTER TABLE characters ADD COLUMN character_type TEXT DEFAULT 'warrior'")
-            self.conn.commit()
-        except Exception:
-            # Coluna já existe, ignorar
-            pass
-        
-        self.conn.commit()
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chars_user ON characters(user_id)")
+        # Bancos criados antes da coluna character_type
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(characters)")}
+        if "character_type" not in columns:
+            self.conn.execute("ALTER TABLE characters ADD COLUMN character_type TEXT DEFAULT 'warrior'")
+
+    def _migrate_2(self) -> None:
+        """
+        Nomes únicos sem diferenciar maiúsculas (como o NameRegistry) e índice de cobertura
+        para o login: username -> (id, pwd_hash, salt) sem visitar a tabela users
+        (load_account usa INDEXED BY: sozinho o planner prefere o índice UNIQUE).
+        Os índices antigos case-sensitive são redundantes com os UNIQUE das colunas.
+        """
+        self.conn.execute("DROP INDEX IF EXISTS idx_users_username")
+        self.conn.execute("DROP INDEX IF EXISTS idx_chars_name")
+        self._create_nocase_unique_index("idx_users_username_nocase", "users", "username")
+        self._create_nocase_unique_index("idx_chars_name_nocase", "characters", "name")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_users_login ON users(username COLLATE NOCASE, id, pwd_hash, salt)"
+        )
+
+    def _create_nocase_unique_index(self, index: str, table: str, column: str) -> None:
+        duplicates = self.conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM {table} GROUP BY {column} COLLATE NOCASE HAVING COUNT(*) > 1)"
+        ).fetchone()[0]
+        unique = "UNIQUE " if not duplicates else ""
+        if duplicates:
+            # Dados antigos com nomes que só diferem em maiúsculas: índice sem UNIQUE
+            print(f"[DB][WARN] {duplicates} valores de {table}.{column} repetidos ignorando maiúsculas; "
+                  f"{index} criado sem UNIQUE")
+        self.conn.execute(f"CREATE {unique}INDEX IF NOT EXISTS {index} ON {table}({column} COLLATE NOCASE)")
 
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
-        row = self.conn.execute("SELECT * FROM users WHERE username=?", (username,)).fetchone()
+        row = self.conn.execute("SELECT * FROM users WHERE username=? COLLATE NOCASE", (username,)).fetchone()
         return dict(row) if row else None
 
     def create_user(self, username: str, pwd_hash: Optional[bytes], salt: Optional[bytes]) -> str:
@@ -86,7 +181,7 @@ class SqliteStore(Store):
             "INSERT INTO users(id, username, email, pwd_hash, salt, created_at) VALUES(?,?,?,?,?,?)",
             (user_id, username, None, pwd_hash, salt, int(time.time())),
         )
-        self.conn.commit()
+        self._commit()
         return user_id
 
     def get_character_by_user_id(self, user_id: str) -> Optional[Dict[str, Any]]:
@@ -94,11 +189,16 @@ class SqliteStore(Store):
         return dict(row) if row else None
 
     def get_character_by_name(self, character_name: str) -> Optional[Dict[str, Any]]:
-        row = self.conn.execute("SELECT * FROM characters WHERE name=?", (character_name,)).fetchone()
+        row = self.conn.execute("SELECT * FROM characters WHERE name=? COLLATE NOCASE", (character_name,)).fetchone()
         return dict(row) if row else None
 
-    def create_character(self, user_id: str, name: str, character_type: str, defaults: Dict[str, Any]) -> str:
-        char_id = _uuid()
+    def list_character_names(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT name FROM characters")]
+
+    def create_character(self, user_id: str, name: str, character_type: str, defaults: Dict[str, Any],
+                         character_id: Optional[str] = None) -> str:
+        """character_id: id já escolhido por quem chama (ShardedStore roteia pelo id antes de inserir)"""
+        char_id = character_id or _uuid()
         now = int(time.time())
         self.conn.execute(
             """
@@ -135,7 +235,7 @@ class SqliteStore(Store):
                 defaults.get("vitality", 5),
             ),
         )
-        self.conn.commit()
+        self._commit()
         return char_id
 
     def load_character_full(self, user_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
@@ -149,6 +249,42 @@ class SqliteStore(Store):
         attrs = dict(attrs_row) if attrs_row else None
         return (char, attrs)
 
+    def load_account(self, username: str) -> Optional[Tuple[Dict[str, Any], Optional[CharacterRecord]]]:
+        row = self.conn.execute(
+            """
+            SELECT u.id AS user_id, u.username, u.pwd_hash, u.salt,
+                   c.id AS character_id, c.name, c.character_type, c.level, c.xp, c.xp_max,
+                   c.attr_points, c.map, c.pos_x, c.pos_y, c.hp, c.hp_max,
+                   a.strength, a.defense, a.intelligence, a.vitality
+            FROM users u INDEXED BY idx_users_login
+            LEFT JOIN characters c ON c.user_id = u.id
+            LEFT JOIN character_attributes a ON a.character_id = c.id
+            WHERE u.username=? COLLATE NOCASE
+            LIMIT 1
+            """,
+            (username,),
+        ).fetchone()
+        if not row:
+            return None
+        user = {"id": row["user_id"], "username": row["username"], "pwd_hash": row["pwd_hash"], "salt": row["salt"]}
+        character = CharacterRecord.from_row(row) if row["character_id"] is not None else None
+        return (user, character)
+
+    def load_character_record(self, character_id: str) -> Optional[CharacterRecord]:
+        """Personagem + atributos pelo id, em uma consulta (sem username: quem chama completa)"""
+        row = self.conn.execute(
+            """
+            SELECT c.id AS character_id, c.user_id, c.name, c.character_type, c.level, c.xp, c.xp_max,
+                   c.attr_points, c.map, c.pos_x, c.pos_y, c.hp, c.hp_max,
+                   a.strength, a.defense, a.intelligence, a.vitality
+            FROM characters c
+            LEFT JOIN character_attributes a ON a.character_id = c.id
+            WHERE c.id=?
+            """,
+            (character_id,),
+        ).fetchone()
+        return CharacterRecord.from_row(row) if row else None
+
     def save_character_state(self, character_id: str, state: Dict[str, Any]) -> None:
         fields = [
             ("level", int(state.get("level"))) if "level" in state else None,
@@ -169,7 +305,7 @@ class SqliteStore(Store):
             return
         params.append(character_id)
         self.conn.execute(f"UPDATE characters SET {sets} WHERE id=?", params)
-        self.conn.commit()
+        self._commit()
 
     def save_character_attributes(self, character_id: str, attrs: Dict[str, int]) -> None:
         fields = [
@@ -186,7 +322,7 @@ class SqliteStore(Store):
             return
         params.append(character_id)
         self.conn.execute(f"UPDATE character_attributes SET {sets} WHERE character_id=?", params)
-        self.conn.commit()
+        self._commit()
 
     def get_user_id_by_character_id(self, character_id: str) -> Optional[str]:
         """Obtém o user_id a partir do character_id"""
@@ -203,5 +339,5 @@ class SqliteStore(Store):
             "UPDATE characters SET map=?, pos_x=?, pos_y=? WHERE id=?",
             (map_name, float(x), float(y), character_id),
         )
-        self.conn.commit()
+        self._commit()
 
@@ -1,4 +1,6 @@
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List
+
+from .records import CharacterRecord
 
 
 class Store:
@@ -25,6 +27,10 @@ class Store:
         """Verifica se nome do personagem já existe."""
         raise NotImplementedError
 
+    def list_character_names(self) -> List[str]:
+        """Todos os nomes de personagem (pré-carga do índice de nomes em memória)."""
+        raise NotImplementedError
+
     def create_character(self, user_id: str, name: str, character_type: str, defaults: Dict[str, Any]) -> str:
         """Cria character + attributes. character_type: 'warrior', 'mage', 'archer'. Retorna character_id."""
         raise NotImplementedError
@@ -33,6 +39,10 @@ class Store:
         """Retorna (character, attributes) pelo user_id."""
         raise NotImplementedError
 
+    def load_account(self, username: str) -> Optional[Tuple[Dict[str, Any], Optional[CharacterRecord]]]:
+        """Login em uma consulta: retorna (user, personagem ou None) pelo username, ou None se o usuário não existe."""
+        raise NotImplementedError
+
     def save_character_state(self, character_id: str, state: Dict[str, Any]) -> None:
         raise NotImplementedError
 
@@ -42,3 +52,19 @@ class Store:
     def update_position(self, character_id: str, map_name: str, x: float, y: float) -> None:
         raise NotImplementedError
 
+    def save_character(self, character_id: str, state: Dict[str, Any], attrs: Dict[str, int],
+                       reason: Optional[str] = None) -> list:
+        """Grava estado e atributos alterados de um personagem. Retorna os resultados das escritas.
+        reason (checkpoint, logout, map_change...) é usado por stores que guardam histórico."""
+        results = []
+        if state:
+            results.append(self.save_character_state(character_id, state))
+        if attrs:
+            results.append(self.save_character_attributes(character_id, attrs))
+        return results
+
+    def flush(self):
+        """Garante que as escritas já enviadas estejam no disco.
+        Stores síncronos já commitam a cada escrita: nada a fazer."""
+        return None
+
@@ -44,8 +44,11 @@ class MultiplayerEnemy:
         # Selecionar alvo antes do processamento de ataque
         closest_player = self._find_closest_player(players)
         
+        # Mesmos campos de get_sync_data() que mudam com a IA (hp/is_alive mudam por dano/revive)
         prev_animation = self.animation
-        prev_velocity_x = self.velocity[0]
+        prev_velocity_x, prev_velocity_y = self.velocity
+        prev_x, prev_y = self.position
+        prev_facing_left = self.facing_left
         prev_is_attacking = self.is_attacking
         
         # IA de movimento e possível início de ataque
@@ -59,12 +62,15 @@ class MultiplayerEnemy:
         # Timer de cooldown
         self.attack_cooldown = max(0, self.attack_cooldown - delta_time)
         
-        # Mudanças relevantes?
+        # Mudanças relevantes? (ter um player por perto não basta: parado = sem update)
         has_changes = (
             self.animation != prev_animation or
             abs(self.velocity[0] - prev_velocity_x) > 1.0 or
-            self.is_attacking != prev_is_attacking or
-            closest_player is not None
+            abs(self.velocity[1] - prev_velocity_y) > 1.0 or
+            abs(self.position[0] - prev_x) > 0.1 or
+            abs(self.position[1] - prev_y) > 0.1 or
+            self.facing_left != prev_facing_left or
+            self.is_attacking != prev_is_attacking
         )
         
         return has_changes
@@ -75,10 +81,8 @@ class MultiplayerEnemy:
         closest_distance = float('inf')
         if not players:
             return None
-        players_in_map = 0
         for player_id, player in players.items():
             if player.get('map') == self.map_name and player.get('is_alive', True):
-                players_in_map += 1
                 dx = player['x'] - self.position[0]
                 dy = player['y'] - self.position[1]
                 distance = math.sqrt(dx*dx + dy*dy)
@@ -86,8 +90,6 @@ class MultiplayerEnemy:
                     closest_distance = distance
                     closest_player = player
                     self.target_player_id = player_id
-        if players_in_map == 0 and closest_player is None:
-            print(f"[DEBUG] {self.enemy_type} {self.enemy_id}: Nenhum jogador encontrado no mapa {self.map_name}")
         return closest_player
 
     def _process_ai(self, target_player: dict, delta_time: float, other_enemies: List) -> None:
@@ -228,6 +230,38 @@ class MultiplayerEnemy:
             'is_alive': self.is_alive,
         }
 
+    def restore_state(self, data: dict) -> None:
+        """Reaplica um estado salvo com get_sync_data() (snapshot do mundo)"""
+        self.position[0] = float(data.get('x', self.position[0]))
+        self.position[1] = float(data.get('y', self.position[1]))
+        self.velocity[0] = float(data.get('velocity_x', 0.0))
+        self.velocity[1] = float(data.get('velocity_y', 0.0))
+        self.animation = data.get('animation', 'idle')
+        self.facing_left = bool(data.get('facing_left', False))
+        self.hp = int(data.get('hp', self.max_hp))
+        self.is_alive = bool(data.get('is_alive', self.hp > 0))
+        # Ataque em andamento não é retomado
+        self.is_attacking = False
+        if self.animation == 'attack':
+            self.animation = 'idle'
+
+    def apply_sync_data(self, data: dict) -> None:
+        """Copia um get_sync_data() completo (espelho de um inimigo simulado em outro processo)"""
+        self.position[0] = data['x']
+        self.position[1] = data['y']
+        self.velocity[0] = data['velocity_x']
+        self.velocity[1] = data['velocity_y']
+        self.animation = data['animation']
+        self.facing_left = data['facing_left']
+        self.hp = data['hp']
+        self.max_hp = data['max_hp']
+        self.is_attacking = data['is_attacking']
+        self.is_alive = data['is_alive']
+
+    def set_pending_hit(self, player_id: str) -> None:
+        """Golpe concluído em outro processo, a resolver no combat deste tick"""
+        self._pending_hit_player_id = player_id
+
     def get_state(self) -> dict:
         sync = self.get_sync_data()
         return {
@@ -5,10 +5,9 @@ import threading
 import time
 from datetime import datetime
 import uuid
-import hashlib
-import secrets
 import importlib
 import sys
+import os
 
 # TESTE IMEDIATO DE CARREGAMENTO DOS MÓDULOS
 print("=" * 60)
@@ -30,51 +29,98 @@ if 'players.server_player' in sys.modules:
     print("*** MÓDULO players.server_player RECARREGADO ***")
 
 # Sistema legado removido - usando apenas MapManager
-from maps.map_instance import MapManager
-from db.sqlite_store import SqliteStore
+from maps.map_instance import MapInstance, MapManager
+from db.async_store import AsyncStore, resolve
+from db.records import CharacterRecord
+from db.journal_store import JournalStore
+from db.sharded_store import ShardedStore
+from maps.world_snapshot import write_world_snapshot, read_world_snapshot
+from maps.tick_scheduler import TickScheduler
+from maps.map_workers import MapWorkerPool
+from net.protocol import negotiate, default_protocol, FEATURE_BATCH, FEATURE_DELTA
+from net.subscriptions import MapSubscriptions
+from net.outbound import OutboundMessage, OutboundQueue
+from net.delta import SnapshotHistory, KEYFRAME_INTERVAL
+from net.snapshot_codec import SNAPSHOT_TYPES
+from net.dispatcher import MessageDispatcher
+from net.rate_limit import RateLimiter, DEFAULT_RATE_LIMITS
+from net.relay import RelayCoalescer
+from players.input_collector import InputCollector
+from players.server_player import ServerPlayer
+from players.persistence import PersistenceScheduler, SESSION_END_FIELDS
+from players.name_registry import NameRegistry
+from auth.sessions import ResumeTokens, DetachedSessions, SessionRegistry, Session
+from auth.passwords import PasswordHasher, LoginAdmission
 
 # TESTE: Verificar se as modificações foram carregadas
 try:
     from players.server_player import ServerPlayer
     print("OK ServerPlayer importado com sucesso")
     
-    # Verificar se auto_save existe
-    if hasattr(ServerPlayer, 'auto_save'):
-        print("OK Método auto_save ENCONTRADO em ServerPlayer")
-    else:
-        print("ERRO Método auto_save NÃO ENCONTRADO em ServerPlayer")
-    
     # Verificar assinatura do construtor
     import inspect
     sig = inspect.signature(ServerPlayer.__init__)
     params = list(sig.parameters.keys())
     print(f"OK Parâmetros do construtor: {params}")
     
-    if 'store' in params and 'character_id' in params:
-        print("OK Parâmetros store e character_id ENCONTRADOS")
+    if 'store' in params and 'character' in params:
+        print("OK Parâmetros store e character ENCONTRADOS")
     else:
-        print("ERRO Parâmetros store e character_id NÃO ENCONTRADOS")
+        print("ERRO Parâmetros store e character NÃO ENCONTRADOS")
         
 except Exception as e:
     print(f"ERRO ao importar ServerPlayer: {e}")
 
 print("=" * 60)
 
-def hash_password(password: str, salt: bytes = None) -> tuple:
-    """Gera hash da senha com salt. Retorna (hash, salt)."""
-    if salt is None:
-        salt = secrets.token_bytes(32)
-    pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100000)
-    return pwd_hash, salt
-
-def verify_password(password: str, pwd_hash: bytes, salt: bytes) -> bool:
-    """Verifica se senha confere com hash."""
-    computed_hash, _ = hash_password(password, salt)
-    return computed_hash == pwd_hash
+# Persistência dos personagens: "update" (UPDATE direto nas tabelas) ou
+# "journal" (journal append-only compactado em background, ver db/journal_store.py)
+PERSISTENCE_MODE = "update"
+# Bancos de personagens: 1 = server_data/game.db; N > 1 = N shards em server_data/shards
+# (ver db/sharded_store.py). Um banco existente não é migrado entre os dois formatos.
+DB_SHARDS = 1
+# Inimigos simulados em processos worker: cada grupo de mapas roda num processo
+# (ex.: [["Floresta"], ["Cidade"]]); mapas fora dos grupos e [] = no processo do servidor
+MAP_WORKER_GROUPS = []
+# Relatório do TickProfiler gravado ao parar o servidor (JSON); None = não grava
+TICK_PROFILE_PATH = None
 
 class GameServer:
-    def __init__(self):
+    def __init__(self, persistence_mode: str = PERSISTENCE_MODE, db_shards: int = DB_SHARDS,
+                 map_worker_groups=MAP_WORKER_GROUPS):
         self.clients = {}  # {websocket: player_data}
+        self.subscriptions = MapSubscriptions()  # {map_name: {websocket}} para broadcast por mapa
+        self.sessions = SessionRegistry()  # websocket <-> usuário/personagem/player_id/mapa
+        self.names = NameRegistry()  # nomes em uso (pré-carregados do banco) e personagens online
+        # Métricas acumuladas das filas de saída de conexões já encerradas
+        self.outbound_totals = {"dropped": 0, "coalesced": 0, "evicted": 0}
+        self.tick = 0  # contador de ticks (numeração dos lotes enviados aos clientes)
+        # Relógio único da simulação: fases em ordem fixa a cada tick (ver _register_tick_phases)
+        self.scheduler = TickScheduler()
+        self.tick_task = None
+        # Estado produzido pelas fases de simulação e consumido pelas fases de rede.
+        # Acumula entre ticks de catch-up (que não enviam): o envio leva o estado mais novo
+        self._tick_players = {}  # {map_name: {player_id: dados}}
+        self._tick_enemies = {}  # {map_name: {enemy_id: dados}}
+        self._tick_events = {}   # {map_name: [player_damage, ...]}
+        self._tick_outgoing = []  # [(map_name, snapshot)] montados no encode
+        self._tick_deltas = {}    # {map_name: [(outbox, OutboundMessage)]} montados no encode
+        self.tick_profile_path = TICK_PROFILE_PATH
+        self._register_tick_phases()
+        self.snapshot_histories = {}  # {map_name: SnapshotHistory} para clientes com delta
+        self.dispatcher = MessageDispatcher()  # tabela de handlers + métricas por tipo
+        self._register_handlers()
+        # Limites por conexão/tipo de mensagem e inputs acumulados até o próximo tick
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS)
+        self.rate_limited_totals = {}  # {message_type: descartes} de conexões já encerradas
+        self.input_collector = InputCollector()
+        self.relay_coalescer = RelayCoalescer()  # enemy_position_sync: último por inimigo/tick
+        # Retomada de sessão: token assinado + ServerPlayer mantido durante o período de graça
+        self.resume_tokens = ResumeTokens()
+        self.detached_sessions = DetachedSessions()
+        # PBKDF2 fora do event loop + fila de admissão para login/registro
+        self.password_hasher = PasswordHasher()
+        self.login_admission = LoginAdmission()
         # Sistema legado removido - players agora são gerenciados pelo MapManager server-side
         self.server = None
         self.running = False
@@ -88,16 +134,37 @@ class GameServer:
         # Banco de dados (SQLite)
         try:
             db_path = os.path.join(os.path.dirname(__file__), "../../server_data/game.db")
-            self.store = SqliteStore(db_path)
-            self.store.create_tables()
-            self.log("[DB] SQLite inicializado")
+            if db_shards > 1:
+                # Um escritor por shard: personagens em shards diferentes gravam em paralelo
+                self.store = ShardedStore(os.path.join(os.path.dirname(db_path), "shards"), db_shards)
+                self.store.create_tables()
+                self.log(f"[DB] SQLite inicializado ({db_shards} shards + catálogo)")
+            else:
+                # Escritas em uma thread dedicada (group commit); leituras em conexões somente leitura
+                self.store = AsyncStore(db_path)
+                self.store.create_tables()
+                self.log("[DB] SQLite inicializado (escritor assíncrono)")
+            if persistence_mode == "journal":
+                # Reaplica o journal que não foi compactado antes de aceitar logins
+                self.store = JournalStore(self.store, os.path.join(os.path.dirname(db_path), "game.journal"))
+                self.log(f"[DB] Journal ativo ({self.store.replayed_entries} entradas reaplicadas)")
+            # Write-behind: personagens marcam campos alterados; checkpoints periódicos gravam
+            self.persistence = PersistenceScheduler(self.store)
+            # Verificação de nome sem consultar o banco
+            self.log(f"[DB] {self.names.load(self.store.list_character_names())} nomes de personagem em memória")
         except Exception as e:
             print(f"[ERROR][DB] Falha ao iniciar SQLite: {e}")
         
         # Novo sistema de mapas server-side
         print("DEBUG: Tentando criar MapManager...")
+        self.map_workers = None
         try:
-            self.map_manager = MapManager()
+            if map_worker_groups:
+                self.map_workers = MapWorkerPool(map_worker_groups)
+                self.map_workers.start()
+                self.log(f"[MAP_WORKER] {len(self.map_workers.workers)} processos worker: {self.map_workers.groups}")
+            self.map_manager = MapManager(self.scheduler.tick_rate, self.map_workers)
+            self.map_manager.profiler = self.scheduler.profiler
             print("DEBUG: MapManager criado com sucesso!")
         except Exception as e:
             print(f"[ERROR] DEBUG: Erro ao criar MapManager: {e}")
@@ -108,6 +175,10 @@ class GameServer:
         # Pré-criar mapas com inimigos no startup
         self._initialize_all_maps()
         
+        # Warm restart: restaurar inimigos, respawns e sessões do último desligamento
+        self.world_snapshot_path = os.path.join(os.path.dirname(__file__), "../../server_data/world.snapshot")
+        self._restore_world_snapshot()
+        
         # Sistema legado removido - usando apenas MapManager
         # self.enemy_manager = EnemyManager()  # REMOVIDO
         # self.enemy_update_task = None  # REMOVIDO
@@ -168,19 +239,22 @@ class GameServer:
     
     async def register_client(self, websocket, path):
         """Registra novo cliente"""
+        outbox = OutboundQueue(websocket, on_evict=self._on_outbound_evict)
+        outbox.start()
         self.clients[websocket] = {
             "connected_at": datetime.now(),
             "player_id": None,
-            "player_name": None
+            "player_name": None,
+            "protocol": default_protocol(),
+            "outbox": outbox,
+            "rate_limiter": RateLimiter(self.rate_limits, self.dispatcher.message_types)
         }
         self.log(f"Nova conexão: {websocket.remote_address}")
         
         try:
             self.log(f"[WEBSOCKET] Iniciando loop de mensagens para {websocket.remote_address}")
             async for message in websocket:
-                self.log(f"[WEBSOCKET] Loop recebeu mensagem de {websocket.remote_address}")
                 await self.handle_message(websocket, message)
-                self.log(f"[WEBSOCKET] Mensagem processada, continuando loop...")
             
             # Se chegou aqui, o loop terminou sem exception
             self.log(f"[WEBSOCKET] LOOP TERMINOU NORMALMENTE para {websocket.remote_address}")
@@ -197,95 +271,105 @@ class GameServer:
     
     async def unregister_client(self, websocket):
         """Remove cliente desconectado"""
-        if websocket in self.clients:
-            client_data = self.clients[websocket]
-            if client_data["player_id"]:
-                player_id = client_data["player_id"]
-                
-                # Buscar dados do player server-side antes de remover
-                player_name = "Unknown"
-                current_map = "Cidade"
-                for map_name, map_instance in self.map_manager.maps.items():
-                    if map_instance.has_player(player_id):
-                        server_player = map_instance.players[player_id]
-                        player_name = server_player.name
-                        current_map = map_name
-                        # Persistir estado
-                        try:
-                            user = self.store.get_user_by_username(player_name)
-                            if user:
-                                char = self.store.get_character_by_user_id(user["id"])
-                                if char:
-                                    self.store.save_character_state(char["id"], {
-                                        "map": map_name,
-                                        "pos_x": server_player.position[0],
-                                        "pos_y": server_player.position[1],
-                                        "hp": server_player.hp,
-                                    })
-                        except Exception:
-                            pass
-                        # Remover player do mapa server-side
-                        map_instance.remove_player(player_id)
-                        break
-                        
-                # Notificar outros jogadores DO MESMO MAPA
-                await self.broadcast_to_map(current_map, {
-                    "type": "player_disconnected",
-                    "player_id": player_id,
-                    "player_name": player_name
-                })
-                
-                # Atualizar lista de players para todos os mapas
-                await self.broadcast_all_maps_players_update()
-                
-                self.log(f"Jogador desconectado: {player_name} (ID: {player_id})")
+        # Remover dos índices ANTES de notificar, para que o broadcast abaixo não
+        # tente enviar para este socket (e para tornar a chamada idempotente)
+        client_data = self.clients.pop(websocket, None)
+        if client_data is None:
+            return
+        self.subscriptions.unsubscribe(websocket)
+        session = self.sessions.unbind(websocket)
+        outbox = client_data["outbox"]
+        outbox.close()
+        self.outbound_totals["dropped"] += outbox.dropped
+        self.outbound_totals["coalesced"] += outbox.coalesced
+        for message_type, count in client_data["rate_limiter"].dropped.items():
+            self.rate_limited_totals[message_type] = self.rate_limited_totals.get(message_type, 0) + count
+        
+        if session is not None and session.in_game:
+            player_id = session.player_id
+            player_name = session.character_name
+            current_map = session.map_name
+            self.input_collector.discard(player_id)
+            self.names.set_offline(player_name)
+            
+            map_instance = self.map_manager.maps.get(current_map)
+            server_player = map_instance.players.get(player_id) if map_instance else None
+            if server_player is not None:
+                # Persistir estado (checkpoint de logout)
+                self.persistence.flush_session_end(server_player, current_map, reason="logout")
+                # Manter o ServerPlayer em memória para uma reconexão rápida (resume)
+                if client_data.get("resume_nonce") and self.detached_sessions.grace_period > 0:
+                    self.detached_sessions.detach(player_id, {
+                        "session": session,
+                        "server_player": server_player,
+                        "map": current_map,
+                        "nonce": client_data["resume_nonce"],
+                    })
+                # Remover player do mapa server-side
+                map_instance.remove_player(player_id)
+            
+            # Notificar outros jogadores DO MESMO MAPA
+            await self.broadcast_to_map(current_map, {
+                "type": "player_disconnected",
+                "player_id": player_id,
+                "player_name": player_name
+            })
+            
+            # Atualizar lista de players para todos os mapas
+            await self.broadcast_all_maps_players_update()
             
-            del self.clients[websocket]
-            self.log(f"Conexão removida: {websocket.remote_address}")
+            self.log(f"Jogador desconectado: {player_name} (ID: {player_id})")
+        
+        self.log(f"Conexão removida: {websocket.remote_address}")
+    
+    def _register_handlers(self):
+        """Registra os handlers de cada tipo de mensagem (com campos obrigatórios)"""
+        routes = [
+            ("login", self.handle_login, None),
+            ("register", self.handle_register, None),
+            ("check_character_name", self.handle_check_character_name, None),
+            ("create_character", self.handle_create_character, None),
+            ("player_input", self.handle_player_input, None),
+            # Ignorado no modo server-authoritative (cliente não altera estado)
+            ("player_update", self._ignore_message, None),
+            ("player_action", self.handle_player_action, {"action": str}),
+            ("client_log", self.handle_client_log, None),
+            ("map_change", self.handle_map_change, None),
+            ("enemy_death", self.handle_enemy_death, {"enemy_id": str}),
+            ("enemy_damage", self.handle_enemy_damage, {"enemy_id": str}),
+            ("enemy_position_sync", self.handle_enemy_position_sync, {"enemy_id": str}),
+            ("player_attack_enemy", self.handle_player_attack_enemy, {"enemy_id": str}),
+            ("spend_attribute_point", self.handle_spend_attribute_point, {"attr": str}),
+            ("request_enemies_state", self.handle_request_enemies_state, None),
+            ("snapshot_ack", self.handle_snapshot_ack, {"tick": (int, float)}),
+            ("resume", self.handle_resume, {"token": str}),
+        ]
+        for message_type, handler, required in routes:
+            self.dispatcher.register(message_type, handler, required)
+    
+    async def _ignore_message(self, websocket, data):
+        pass
     
     async def handle_message(self, websocket, message):
         """Processa mensagens dos clientes"""
         try:
-            self.log(f"[MESSAGE] Recebida mensagem de {websocket.remote_address}: {message[:100]}...")
             data = json.loads(message)
+            if not isinstance(data, dict):
+                raise json.JSONDecodeError("mensagem não é um objeto", str(message), 0)
             message_type = data.get("type")
-            self.log(f"[MESSAGE] Processando tipo: {message_type}")
+            if not isinstance(message_type, str):
+                self.log(f"[MESSAGE] Mensagem sem tipo válido descartada de {websocket.remote_address}")
+                return
             
-            if message_type == "login":
-                await self.handle_login(websocket, data)
-            elif message_type == "register":
-                await self.handle_register(websocket, data)
-            elif message_type == "check_character_name":
-                await self.handle_check_character_name(websocket, data)
-            elif message_type == "create_character":
-                await self.handle_create_character(websocket, data)
-            elif message_type == "player_input":
-                await self.handle_player_input(websocket, data)
-            elif message_type == "player_update":
-                # Ignorado no modo server-authoritative (cliente não altera estado)
-                pass
-            elif message_type == "player_action":
-                await self.handle_player_action(websocket, data)
-            elif message_type == "client_log":
-                await self.handle_client_log(websocket, data)
-            elif message_type == "map_change":
-                await self.handle_map_change(websocket, data)
-            elif message_type == "enemy_death":
-                await self.handle_enemy_death(websocket, data)
-            elif message_type == "enemy_damage":
-                await self.handle_enemy_damage(websocket, data)
-            elif message_type == "enemy_position_sync":
-                await self.handle_enemy_position_sync(websocket, data)
-            elif message_type == "player_attack_enemy":
-                await self.handle_player_attack_enemy(websocket, data)
-            elif message_type == "spend_attribute_point":
-                await self.handle_spend_attribute_point(websocket, data)
-            elif message_type == "request_enemies_state":
-                await self.handle_request_enemies_state(websocket, data)
-            else:
-                self.log(f"Tipo de mensagem desconhecido: {message_type}")
+            client_data = self.clients.get(websocket)
+            if client_data and not client_data["rate_limiter"].allow(message_type):
+                return
             
-            self.log(f"[MESSAGE] Processamento de {message_type} concluído com sucesso")
+            if not await self.dispatcher.dispatch(websocket, data, len(message)):
+                if self.dispatcher.handles(message_type):
+                    self.log(f"[MESSAGE] {message_type} inválida descartada de {websocket.remote_address}")
+                else:
+                    self.log(f"Tipo de mensagem desconhecido: {message_type}")
                 
         except json.JSONDecodeError:
             self.log(f"[ERROR] Mensagem JSON inválida de {websocket.remote_address}")
@@ -300,6 +384,12 @@ class GameServer:
         username = data.get("username", "").strip()
         password = data.get("password", "").strip()
         
+        # Handshake de protocolo (JSON continua sendo o padrão)
+        self.clients[websocket]["protocol"] = negotiate(data.get("protocol"))
+        outbox = self.clients[websocket]["outbox"]
+        outbox.encoding = self.clients[websocket]["protocol"]["encoding"]
+        outbox.batching = FEATURE_BATCH in self.clients[websocket]["protocol"]["features"]
+        
         if not username or not password:
             await self.send_to_client(websocket, {
                 "type": "login_response",
@@ -308,49 +398,55 @@ class GameServer:
             })
             return
         
-        # Verificar se usuário existe
-        user = self.store.get_user_by_username(username)
-        if not user:
-            await self.send_to_client(websocket, {
-                "type": "login_response", 
-                "success": False,
-                "message": "Usuário não encontrado"
-            })
+        if self.login_admission.is_full():
+            await self._send_server_busy(websocket, "login_response")
             return
         
-        # Verificar senha
-        if not user.get("pwd_hash") or not user.get("salt"):
-            await self.send_to_client(websocket, {
-                "type": "login_response",
-                "success": False, 
-                "message": "Conta sem senha configurada"
-            })
-            return
+        async with self.login_admission.slot():
+            # Usuário + personagem + atributos em uma consulta
+            account = self.store.load_account(username)
+            if not account:
+                await self.send_to_client(websocket, {
+                    "type": "login_response", 
+                    "success": False,
+                    "message": "Usuário não encontrado"
+                })
+                return
+            user, character = account
             
-        if not verify_password(password, user["pwd_hash"], user["salt"]):
-            await self.send_to_client(websocket, {
-                "type": "login_response",
-                "success": False,
-                "message": "Senha incorreta"
-            })
-            return
+            # Verificar senha
+            if not user.get("pwd_hash") or not user.get("salt"):
+                await self.send_to_client(websocket, {
+                    "type": "login_response",
+                    "success": False, 
+                    "message": "Conta sem senha configurada"
+                })
+                return
+                
+            if not await self.password_hasher.verify(password, user["pwd_hash"], user["salt"]):
+                await self.send_to_client(websocket, {
+                    "type": "login_response",
+                    "success": False,
+                    "message": "Senha incorreta"
+                })
+                return
         
-        # Login válido - verificar se já tem personagem
-        char_data = self.store.load_character_full(user["id"])
+        if websocket not in self.clients:
+            return  # desconectou enquanto aguardava o hash
         
-        if char_data:
-            char, attrs = char_data
+        # Login válido - verificar se já tem personagem
+        if character:
             # Já tem personagem - fazer login direto no jogo
-            await self._login_with_character(websocket, user, char, attrs)
+            await self._login_with_character(websocket, character)
         else:
             # Não tem personagem - vai para seleção
-            self.clients[websocket]["user_id"] = user["id"]
-            self.clients[websocket]["username"] = username
+            self.sessions.bind_user(websocket, user["id"], username)
             await self.send_to_client(websocket, {
                 "type": "login_response",
                 "success": True,
                 "needs_character": True,
-                "message": "Login realizado. Selecione um personagem."
+                "message": "Login realizado. Selecione um personagem.",
+                "protocol": self.clients[websocket]["protocol"]
             })
         
         self.log(f"Login realizado para usuário: {username}")
@@ -386,9 +482,22 @@ class GameServer:
             })
             return
         
+        if self.login_admission.is_full():
+            await self._send_server_busy(websocket, "register_response")
+            return
+        
         # Criar novo usuário com senha
-        pwd_hash, salt = hash_password(password)
-        user_id = self.store.create_user(username, pwd_hash, salt)
+        async with self.login_admission.slot():
+            pwd_hash, salt = await self.password_hasher.hash(password)
+        # Outro registro com o mesmo nome pode ter terminado enquanto o hash rodava
+        if self.store.get_user_by_username(username):
+            await self.send_to_client(websocket, {
+                "type": "register_response",
+                "success": False,
+                "message": "Usuário já existe"
+            })
+            return
+        await resolve(self.store.create_user(username, pwd_hash, salt))
         
         await self.send_to_client(websocket, {
             "type": "register_response", 
@@ -398,6 +507,17 @@ class GameServer:
         
         self.log(f"Novo usuário registrado: {username}")
     
+    async def _send_server_busy(self, websocket, response_type: str):
+        """Resposta de "servidor ocupado" quando a fila de admissão está cheia"""
+        retry_after = self.login_admission.reject()
+        await self.send_to_client(websocket, {
+            "type": response_type,
+            "success": False,
+            "busy": True,
+            "retry_after": retry_after,
+            "message": f"Servidor ocupado, tente novamente em {retry_after} s"
+        })
+    
     async def handle_check_character_name(self, websocket, data):
         """Verifica se nome do personagem está disponível"""
         character_name = data.get("character_name", "").strip()
@@ -418,9 +538,8 @@ class GameServer:
             })
             return
         
-        # Verificar se nome já existe
-        char = self.store.get_character_by_name(character_name)
-        if char:
+        # Verificar se nome já existe (índice em memória, sem tocar o banco)
+        if self.names.is_taken(character_name):
             await self.send_to_client(websocket, {
                 "type": "check_character_name_response",
                 "success": False, 
@@ -436,8 +555,8 @@ class GameServer:
     
     async def handle_create_character(self, websocket, data):
         """Cria novo personagem para o usuário"""
-        client_data = self.clients.get(websocket)
-        if not client_data or not client_data.get("user_id"):
+        session = self.sessions.get(websocket)
+        if session is None or session.in_game:
             await self.send_to_client(websocket, {
                 "type": "create_character_response",
                 "success": False,
@@ -456,9 +575,8 @@ class GameServer:
             })
             return
         
-        # Verificar novamente se nome está disponível
-        char = self.store.get_character_by_name(character_name) 
-        if char:
+        # Verificar novamente e reservar o nome (dois pedidos simultâneos não passam os dois)
+        if not self.names.claim(character_name):
             await self.send_to_client(websocket, {
                 "type": "create_character_response",
                 "success": False,
@@ -481,64 +599,78 @@ class GameServer:
         }
         
         # Criar personagem
-        char_id = self.store.create_character(client_data["user_id"], character_name, character_type, defaults)
-        
-        # Fazer login no jogo
-        user_id = client_data["user_id"]
-        user = self.store.get_user_by_username(client_data["username"])
-        char, attrs = self.store.load_character_full(user_id)
+        try:
+            char_id = await resolve(self.store.create_character(session.user_id, character_name, character_type, defaults))
+        except Exception:
+            self.names.release(character_name)
+            raise
         
-        await self._login_with_character(websocket, user, char, attrs)
+        # Fazer login no jogo (registro montado a partir dos defaults, sem reler o banco)
+        character = CharacterRecord.from_defaults(char_id, session.user_id, session.username,
+                                                  character_name, character_type, defaults)
+        await self._login_with_character(websocket, character)
         
-        self.log(f"Personagem criado: {character_name} ({character_type}) para usuário {client_data['username']}")
+        self.log(f"Personagem criado: {character_name} ({character_type}) para usuário {session.username}")
     
-    async def _login_with_character(self, websocket, user, char, attrs):
+    async def _login_with_character(self, websocket, character: CharacterRecord):
         """Faz login no jogo com personagem existente"""
-        character_name = char["name"]
+        character_name = character.name
         
         # Verificar se personagem já está online
-        for map_instance in self.map_manager.maps.values():
-            for player in map_instance.players.values():
-                if player.name.lower() == character_name.lower():
-                    await self.send_to_client(websocket, {
-                        "type": "login_response",
-                        "success": False,
-                        "message": "Personagem já está online"
-                    })
-                    return
+        if self.names.is_online(character_name):
+            await self.send_to_client(websocket, {
+                "type": "login_response",
+                "success": False,
+                "message": "Personagem já está online"
+            })
+            return
+        
+        # Um login com senha substitui uma sessão desconectada do mesmo personagem
+        self.detached_sessions.discard_character(character.character_id)
         
         # Criar ID de sessão
         player_id = str(uuid.uuid4())[:8]
-        initial_map = char.get("map", "Cidade")
-        
-        # Armazenar info do cliente
-        self.clients[websocket]["player_id"] = player_id
-        self.clients[websocket]["player_name"] = character_name
-        self.clients[websocket]["user_id"] = user["id"] 
-        self.clients[websocket]["character_type"] = char.get("character_type", "warrior")
+        initial_map = character.map_name
         
         # Adicionar jogador ao mapa server-side  
         map_instance = self.map_manager.get_or_create_map(initial_map)
-        print(f"[DEBUG_GAME_SERVER] Chamando add_player para {character_name}: store={self.store is not None}, char_id={char['id']}")
-        actual_spawn_pos = map_instance.add_player(player_id, character_name, self.store, char["id"])
+        
+        # Registrar a sessão (usuário, personagem, player_id e mapa)
+        self.sessions.bind_user(websocket, character.user_id, character.username)
+        self.sessions.bind_character(websocket, character.character_id, character_name, character.character_type,
+                                     player_id, map_instance.map_name)
+        self.clients[websocket]["player_id"] = player_id
+        self.clients[websocket]["player_name"] = character_name
+        self.names.set_online(character_name)
+        actual_spawn_pos = map_instance.add_player(player_id, character_name, self.store, character)
         
         # Ajustar apenas a posição salva (não sobrescrever dados carregados do banco)
         try:
             sp = map_instance.players[player_id]
-            # Só ajustar posição se foi salva (preservar dados carregados do _load_from_database)
-            saved_x = char.get("pos_x")
-            saved_y = char.get("pos_y") 
+            # Só ajustar posição se foi salva
+            saved_x = character.pos_x
+            saved_y = character.pos_y
             if saved_x is not None and saved_y is not None:
                 sp.position = [float(saved_x), float(saved_y)]
                 print(f"[LOGIN] Posição restaurada para {character_name}: {sp.position}")
         except Exception as e:
             print(f"[LOGIN] Erro ao restaurar posição: {e}")
         
+        await self._start_session(websocket, map_instance, player_id)
+    
+    async def _start_session(self, websocket, map_instance, player_id: str, resumed: bool = False):
+        """Conclui login/retomada: inscreve no mapa, responde ao cliente e avisa o mapa"""
+        client_data = self.clients[websocket]
+        session = self.sessions.get(websocket)
+        character_name = session.character_name
+        initial_map = session.map_name
+        self.subscriptions.subscribe(websocket, initial_map)
+        
         # Obter dados completos para resposta (incluindo stats do personagem)
         server_player_data = map_instance.get_player_data(player_id)
         if server_player_data:
             server_player_data["name"] = character_name
-            server_player_data["character_type"] = char.get("character_type", "warrior")
+            server_player_data["character_type"] = session.character_type
             # Adicionar dados completos do personagem (stats, atributos)
             sp = map_instance.players[player_id]
             stats_data = sp.to_stats_dict()
@@ -546,13 +678,22 @@ class GameServer:
             print(f"[LOGIN_DATA] Enviando dados completos para {character_name}: Level={sp.level}, XP={sp.xp}, STR={sp.strength}")
             print(f"[LOGIN_DATA] Dados completos enviados: {stats_data}")
         
+        # Token de retomada (uso único: cada login/resume emite um novo)
+        resume = self.resume_tokens.issue(player_id, session.user_id, session.character_id)
+        client_data["resume_nonce"] = resume["nonce"]
+        
         # Responder ao login
         login_response = {
             "type": "login_response", 
             "success": True,
             "player_id": player_id,
-            "player_info": server_player_data
+            "player_info": server_player_data,
+            "protocol": client_data["protocol"],
+            "resume_token": resume["token"],
+            "resume_grace": self.detached_sessions.grace_period
         }
+        if resumed:
+            login_response["resumed"] = True
         print(f"[LOGIN_JSON] Enviando resposta completa: {login_response}")
         await self.send_to_client(websocket, login_response)
         
@@ -572,22 +713,70 @@ class GameServer:
         # Atualizar listas
         await self.broadcast_all_maps_players_update()
         
-        self.log(f"Player {character_name} ({player_id}) entrou no mapa '{initial_map}'")
+        action = "retomou a sessão" if resumed else "entrou"
+        self.log(f"Player {character_name} ({player_id}) {action} no mapa '{initial_map}'")
     
-    async def handle_player_input(self, websocket, data):
-        """Processa input do jogador (server-side authoritative)"""
+    async def handle_resume(self, websocket, data):
+        """Reconexão com token de retomada: reaproveita o ServerPlayer em memória (sem PBKDF2 nem banco)"""
         client_data = self.clients.get(websocket)
-        if not client_data or not client_data["player_id"]:
+        if not client_data or client_data.get("player_id"):
             return
         
-        player_id = client_data["player_id"]
+        client_data["protocol"] = negotiate(data.get("protocol"))
+        client_data["outbox"].encoding = client_data["protocol"]["encoding"]
+        client_data["outbox"].batching = FEATURE_BATCH in client_data["protocol"]["features"]
+        
+        claims = self.resume_tokens.verify(data.get("token"))
+        entry = None
+        if claims:
+            player_id = claims.get("pid")
+            # Conexão antiga ainda registrada (queda não detectada): desanexar primeiro
+            stale = self.sessions.by_player(player_id)
+            if stale is not None and stale.websocket is not websocket:
+                old_websocket = stale.websocket
+                await self.unregister_client(old_websocket)
+                asyncio.ensure_future(old_websocket.close())
+            entry = self.detached_sessions.take(player_id, claims.get("n"))
+            if entry and (entry["session"].user_id != claims.get("uid") or entry["session"].character_id != claims.get("cid")):
+                entry = None
+        
+        if entry is None:
+            await self.send_to_client(websocket, {
+                "type": "login_response",
+                "success": False,
+                "resume_failed": True,
+                "message": "Sessão expirada, faça login novamente"
+            })
+            return
         
-        # Processar input no sistema server-side
-        if not self.map_manager.process_player_input(player_id, data.get("input", data)):
-            self.log(f"[WARNING] Player {player_id} não encontrado para processar input")
+        server_player = entry["server_player"]
+        map_instance = self.map_manager.get_or_create_map(entry["map"])
+        map_instance.attach_player(server_player)
+        session = self.sessions.attach(websocket, entry["session"])
+        session.map_name = map_instance.map_name
+        client_data["player_id"] = player_id
+        client_data["player_name"] = session.character_name
+        self.names.set_online(session.character_name)
+        await self._start_session(websocket, map_instance, player_id, resumed=True)
+    
+    def get_sessions(self) -> list:
+        """Sessões registradas (usuário, personagem, player_id, mapa) para diagnóstico"""
+        return self.sessions.snapshot()
+    
+    def _expire_detached_sessions(self):
+        """Descarta sessões desconectadas cujo período de graça acabou (estado já persistido no disconnect)"""
+        for entry in self.detached_sessions.expire():
+            self.log(f"[SESSION] Sessão de {entry['server_player'].name} expirou")
+    
+    async def handle_player_input(self, websocket, data):
+        """Processa input do jogador (server-side authoritative)"""
+        client_data = self.clients.get(websocket)
+        if not client_data or not client_data["player_id"]:
             return
         
-        # Input processado com sucesso - ServerPlayer já fez toda validação, física e anti-cheat
+        # Guardado até o início do próximo tick (o último estado vence);
+        # ServerPlayer faz toda validação, física e anti-cheat ao aplicar
+        self.input_collector.submit(client_data["player_id"], data.get("input", data))
     
     async def handle_player_update(self, websocket, data):
         """Processa atualização de estado do jogador"""
@@ -599,39 +788,39 @@ class GameServer:
         
         # Encontrar player no MapManager e atualizar dados
         player_found = False
-        for map_name, map_instance in self.map_manager.maps.items():
-            if map_instance.has_player(player_id):
-                server_player = map_instance.players[player_id]
-                
-                # Atualizar dados do player server-side
-                if "position" in data:
-                    pos = data["position"]
-                    if "x" in pos and "y" in pos:
-                        server_player.position = [pos["x"], pos["y"]]
-                
-                if "velocity" in data:
-                    vel = data["velocity"]
-                    if "x" in vel and "y" in vel:
-                        server_player.velocity = [vel["x"], vel["y"]]
-                
-                if "animation" in data:
-                    server_player.animation = data["animation"]
-                
-                if "facing" in data:
-                    server_player.facing_direction = data["facing"]
-                
-                if "hp" in data:
-                    server_player.hp = data["hp"]
-                
-                # Broadcast atualização para outros players do mesmo mapa
-                await self.broadcast_to_map(map_name, {
-                    "type": "player_sync",
-                    "player_id": player_id,
-                    "player_data": server_player.get_sync_data()
-                }, exclude=websocket)
-                
-                player_found = True
-                break
+        map_name = self.sessions.get(websocket).map_name
+        map_instance = self.map_manager.maps.get(map_name)
+        if map_instance and map_instance.has_player(player_id):
+            server_player = map_instance.players[player_id]
+            
+            # Atualizar dados do player server-side
+            if "position" in data:
+                pos = data["position"]
+                if "x" in pos and "y" in pos:
+                    server_player.position = [pos["x"], pos["y"]]
+            
+            if "velocity" in data:
+                vel = data["velocity"]
+                if "x" in vel and "y" in vel:
+                    server_player.velocity = [vel["x"], vel["y"]]
+            
+            if "animation" in data:
+                server_player.animation = data["animation"]
+            
+            if "facing" in data:
+                server_player.facing_direction = data["facing"]
+            
+            if "hp" in data:
+                server_player.hp = data["hp"]
+            
+            # Broadcast atualização para outros players do mesmo mapa
+            await self.broadcast_to_map(map_name, {
+                "type": "player_sync",
+                "player_id": player_id,
+                "player_data": server_player.get_sync_data()
+            }, exclude=websocket)
+            
+            player_found = True
         
         if not player_found:
             self.log(f"[WARNING] Player {player_id} não encontrado em nenhum mapa para atualização")
@@ -645,8 +834,8 @@ class GameServer:
         player_id = client_data["player_id"]
         action = data.get("action")
         
-        # Broadcast da ação para todos os jogadores
-        await self.broadcast({
+        # Broadcast da ação para os jogadores do mesmo mapa
+        await self._relay_to_map(websocket, {
             "type": "player_action",
             "player_id": player_id,
             "action": action,
@@ -680,18 +869,12 @@ class GameServer:
                 return
             
             player_id = client_data["player_id"]
+            session = self.sessions.get(websocket)
             new_map = data.get("current_map", "Cidade")
             self.log(f"[MAP_CHANGE] Player {player_id} quer ir para: {new_map}")
             
-            # Obter mapa atual do player
-            old_map = None
-            for map_name, map_instance in self.map_manager.maps.items():
-                if map_instance.has_player(player_id):
-                    old_map = map_name
-                    break
-            
-            if not old_map:
-                old_map = "Cidade"  # Default se player nao encontrado em nenhum mapa
+            # Mapa atual do player (registro de sessões)
+            old_map = session.map_name
             
             self.log(f"[MAP_CHANGE] Mapa atual: {old_map} -> Novo mapa: {new_map}")
             
@@ -701,37 +884,28 @@ class GameServer:
                 await self.broadcast_all_maps_players_update()
                 return
 
+            # O novo ServerPlayer é criado a partir do estado em memória (sem reler o banco);
+            # alterações ainda não gravadas vão para o banco agora
+            old_map_instance = self.map_manager.maps.get(old_map)
+            old_player = old_map_instance.players.get(player_id) if old_map_instance else None
+            character = None
+            if old_player:
+                self.persistence.flush_player(old_player, old_map, reason="map_change")
+                character = old_player.to_character_record()
+            
             # USAR MapManager para mover player entre mapas (server-side)
             self.log("[MAP_CHANGE] Chamando map_manager.move_player()...")
             
-            # Buscar character_id do usuário
-            character_id = None
-            try:
-                print(f"[DEBUG_MOVE] client_data keys: {list(client_data.keys())}")
-                
-                # PRIORIDADE 1: Se temos user_id, usar diretamente (mais confiável)
-                if "user_id" in client_data:
-                    print(f"[DEBUG_MOVE] Usando user_id: {client_data['user_id']}")
-                    char = self.store.get_character_by_user_id(client_data["user_id"])
-                    if char:
-                        character_id = char["id"]
-                        print(f"[DEBUG_MOVE] character_id encontrado via user_id: {character_id}")
-                    else:
-                        print(f"[DEBUG_MOVE] ERRO: Nenhum personagem encontrado para user_id: {client_data['user_id']}")
-                
-                # Se não conseguiu com user_id, não há mais o que fazer
-                else:
-                    print(f"[DEBUG_MOVE] ERRO: Nem user_id nem username/player_name disponível em client_data")
-                
-            except Exception as e:
-                print(f"[DEBUG_MOVE] Erro ao buscar character_id: {e}")
-                
-            print(f"[DEBUG_MOVE] Final character_id: {character_id}")
-            
-            spawn_position, success = self.map_manager.move_player(player_id, old_map, new_map, client_data["player_name"], self.store, character_id)
+            spawn_position, success = self.map_manager.move_player(player_id, old_map, new_map, client_data["player_name"], self.store, character)
             
             if success:
                 # Player ja foi movido pelo MapManager (sistema server-side)
+                new_map = self.map_manager.get_or_create_map(new_map).map_name  # pode ter caído no mapa padrão
+                self.sessions.set_map(websocket, new_map)
+                self.subscriptions.subscribe(websocket, new_map)
+                new_player = self.map_manager.maps[new_map].players.get(player_id)
+                if new_player:
+                    self.persistence.flush_session_end(new_player, new_map, reason="map_change")
                 self.log(f"[MAP_MANAGER] Player {client_data['player_name']} movido: {old_map} -> {new_map}")
                 
                 # Notificar players do mapa ANTIGO que este player saiu
@@ -775,8 +949,8 @@ class GameServer:
         enemy_position = data.get("position", {})
         killer_id = data.get("killer_id", "")
         
-        # Broadcast para outros jogadores
-        await self.broadcast({
+        # Broadcast para outros jogadores do mesmo mapa
+        await self._relay_to_map(websocket, {
             "type": "enemy_death",
             "enemy_id": enemy_id,
             "position": enemy_position,
@@ -796,8 +970,8 @@ class GameServer:
         new_hp = data.get("new_hp", 0)
         attacker_id = data.get("attacker_id", "")
         
-        # Broadcast para outros jogadores
-        await self.broadcast({
+        # Broadcast para outros jogadores do mesmo mapa
+        await self._relay_to_map(websocket, {
             "type": "enemy_damage",
             "enemy_id": enemy_id,
             "damage": damage,
@@ -820,8 +994,12 @@ class GameServer:
         animation = data.get("animation", "idle")
         owner_id = data.get("owner_id", "")
         
-        # Broadcast para outros jogadores
-        await self.broadcast({
+        map_name = self.subscriptions.get_map(websocket)
+        if not map_name:
+            return
+        
+        # Enviado no fim do tick para os outros jogadores do mapa (última posição vence)
+        self.relay_coalescer.put(map_name, enemy_id, websocket, {
             "type": "enemy_position_sync",
             "enemy_id": enemy_id,
             "position": position,
@@ -829,7 +1007,7 @@ class GameServer:
             "flip_h": flip_h,
             "animation": animation,
             "owner_id": owner_id
-        }, exclude=websocket)
+        })
         
         # Log menos frequente para posição (opcional)
         # self.log(f"Posição do inimigo {enemy_id} sincronizada por {client_data['player_name']}")
@@ -844,14 +1022,9 @@ class GameServer:
         damage = data.get("damage", 0)
         attacker_id = client_data["player_id"]
         
-        # Encontrar em qual mapa o atacante está (sistema server-side)
-        attacker_map = None
-        for map_name, map_instance in self.map_manager.maps.items():
-            if map_instance.has_player(attacker_id):
-                attacker_map = map_name
-                break
-        
-        if not attacker_map:
+        # Mapa em que o atacante está (registro de sessões)
+        attacker_map = self.sessions.get(websocket).map_name
+        if attacker_map not in self.map_manager.maps:
             return
         
         # Processar dano no mapa específico usando MapManager
@@ -861,36 +1034,7 @@ class GameServer:
             # Broadcast resultado (suporta lista de eventos)
             if isinstance(result, list):
                 for ev in result:
-                    # Persistir stats em eventos de update
-                    if isinstance(ev, dict) and ev.get("type") == "player_stats_update":
-                        try:
-                            player_id_ev = ev.get("player_id")
-                            map_instance = self.map_manager.maps.get(attacker_map)
-                            if map_instance and player_id_ev in map_instance.players:
-                                sp = map_instance.players[player_id_ev]
-                                user = self.store.get_user_by_username(sp.name)
-                                if user:
-                                    char = self.store.get_character_by_user_id(user["id"])
-                                    if char:
-                                        self.store.save_character_state(char["id"], {
-                                            "level": sp.level,
-                                            "xp": sp.xp,
-                                            "xp_max": sp.xp_max,
-                                            "attr_points": sp.attribute_points,
-                                            "map": attacker_map,
-                                            "pos_x": sp.position[0],
-                                            "pos_y": sp.position[1],
-                                            "hp": sp.hp,
-                                            "hp_max": sp.max_hp,
-                                        })
-                                        self.store.save_character_attributes(char["id"], {
-                                            "strength": sp.strength,
-                                            "defense": sp.defense_attr,
-                                            "intelligence": sp.intelligence,
-                                            "vitality": sp.vitality,
-                                        })
-                        except Exception as e:
-                            self.log(f"[DB][WARNING] Falha ao persistir stats: {e}")
+                    # Stats alterados ficam marcados no ServerPlayer (gravados pelo PersistenceScheduler)
                     await self.broadcast_to_map(attacker_map, ev)
             else:
                 await self.broadcast_to_map(attacker_map, result)
@@ -922,6 +1066,18 @@ class GameServer:
         
         self.log(f"Enviado estado de {len(enemies_state)} inimigos do mapa '{map_name}' para {client_data['player_name']}")
 
+    async def handle_snapshot_ack(self, websocket, data):
+        """Cliente confirma o último snapshot aplicado (baseline para os próximos deltas)"""
+        client_data = self.clients.get(websocket)
+        if not client_data:
+            return
+        try:
+            tick = int(data.get("tick"))
+        except (TypeError, ValueError):
+            return
+        if tick <= self.tick and tick > client_data.get("acked_tick", -1):
+            client_data["acked_tick"] = tick
+
     async def handle_spend_attribute_point(self, websocket, data):
         """Gasta 1 ponto de atributo do player (server-authoritative)"""
         client_data = self.clients.get(websocket)
@@ -933,13 +1089,8 @@ class GameServer:
         player_id = client_data["player_id"]
 
         # Encontrar player e mapa
-        current_map = None
-        map_instance = None
-        for map_name, mi in self.map_manager.maps.items():
-            if mi.has_player(player_id):
-                current_map = map_name
-                map_instance = mi
-                break
+        current_map = self.sessions.get(websocket).map_name
+        map_instance = self.map_manager.maps.get(current_map)
         if not map_instance:
             return
 
@@ -949,32 +1100,6 @@ class GameServer:
 
         # Aplicar ponto de atributo
         if sp.add_attribute_point(attr):
-            # Persistir no DB
-            try:
-                user = self.store.get_user_by_username(sp.name)
-                if user:
-                    char = self.store.get_character_by_user_id(user["id"])
-                    if char:
-                        self.store.save_character_state(char["id"], {
-                            "level": sp.level,
-                            "xp": sp.xp,
-                            "xp_max": sp.xp_max,
-                            "attr_points": sp.attribute_points,
-                            "map": current_map,
-                            "pos_x": sp.position[0],
-                            "pos_y": sp.position[1],
-                            "hp": sp.hp,
-                            "hp_max": sp.max_hp,
-                        })
-                        self.store.save_character_attributes(char["id"], {
-                            "strength": sp.strength,
-                            "defense": sp.defense_attr,
-                            "intelligence": sp.intelligence,
-                            "vitality": sp.vitality,
-                        })
-            except Exception as e:
-                self.log(f"[DB][WARNING] Falha ao persistir ponto de atributo: {e}")
-
             # Notificar cliente (e demais do mapa) com stats atualizados
             stats_ev = {
                 "type": "player_stats_update",
@@ -985,36 +1110,245 @@ class GameServer:
             await self.broadcast_to_map(current_map, stats_ev)
     
     async def send_to_client(self, websocket, data):
-        """Envia mensagem para um cliente específico"""
-        try:
-            await websocket.send(json.dumps(data))
-        except websockets.exceptions.ConnectionClosed:
-            pass
-        except Exception as e:
-            self.log(f"Erro ao enviar mensagem: {e}")
+        """Envia mensagem para um cliente específico (via fila de saída da conexão)"""
+        client_data = self.clients.get(websocket)
+        if not client_data:
+            return
+        client_data["outbox"].put(OutboundMessage(data))
     
     async def broadcast(self, data, exclude=None):
         """Envia mensagem para todos os clientes conectados"""
-        if not self.clients:
+        targets = [websocket for websocket in self.clients if websocket != exclude]
+        await self._fan_out(targets, data)
+    
+    async def _fan_out(self, targets: list, data: dict):
+        """Enfileira a mesma mensagem para todos os alvos; cada frame é serializado uma única vez"""
+        if not targets:
             return
         
-        message = json.dumps(data)
-        disconnected = []
-        
-        for websocket in self.clients:
-            if websocket != exclude:
-                try:
-                    await websocket.send(message)
-                except websockets.exceptions.ConnectionClosed:
-                    disconnected.append(websocket)
-                except Exception as e:
-                    self.log(f"Erro no broadcast: {e}")
-                    disconnected.append(websocket)
-        
-        # Remove conexões mortas
-        for websocket in disconnected:
+        message = OutboundMessage(data)
+        # Clientes com delta recebem o estado via snapshot_delta, não via players/enemies_update
+        is_snapshot = data.get("type") in SNAPSHOT_TYPES
+        dead = []
+        for websocket in targets:
+            client_data = self.clients.get(websocket)
+            if not client_data:
+                continue
+            if is_snapshot and FEATURE_DELTA in client_data["protocol"]["features"]:
+                continue
+            outbox = client_data["outbox"]
+            if outbox.closed:
+                dead.append(websocket)
+                continue
+            outbox.put(message)
+        
+        # Remove conexões mortas (escritor já encerrado)
+        for websocket in dead:
             await self.unregister_client(websocket)
     
+    def _build_delta_snapshots(self, map_names=None) -> list:
+        """Registra o snapshot do tick e monta, para cada cliente com "delta", só o que mudou
+        desde o último tick que ele confirmou (ou um keyframe periódico).
+        map_names: só esses mapas (os que têm envio neste tick). Retorna [(outbox, mensagem)]"""
+        pending = []
+        for map_name, subscribers in self.subscriptions.items():
+            if map_names is not None and map_name not in map_names:
+                continue
+            delta_clients = [
+                websocket for websocket in subscribers
+                if FEATURE_DELTA in self.clients[websocket]["protocol"]["features"]
+            ]
+            if not delta_clients:
+                continue
+            map_instance = self.map_manager.maps.get(map_name)
+            if not map_instance:
+                continue
+            
+            history = self.snapshot_histories.get(map_name)
+            if history is None:
+                history = self.snapshot_histories[map_name] = SnapshotHistory()
+            history.record(
+                self.tick,
+                map_instance.get_players_data_dict(),
+                {enemy_id: enemy.get_sync_data() for enemy_id, enemy in map_instance.enemies.items()},
+            )
+            filtered = bool(map_instance.interest_radius)
+            
+            # Clientes com o mesmo baseline compartilham a mesma mensagem
+            # (com área de interesse cada cliente tem o seu próprio recorte)
+            messages_by_baseline = {}
+            for websocket in delta_clients:
+                client_data = self.clients[websocket]
+                if client_data.get("delta_map") != map_name:
+                    # Entrou no mapa agora: acks anteriores são de outro mapa
+                    client_data["delta_map"] = map_name
+                    client_data["delta_since"] = self.tick
+                    client_data.pop("keyframe_tick", None)
+                
+                baseline_tick = client_data.get("acked_tick")
+                keyframe_due = self.tick - client_data.get("keyframe_tick", -KEYFRAME_INTERVAL) >= KEYFRAME_INTERVAL
+                if keyframe_due or baseline_tick is None or baseline_tick < client_data["delta_since"] or not history.has(baseline_tick):
+                    baseline_tick = None
+                
+                visible = None
+                cache_key = baseline_tick
+                if filtered:
+                    visible = self._client_interest(client_data, map_name)
+                    if visible is None:
+                        continue
+                    cache_key = (baseline_tick, websocket)
+                
+                if cache_key not in messages_by_baseline:
+                    delta = history.build_delta(self.tick, baseline_tick, visible)
+                    messages_by_baseline[cache_key] = OutboundMessage(delta) if delta else None
+                message = messages_by_baseline[cache_key]
+                if message is None:
+                    continue
+                
+                if baseline_tick is None:
+                    client_data["keyframe_tick"] = self.tick
+                pending.append((client_data["outbox"], message))
+        return pending
+    
+    async def broadcast_snapshot(self, map_name: str, data: dict):
+        """players_update/enemies_update do mapa; com área de interesse cada cliente
+        recebe só as entidades que enxerga (clientes com o mesmo recorte compartilham a mensagem)"""
+        map_instance = self.map_manager.maps.get(map_name)
+        if not map_instance or not map_instance.interest_radius:
+            await self.broadcast_to_map(map_name, data)
+            return
+        
+        is_players = data.get("type") == "players_update"
+        groups = {}
+        for websocket in self.subscriptions.get_subscribers(map_name):
+            client_data = self.clients.get(websocket)
+            visible = self._client_interest(client_data, map_name) if client_data else None
+            if visible is None:
+                continue
+            if is_players:
+                ids = frozenset(pid for pid in data.get("players", {}) if pid in visible["players"])
+            else:
+                ids = frozenset(e.get("enemy_id") for e in data.get("enemies", []) if e.get("enemy_id") in visible["enemies"])
+            if ids:
+                groups.setdefault(ids, []).append(websocket)
+        
+        for ids, targets in groups.items():
+            if is_players:
+                filtered = {pid: p for pid, p in data["players"].items() if pid in ids}
+                await self._fan_out(targets, {**data, "players": filtered})
+            else:
+                filtered = [e for e in data["enemies"] if e.get("enemy_id") in ids]
+                await self._fan_out(targets, {**data, "enemies": filtered})
+    
+    def _client_interest(self, client_data: dict, map_name: str):
+        """Conjunto visível atual do cliente no mapa ({"players"/"enemies": {id: tick de entrada}})"""
+        interest = client_data.get("interest")
+        if not interest or interest["map"] != map_name:
+            return None
+        return interest
+    
+    def _update_interest(self, map_names=None):
+        """Recalcula o que cada cliente enxerga nos mapas com área de interesse e
+        envia entities_enter / entities_leave para o que cruzou o raio
+        (map_names: só esses mapas)"""
+        for map_name, subscribers in self.subscriptions.items():
+            if map_names is not None and map_name not in map_names:
+                continue
+            map_instance = self.map_manager.maps.get(map_name)
+            if not map_instance or not map_instance.interest_radius:
+                continue
+            
+            for websocket in subscribers:
+                client_data = self.clients.get(websocket)
+                if not client_data or not client_data.get("player_id"):
+                    continue
+                visible = map_instance.get_visible_entities(client_data["player_id"])
+                if visible is None:
+                    continue
+                interest = self._client_interest(client_data, map_name)
+                if interest is None:
+                    interest = client_data["interest"] = {"map": map_name, "players": {}, "enemies": {}}
+                
+                visible_players, visible_enemies = visible
+                entered_players = visible_players - interest["players"].keys()
+                left_players = interest["players"].keys() - visible_players
+                entered_enemies = visible_enemies - interest["enemies"].keys()
+                left_enemies = interest["enemies"].keys() - visible_enemies
+                
+                for entity_id in left_players:
+                    del interest["players"][entity_id]
+                for entity_id in left_enemies:
+                    del interest["enemies"][entity_id]
+                for entity_id in entered_players:
+                    interest["players"][entity_id] = self.tick
+                for entity_id in entered_enemies:
+                    interest["enemies"][entity_id] = self.tick
+                
+                outbox = client_data["outbox"]
+                if left_players or left_enemies:
+                    outbox.put(OutboundMessage({
+                        "type": "entities_leave",
+                        "players": sorted(left_players),
+                        "enemies": sorted(left_enemies),
+                    }))
+                if entered_players or entered_enemies:
+                    outbox.put(OutboundMessage({
+                        "type": "entities_enter",
+                        "players": {pid: map_instance.players[pid].get_sync_data() for pid in entered_players},
+                        "enemies": [map_instance.enemies[eid].get_sync_data() for eid in entered_enemies],
+                    }))
+    
+    async def _relay_to_map(self, websocket, data: dict, exclude=None):
+        """Retransmite uma mensagem de cliente apenas para o mapa em que ele está"""
+        map_name = self.subscriptions.get_map(websocket)
+        if not map_name:
+            return
+        await self.broadcast_to_map(map_name, data, exclude=exclude)
+    
+    async def _flush_relays(self):
+        """Envia as retransmissões coalescidas do tick"""
+        for map_name, sender, data in self.relay_coalescer.drain():
+            await self.broadcast_to_map(map_name, data, exclude=sender)
+    
+    def _end_tick(self):
+        """Libera o envelope do tick atual nas filas em modo lote"""
+        for client_data in self.clients.values():
+            client_data["outbox"].end_tick(self.tick)
+    
+    def _on_outbound_evict(self, outbox, reason: str):
+        """Callback das filas de saída quando um cliente lento é desconectado"""
+        self.outbound_totals["evicted"] += 1
+        self.log(f"[NET] Desconectando {outbox.websocket.remote_address}: {reason}")
+    
+    def get_outbound_stats(self) -> dict:
+        """Profundidade das filas de saída e descartes (ativos + acumulados)"""
+        depths = [client_data["outbox"].depth for client_data in self.clients.values()]
+        return {
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths) if depths else 0,
+            "queued_bytes": sum(client_data["outbox"].pending_bytes for client_data in self.clients.values()),
+            "dropped": self.outbound_totals["dropped"] + sum(c["outbox"].dropped for c in self.clients.values()),
+            "coalesced": self.outbound_totals["coalesced"] + sum(c["outbox"].coalesced for c in self.clients.values()),
+            "evicted": self.outbound_totals["evicted"],
+        }
+    
+    def get_input_stats(self) -> dict:
+        """Inputs coalescidos por tick e mensagens descartadas pelo rate limit"""
+        rate_limited = dict(self.rate_limited_totals)
+        for client_data in self.clients.values():
+            for message_type, count in client_data["rate_limiter"].dropped.items():
+                rate_limited[message_type] = rate_limited.get(message_type, 0) + count
+        return {
+            **self.input_collector.get_stats(),
+            "rate_limited": rate_limited,
+            "relay": self.relay_coalescer.get_stats(),
+        }
+    
+    def _find_player_map(self, player_id: str):
+        """Retorna o nome do mapa em que o player está (registro de sessões) ou None"""
+        session = self.sessions.by_player(player_id)
+        return session.map_name if session else None
+    
     def get_players_in_map(self, map_name: str) -> dict:
         """Retorna apenas os players que estão no mapa especificado (server-side)"""
         map_instance = self.map_manager.maps.get(map_name)
@@ -1028,18 +1362,8 @@ class GameServer:
         if not client_data or not client_data.get("player_id"):
             return
             
-        player_id = client_data["player_id"]
-        
-        # Buscar player server-side em todos os mapas
-        current_map = None
-        server_player = None
-        for map_name, map_instance in self.map_manager.maps.items():
-            if player_id in map_instance.players:
-                current_map = map_name
-                server_player = map_instance.players[player_id]
-                break
-        
-        if not current_map:
+        current_map = self.sessions.get(websocket).map_name
+        if current_map not in self.map_manager.maps:
             return
         
         # Filtrar players apenas do mesmo mapa (formato Dictionary para cliente)
@@ -1060,57 +1384,19 @@ class GameServer:
     
     async def broadcast_to_map(self, map_name: str, data: dict, exclude=None):
         """Envia mensagem apenas para players de um mapa específico"""
-        if map_name not in self.map_manager.maps:
-            return
-        
-        map_instance = self.map_manager.maps[map_name]
-        target_players = set(map_instance.players.keys())
-        
-        message = json.dumps(data)
-        for websocket in list(self.clients.keys()):
-            if websocket == exclude:
-                continue
-                
-            client_data = self.clients.get(websocket)
-            if not client_data or not client_data.get("player_id"):
-                continue
-                
-            if client_data["player_id"] in target_players:
-                try:
-                    await websocket.send(message)
-                except Exception as e:
-                    self.log(f"Erro ao enviar para player no mapa {map_name}: {e}")
+        targets = [websocket for websocket in self.subscriptions.get_subscribers(map_name) if websocket != exclude]
+        await self._fan_out(targets, data)
     
     async def broadcast_all_maps_players_update(self):
         """Atualiza lista de players para todos os mapas usando MapManager"""
         try:
-            self.log("[BROADCAST] Iniciando broadcast_all_maps_players_update...")
-            for websocket in list(self.clients.keys()):
-                client_data = self.clients.get(websocket)
-                if not client_data or not client_data.get("player_id"):
-                    continue
-                    
-                player_id = client_data["player_id"]
-                self.log(f"[BROADCAST] Processando player {player_id}...")
-                
-                # Encontrar em qual mapa o player está
-                current_map = None
-                for map_name, map_instance in self.map_manager.maps.items():
-                    if map_instance.has_player(player_id):
-                        current_map = map_name
-                        break
-                
-                if current_map:
-                    self.log(f"[BROADCAST] Player {player_id} está no mapa {current_map}")
-                    players_in_map = self.map_manager.get_players_in_map_dict(current_map)
-                    self.log(f"[BROADCAST] Enviando lista com {len(players_in_map)} players...")
-                    await self.send_to_client(websocket, {
-                        "type": "players_list",
-                        "players": players_in_map
-                    })
-                    self.log(f"[BROADCAST] Lista enviada com sucesso para {player_id}")
-                else:
-                    self.log(f"[BROADCAST] WARNING: Player {player_id} não encontrado em nenhum mapa")
+            # Uma lista serializada por mapa, enviada a todos os inscritos do mapa
+            for map_name, subscribers in self.subscriptions.items():
+                players_in_map = self.map_manager.get_players_in_map_dict(map_name)
+                await self._fan_out(list(subscribers), {
+                    "type": "players_list",
+                    "players": players_in_map
+                })
             
             self.log("[BROADCAST] broadcast_all_maps_players_update concluído")
         except Exception as e:
@@ -1133,9 +1419,9 @@ class GameServer:
             self.running = True
             self.log(f"Servidor iniciado em ws://{self.host}:{self.port}")
             
-            # Iniciar loops de atualização
-            self.enemy_update_task = asyncio.create_task(self._enemy_update_loop())
-            self.player_update_task = asyncio.create_task(self._player_update_loop())
+            # Iniciar o loop de simulação (continua a numeração de ticks de um warm restart)
+            self.scheduler.tick = self.tick
+            self.tick_task = asyncio.create_task(self.scheduler.run(lambda: self.running))
             
             return True
         except Exception as e:
@@ -1154,102 +1440,252 @@ class GameServer:
             "type": "server_shutdown",
             "message": "Servidor será desligado"
         })
+        outboxes = [client_data["outbox"] for client_data in self.clients.values()]
+        if outboxes:
+            await asyncio.gather(*(outbox.flush() for outbox in outboxes))
         
         # Fechar servidor
         self.server.close()
         await self.server.wait_closed()
         
+        # Snapshot do mundo para o próximo startup (antes de descartar as sessões)
+        self._save_world_snapshot()
+        
         # Limpar dados
+        for client_data in self.clients.values():
+            client_data["outbox"].close()
         self.clients.clear()
+        self.subscriptions.clear()
+        self.sessions.clear()
+        self.names.clear_online()
         # self.players removido - agora usando sistema server-side
         
         self.log("Servidor parado")
         
-        # Parar loops de atualização
-        if self.enemy_update_task:
-            self.enemy_update_task.cancel()
-        if hasattr(self, 'player_update_task') and self.player_update_task:
-            self.player_update_task.cancel()
+        # Parar o loop de simulação
+        if self.tick_task:
+            self.tick_task.cancel()
+        self._dump_tick_profile()
+        if self.map_workers is not None:
+            self.map_workers.close()
+        self.password_hasher.shutdown()
+        # Checkpoint final de todos os personagens online e commit de tudo o que foi enfileirado
+        try:
+            self.persistence.checkpoint(self.map_manager, SESSION_END_FIELDS, reason="shutdown")
+            await resolve(self.store.flush())
+            if isinstance(self.store, JournalStore):
+                await asyncio.get_running_loop().run_in_executor(None, self.store.compact)
+        except Exception as e:
+            self.log(f"[DB] Falha ao descarregar escritas pendentes: {e}")
+        # Para as threads escritoras (checkpoint final do WAL) e fecha as conexões
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.close)
+        except Exception as e:
+            self.log(f"[DB] Falha ao fechar o banco: {e}")
     
-    async def _enemy_update_loop(self):
-        """Loop principal de atualização dos inimigos usando MapManager"""
-        while self.running:
-            try:
-                # NOVO: Usar MapManager para atualizar inimigos por mapa
-                delta_time = 1/60  # 60 FPS
-                all_enemy_updates = self.map_manager.update_all_enemies(delta_time)
-                
-                # Broadcast atualizações para cada mapa específico
-                for map_name, updated_enemies in all_enemy_updates.items():
-                    if updated_enemies:
-                        await self.broadcast_to_map(map_name, {
-                            "type": "enemies_update",
-                            "enemies": updated_enemies
-                        })
-                # Sempre verificar eventos extras (ex.: dano em player), mesmo sem updates
-                for map_name, map_inst in self.map_manager.maps.items():
-                    try:
-                        extra_events = getattr(map_inst, "_last_enemy_events", [])
-                        if extra_events:
-                            for ev in extra_events:
-                                await self.broadcast_to_map(map_name, ev)
-                            map_inst._last_enemy_events = []
-                    except Exception as e:
-                        self.log(f"[ENEMY_LOOP] Falha ao enviar eventos extras: {e}")
-                    try:
-                        map_inst = self.map_manager.maps.get(map_name)
-                        extra_events = getattr(map_inst, "_last_enemy_events", []) if map_inst else []
-                        if extra_events:
-                            for ev in extra_events:
-                                await self.broadcast_to_map(map_name, ev)
-                            map_inst._last_enemy_events = []
-                    except Exception as e:
-                        self.log(f"[ENEMY_LOOP] Falha ao enviar eventos extras: {e}")
-                
-                # Cleanup mapas vazios ocasionalmente
-                if len(all_enemy_updates) % 3600 == 0:  # A cada 60 segundos (60fps * 60s)
-                    self.map_manager.cleanup_empty_maps()
-                
-                # Aguardar próximo frame (60 FPS)
-                await asyncio.sleep(1/60)
-                
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                self.log(f"Erro no loop de inimigos: {e}")
-    
-    async def _player_update_loop(self):
-        """Loop principal de atualização dos players usando MapManager"""
-        while self.running:
+    def _capture_world(self) -> dict:
+        """Mapas (inimigos, fila de respawn) e sessões (online e desconectadas) para o snapshot"""
+        sessions = []
+        for session in self.sessions.in_game():
+            map_instance = self.map_manager.maps.get(session.map_name)
+            server_player = map_instance.players.get(session.player_id) if map_instance else None
+            client_data = self.clients.get(session.websocket, {})
+            if server_player is not None and client_data.get("resume_nonce"):
+                sessions.append((session, server_player, session.map_name, client_data["resume_nonce"]))
+        for player_id, entry in self.detached_sessions.items():
+            sessions.append((entry["session"], entry["server_player"], entry["map"], entry["nonce"]))
+        
+        world_sessions = []
+        for session, server_player, map_name, nonce in sessions:
+            player_snapshot = server_player.to_snapshot()
+            if player_snapshot:
+                world_sessions.append({
+                    "session": session.to_snapshot(),
+                    "player": player_snapshot,
+                    "map": map_name,
+                    "nonce": nonce,
+                })
+        return {
+            "tick": self.tick,
+            "resume_secret": self.resume_tokens.secret.hex(),
+            "maps": self.map_manager.snapshot_all_maps(),
+            "sessions": world_sessions,
+        }
+    
+    def _dump_tick_profile(self, path=None):
+        """Grava o relatório do profiler de ticks (path ou tick_profile_path; sem nenhum, não faz nada)"""
+        path = path or self.tick_profile_path
+        if not path:
+            return
+        try:
+            self.scheduler.profiler.dump(path, {"tick": self.scheduler.tick, "scheduler": {
+                key: value for key, value in self.scheduler.get_stats().items()
+                if key in ("target_hz", "achieved_hz", "late_ticks", "skipped", "errors")
+            }})
+            self.log(f"[TICK] Perfil dos ticks gravado em {path}")
+        except Exception as e:
+            self.log(f"[TICK] Falha ao gravar o perfil dos ticks: {e}")
+    
+    def _save_world_snapshot(self):
+        try:
+            world = self._capture_world()
+            size = write_world_snapshot(self.world_snapshot_path, world)
+            self.log(f"[SNAPSHOT] Mundo salvo: {len(world['maps'])} mapas, {len(world['sessions'])} sessões, {size} bytes")
+        except Exception as e:
+            self.log(f"[SNAPSHOT] Falha ao salvar snapshot do mundo: {e}")
+    
+    def _restore_world_snapshot(self):
+        """Restaura o snapshot do último desligamento (se recente); sessões voltam como desconectadas (resume).
+        Tudo é montado e validado antes de mexer no servidor: um snapshot inválido não deixa restauração pela metade"""
+        world = read_world_snapshot(self.world_snapshot_path)
+        if world is None:
+            return
+        try:
+            tick = int(world.get("tick", 0))
+            # Mesmo segredo: tokens de retomada emitidos antes do restart continuam válidos
+            resume_tokens = ResumeTokens(secret=bytes.fromhex(world["resume_secret"]))
+            # Tempo desligado: descontado dos respawns pendentes
+            elapsed = max(0.0, float(world["age"]))
+            maps = {}
+            for map_name, map_data in world.get("maps", {}).items():
+                if map_name not in self.map_manager.available_maps:
+                    self.log(f"[SNAPSHOT] Mapa desconhecido ignorado: {map_name}")
+                    continue
+                map_instance = MapInstance(map_name, self.map_manager.tick_rate)
+                map_instance.restore_snapshot(map_data, elapsed=elapsed)
+                maps[map_name] = map_instance
+            detached = []
+            for entry in world.get("sessions", []):
+                map_instance = maps.get(entry["map"]) or self.map_manager.get_map(entry["map"])
+                if map_instance is None:
+                    raise ValueError(f"sessão em mapa desconhecido: {entry['map']}")
+                server_player = ServerPlayer.from_snapshot(entry["player"], map_instance.spawn_positions, self.store)
+                detached.append((server_player.player_id, {
+                    "session": Session.from_snapshot(entry["session"]),
+                    "server_player": server_player,
+                    "map": map_instance.map_name,
+                    "nonce": str(entry["nonce"]),
+                }))
+        except Exception as e:
+            self.log(f"[SNAPSHOT] Snapshot do mundo inválido, ignorado: {e}")
+        else:
+            self.tick = tick
+            self.resume_tokens = resume_tokens
+            for map_instance in maps.values():
+                self.map_manager.adopt_map(map_instance)
+            for player_id, entry in detached:
+                self.detached_sessions.detach(player_id, entry)
+            self.log(f"[SNAPSHOT] Mundo restaurado ({elapsed:.1f}s): {len(maps)} mapas, "
+                     f"{len(detached)} sessões aguardando retomada")
+        finally:
+            # Um snapshot vale para um único startup
             try:
-                # Atualizar players em todos os mapas
-                delta_time = 1/60  # 60 FPS
-                all_player_updates = self.map_manager.update_all_players(delta_time)
-                
-                # Broadcast atualizações para cada mapa específico
-                for map_name, updated_players in all_player_updates.items():
-                    if updated_players:
-                        # Converter lista [{id:..., ...}] para dicionário {id: {...}}
-                        try:
-                            players_by_id = {p.get("id"): p for p in updated_players if isinstance(p, dict) and p.get("id")}
-                        except Exception:
-                            players_by_id = {}
-                            for p in updated_players:
-                                if isinstance(p, dict) and p.get("id"):
-                                    players_by_id[p["id"]] = p
-
-                        await self.broadcast_to_map(map_name, {
-                            "type": "players_update",
-                            "players": players_by_id
-                        })
-                
-                # Aguardar próximo frame (60 FPS)
-                await asyncio.sleep(1/60)
-                
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                self.log(f"Erro no loop de players: {e}")
+                os.remove(self.world_snapshot_path)
+            except OSError:
+                pass
+    
+    def _register_tick_phases(self):
+        """Pipeline do tick, na ordem de TICK_PHASES"""
+        for phase, callback in (
+            ("inputs", self._phase_inputs),
+            ("players", self._phase_players),
+            ("enemies", self._phase_enemies),
+            ("combat", self._phase_combat),
+            ("respawns", self._phase_respawns),
+            ("encode", self._phase_encode),
+            ("send", self._phase_send),
+            ("housekeeping", self._phase_housekeeping),
+        ):
+            self.scheduler.add_phase(phase, callback)
+    
+    def _phase_inputs(self, tick: int, dt: float):
+        """Aplicar os inputs recebidos desde o último tick (um por player)"""
+        self.tick = tick
+        self.map_manager.begin_tick(tick)
+        self.input_collector.apply(self.map_manager)
+    
+    def _phase_players(self, tick: int, dt: float):
+        for map_name, updated_players in self.map_manager.update_all_players().items():
+            pending = self._tick_players.setdefault(map_name, {})
+            for p in updated_players:
+                if isinstance(p, dict) and p.get("id"):
+                    pending[p["id"]] = p
+    
+    async def _phase_enemies(self, tick: int, dt: float):
+        # IA dos inimigos já enxerga as posições dos players deste tick
+        for map_name, updated_enemies in (await self.map_manager.update_all_enemies()).items():
+            pending = self._tick_enemies.setdefault(map_name, {})
+            for enemy in updated_enemies:
+                pending[enemy.get("enemy_id")] = enemy
+    
+    def _phase_combat(self, tick: int, dt: float):
+        for map_name, events in self.map_manager.resolve_all_combat().items():
+            self._tick_events.setdefault(map_name, []).extend(events)
+    
+    def _phase_respawns(self, tick: int, dt: float):
+        for map_name, revived in self.map_manager.process_all_respawns().items():
+            pending = self._tick_enemies.setdefault(map_name, {})
+            for enemy in revived:
+                pending[enemy.get("enemy_id")] = enemy
+    
+    def _phase_encode(self, tick: int, dt: float):
+        """Monta as mensagens dos mapas com envio devido (send_hz): áreas de interesse,
+        snapshots e deltas. Nos demais o estado segue acumulando (vale o mais novo por entidade)"""
+        sending = [map_name for map_name, map_instance in self.map_manager.maps.items() if map_instance.take_send_due()]
+        profiler = self.scheduler.profiler
+        outgoing = []
+        deltas = {}
+        for map_name in sending:
+            started = time.perf_counter()
+            self._update_interest((map_name,))
+            enemies = self._tick_enemies.pop(map_name, None)
+            if enemies:
+                outgoing.append((map_name, {"type": "enemies_update", "enemies": list(enemies.values())}))
+            players = self._tick_players.pop(map_name, None)
+            if players:
+                outgoing.append((map_name, {"type": "players_update", "players": players}))
+            map_deltas = self._build_delta_snapshots((map_name,))
+            if map_deltas:
+                deltas[map_name] = map_deltas
+            profiler.add_map_time(map_name, "encode", time.perf_counter() - started)
+        self._tick_outgoing = outgoing
+        self._tick_deltas = deltas
+    
+    async def _phase_send(self, tick: int, dt: float):
+        """Enfileira tudo o que o tick produziu e fecha o lote dos clientes em modo lote"""
+        outgoing, self._tick_outgoing = self._tick_outgoing, []
+        events, self._tick_events = self._tick_events, {}
+        deltas, self._tick_deltas = self._tick_deltas, {}
+        profiler = self.scheduler.profiler
+        for map_name, snapshot in outgoing:
+            started = time.perf_counter()
+            await self.broadcast_snapshot(map_name, snapshot)
+            profiler.add_map_time(map_name, "send", time.perf_counter() - started)
+        # Eventos extras (ex.: dano em player)
+        for map_name, map_events in events.items():
+            started = time.perf_counter()
+            for event in map_events:
+                await self.broadcast_to_map(map_name, event)
+            profiler.add_map_time(map_name, "send", time.perf_counter() - started)
+        await self._flush_relays()
+        for map_name, map_deltas in deltas.items():
+            started = time.perf_counter()
+            for outbox, message in map_deltas:
+                outbox.put(message)
+            profiler.add_map_time(map_name, "send", time.perf_counter() - started)
+        self._end_tick()
+    
+    def _phase_housekeeping(self, tick: int, dt: float):
+        if tick % 60 == 0:
+            self._expire_detached_sessions()
+        self.persistence.maybe_checkpoint(self.map_manager)
+        # Cleanup mapas vazios ocasionalmente (a cada 60 segundos)
+        if tick % int(self.scheduler.tick_rate * 60) == 0:
+            self.map_manager.cleanup_empty_maps()
+            # Estado acumulado de mapas removidos não será mais enviado
+            for pending in (self._tick_players, self._tick_enemies):
+                for map_name in [name for name in pending if name not in self.map_manager.maps]:
+                    del pending[map_name]
     
     def get_status(self):
         """Retorna status do servidor"""
@@ -1265,7 +1701,21 @@ class GameServer:
             "host": self.host,
             "port": self.port,
             "enemies_count": enemies_count,
-            "maps_active": len(self.map_manager.maps)
+            "maps_active": len(self.map_manager.maps),
+            "maps_hibernation": self.map_manager.get_hibernation_stats(),
+            "outbound": self.get_outbound_stats(),
+            "messages": self.dispatcher.get_stats(),
+            "input": self.get_input_stats(),
+            "sessions": {**self.sessions.get_stats(), **self.detached_sessions.get_stats()},
+            "db": self.store.get_stats() if hasattr(self.store, "get_stats") else {},
+            "persistence": self.persistence.get_stats(),
+            "tick": self.scheduler.get_stats(),
+            "names": self.names.get_stats(),
+            "map_workers": self.map_workers.get_stats() if self.map_workers is not None else {},
+            "auth": {
+                "hasher": self.password_hasher.get_stats(),
+                "admission": self.login_admission.get_stats()
+            }
         }
 
 
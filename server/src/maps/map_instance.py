@@ -7,6 +7,18 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from enemies.multiplayer_enemy import MultiplayerEnemy
 from enemies.orc_enemy import OrcEnemy
 from players.server_player import ServerPlayer
+from db.records import CharacterRecord
+from maps.spatial_grid import SpatialGrid
+from maps.map_layout_config import get_map_interest_radius, get_map_tick_rates
+from maps.tick_scheduler import DEFAULT_TICK_RATE
+from maps.world_snapshot import pack_snapshot, unpack_snapshot
+
+# Mapa sem players e sem atividade por este tempo (segundos) é serializado e descarregado
+DEFAULT_HIBERNATE_TIMEOUT = 300.0
+
+
+# Classes de inimigo por enemy_type (recriar inimigos a partir de um snapshot)
+ENEMY_TYPES = {"orc": OrcEnemy}
 
 
 class MapInstance:
@@ -15,13 +27,14 @@ class MapInstance:
     Gerencia players, inimigos e estado específicos de cada mapa.
     """
     
-    def __init__(self, map_name: str):
+    def __init__(self, map_name: str, tick_rate: float = DEFAULT_TICK_RATE):
         self.map_name = map_name
+        self.tick_rate = tick_rate
         self.players: Dict[str, ServerPlayer] = {}  # player_id -> ServerPlayer instance
         self.enemies: Dict[str, MultiplayerEnemy] = {}  # enemy_id -> enemy_instance
         self.active = True
         self.created_at = time.time()
-        self.last_activity = time.time()
+        self.last_activity = time.monotonic()  # só para a hibernação (imune a ajustes do relógio)
         
         # Sistema de respawn infinito - otimizado
         self.respawn_queue: List[dict] = []  # Lista de inimigos aguardando respawn
@@ -32,11 +45,57 @@ class MapInstance:
         # Configurações específicas por mapa
         self.spawn_positions = self._get_spawn_positions()
         
+        # Area of interest: grades de players/inimigos (só com raio configurado)
+        self.interest_radius = get_map_interest_radius(map_name)
+        self.player_grid: Optional[SpatialGrid] = None
+        self.enemy_grid: Optional[SpatialGrid] = None
+        if self.interest_radius:
+            self.player_grid = SpatialGrid(self.interest_radius)
+            self.enemy_grid = SpatialGrid(self.interest_radius)
+        
+        # Frequências de simulação e de envio (tick_rate = frequência do servidor)
+        self.set_tick_rates(tick_rate, *get_map_tick_rates(map_name))
+        
+        # Inimigos simulados num processo worker (MapWorkerPool): self.enemies vira
+        # um espelho atualizado a cada passo; dano recebido segue para o worker
+        self.worker = None
+        self._worker_commands: List[Tuple[str, int]] = []  # (enemy_id, dano) desde o último passo
+        self._worker_revived: List[dict] = []  # revividos no worker, entregues em process_respawns
+        
         # Inicializar inimigos do mapa
         print(f"[MAP:{self.map_name}] CONSTRUTOR: Chamando _initialize_enemies()...")
         self._initialize_enemies()
         print(f"[MAP:{self.map_name}] CONSTRUTOR: _initialize_enemies() finalizado. Total: {len(self.enemies)}")
     
+    def set_tick_rates(self, tick_rate: float, sim_hz: float, send_hz: float) -> None:
+        """
+        O mapa simula a cada sim_interval ticks do servidor (passo sim_dt) e envia
+        snapshots a cada send_interval ticks. Frequências acima da do servidor
+        ficam na do servidor; as demais são arredondadas para um divisor dela.
+        """
+        self.sim_interval = max(1, round(tick_rate / sim_hz))
+        self.send_interval = max(1, round(tick_rate / send_hz))
+        self.sim_dt = self.sim_interval / tick_rate
+        self.sim_hz = tick_rate / self.sim_interval
+        self.send_hz = tick_rate / self.send_interval
+        self.sim_due = False
+        self._send_pending = False
+    
+    def begin_tick(self, tick: int) -> bool:
+        """Marca se o mapa simula neste tick do servidor (e se um envio ficou devido).
+        Mapa sem players não simula: inimigos ficam parados e a fila de respawn,
+        que é por horário, é resolvida de uma vez quando alguém entra"""
+        self.sim_due = bool(self.players) and tick % self.sim_interval == 0
+        if tick % self.send_interval == 0:
+            self._send_pending = True
+        return self.sim_due
+    
+    def take_send_due(self) -> bool:
+        """True se um envio está devido (consome; um envio pulado no catch-up sai no próximo encode)"""
+        due = self._send_pending
+        self._send_pending = False
+        return due
+    
     def _get_spawn_positions(self) -> dict:
         """Retorna posições de spawn por mapa"""
         spawn_configs = {
@@ -92,12 +151,11 @@ class MapInstance:
         # Defaults seguros
         return {"min_x": -542.0, "max_x": 200.0, "min_y": -300.0, "ground_y": 265.0}
     
-    def add_player(self, player_id: str, player_name: str, store=None, character_id=None) -> dict:
+    def add_player(self, player_id: str, player_name: str, store=None, character: Optional[CharacterRecord] = None) -> dict:
         """
         Adiciona um player server-side ao mapa e retorna posição de spawn
         """
-        print(f"[DEBUG_ADD_PLAYER] {player_name}: store={store is not None}, character_id={character_id}")
-        server_player = ServerPlayer(player_id, player_name, self.spawn_positions, store, character_id)
+        server_player = ServerPlayer(player_id, player_name, self.spawn_positions, store, character)
         
         # Verificar se precisa fazer respawn (player morto chegando na Cidade)
         if self.map_name == "Cidade" and server_player.hp <= 0:
@@ -106,13 +164,23 @@ class MapInstance:
             print(f"[RESPAWN_COMPLETED] Player {player_name} respawnou com HP={server_player.hp}/{server_player.max_hp}")
         
         self.players[player_id] = server_player
-        self.last_activity = time.time()
+        self.last_activity = time.monotonic()
+        if self.player_grid is not None:
+            self.player_grid.update(player_id, server_player.position[0], server_player.position[1])
         
         print(f" [MAP:{self.map_name}] Player {player_name} ({player_id}) entrou com HP={server_player.hp}/{server_player.max_hp}")
         print(f" [MAP:{self.map_name}] Players ativos: {len(self.players)} | Inimigos: {len(self.enemies)}")
         
         return self.spawn_positions
     
+    def attach_player(self, server_player: ServerPlayer) -> None:
+        """Recoloca no mapa um ServerPlayer já carregado (retomada de sessão)"""
+        self.players[server_player.player_id] = server_player
+        self.last_activity = time.monotonic()
+        if self.player_grid is not None:
+            self.player_grid.update(server_player.player_id, server_player.position[0], server_player.position[1])
+        print(f" [MAP:{self.map_name}] Player {server_player.name} ({server_player.player_id}) reconectou com HP={server_player.hp}/{server_player.max_hp}")
+    
     def remove_player(self, player_id: str) -> bool:
         """
         Remove um player do mapa. Retorna True se removeu com sucesso
@@ -120,7 +188,9 @@ class MapInstance:
         if player_id in self.players:
             player_name = self.players[player_id].name
             del self.players[player_id]
-            self.last_activity = time.time()
+            self.last_activity = time.monotonic()
+            if self.player_grid is not None:
+                self.player_grid.remove(player_id)
             
             print(f" [MAP:{self.map_name}] Player {player_name} ({player_id}) saiu")
             print(f" [MAP:{self.map_name}] Players restantes: {len(self.players)}")
@@ -131,7 +201,19 @@ class MapInstance:
         """Processa input de um player"""
         if player_id in self.players:
             self.players[player_id].process_input(input_data)
-            self.last_activity = time.time()
+            self.last_activity = time.monotonic()
+    
+    def apply_pending_input(self, player_id: str, pending: dict) -> bool:
+        """Aplica o input acumulado de um tick (ver InputCollector)"""
+        player = self.players.get(player_id)
+        if player is None:
+            return False
+        # Toques de jump/attack soltos antes do tick ainda acionam os buffers
+        if pending["pressed"]:
+            player.process_input({key: True for key in pending["pressed"]})
+        player.process_input(pending["state"])
+        self.last_activity = time.monotonic()
+        return True
     
     def get_players_data(self) -> List[dict]:
         """Retorna dados de todos os players do mapa para sincronização"""
@@ -159,17 +241,8 @@ class MapInstance:
                 alive_enemies.append(enemy.get_sync_data())
         return alive_enemies
     
-    def update_enemies(self, delta_time: float) -> List[dict]:
-        """
-        Atualiza todos os inimigos do mapa.
-        Retorna lista de inimigos que foram modificados.
-        OBS: Eventos adicionais (ex: dano em player) sero retornados via atributo
-        temporrio self._last_enemy_events, consumidos pelo MapManager/GameServer.
-        """
-        if not self.enemies:
-            return []
-        
-        # Converter dados dos ServerPlayers para formato esperado pelos inimigos
+    def get_enemy_view(self) -> Dict[str, dict]:
+        """Players no formato esperado pelos inimigos (o que a IA enxerga)"""
         enemies_players_data = {}
         for player_id, player in self.players.items():
             enemies_players_data[player_id] = {
@@ -179,19 +252,36 @@ class MapInstance:
                 "is_alive": player.is_alive,
                 "hp": player.hp
             }
+        return enemies_players_data
+    
+    def update_enemies(self, delta_time: float, enemies_players_data: Optional[Dict[str, dict]] = None) -> List[dict]:
+        """
+        Fase "enemies" do tick: IA e movimento de todos os inimigos do mapa.
+        Retorna lista de inimigos que foram modificados. Golpes concluídos ficam
+        pendentes em cada inimigo até resolve_combat(); mortes, até process_respawns().
+        enemies_players_data: visão dos players (padrão: get_enemy_view(); num worker vem do servidor)
+        """
+        if not self.enemies:
+            return []
+        
+        if enemies_players_data is None:
+            enemies_players_data = self.get_enemy_view()
         
         updated_enemies = []
-        extra_events = []
-        dead_enemies = []
         enemy_list = list(self.enemies.values())
 
-        for enemy_id, enemy in self.enemies.items():
+        for enemy in enemy_list:
             if enemy.update(delta_time, enemies_players_data, enemy_list):
                 updated_enemies.append(enemy.get_sync_data())
-                
-            # Verificar se morreu
-            if not enemy.is_alive:
-                dead_enemies.append(enemy_id)
+        return updated_enemies
+    
+    def resolve_combat(self) -> List[dict]:
+        """
+        Fase "combat" do tick: aplica nos players os golpes que os inimigos concluíram
+        neste tick (com as posições já simuladas). Retorna eventos player_damage.
+        """
+        extra_events = []
+        for enemy in self.enemies.values():
             # Verificar impacto de ataque contra player
             pid = None
             try:
@@ -224,9 +314,28 @@ class MapInstance:
                         "hp": sp.hp,
                         "hp_max": sp.max_hp,
                     })
-
+        return extra_events
+    
+    def process_respawns(self) -> List[dict]:
+        """
+        Fase "respawns" do tick: agenda o revival dos inimigos mortos e revive os
+        que venceram o prazo. Retorna os dados de sync dos revividos.
+        """
+        if self.worker is not None:
+            # Mortes e revivals são decididos no worker (ver apply_worker_step)
+            revived, self._worker_revived = self._worker_revived, []
+            self._refresh_enemy_grid()
+            return revived
+        if not self.enemies:
+            return []
+        dead_enemies = [enemy_id for enemy_id, enemy in self.enemies.items() if not enemy.is_alive]
+        
         # Agendar revival para inimigos mortos (não remover do dicionário)
+        # Um inimigo continua morto por vários ticks: agendar só uma vez
+        queued = {info["enemy_id"] for info in self.respawn_queue} if dead_enemies else set()
         for enemy_id in dead_enemies:
+            if enemy_id in queued:
+                continue
             enemy = self.enemies[enemy_id]
             
             # Agendar revival em vez de remoção
@@ -243,10 +352,10 @@ class MapInstance:
                 print(f"[DEATH] [MAP:{self.map_name}] Inimigo {enemy_id} removido permanentemente")
 
         # Processar fila de respawn
-        self._process_respawn_queue(updated_enemies)
-        # Guardar eventos para consumo pelo MapManager/GameServer
-        self._last_enemy_events = extra_events
-        return updated_enemies
+        revived = []
+        self._process_respawn_queue(revived)
+        self._refresh_enemy_grid()
+        return revived
     
     def _process_respawn_queue(self, updated_enemies: List[dict]):
         """Processa a fila de revival dos inimigos - otimizado para performance"""
@@ -322,9 +431,41 @@ class MapInstance:
 
             if changed or clamp_applied:
                 updated_players.append(player.get_sync_data())
+            if self.player_grid is not None:
+                self.player_grid.update(player_id, player.position[0], player.position[1])
         
         return updated_players
     
+    # ======= AREA OF INTEREST =======
+    def _refresh_enemy_grid(self):
+        """Reposiciona inimigos vivos na grade; mortos deixam de ser visíveis"""
+        if self.enemy_grid is None:
+            return
+        for enemy_id, enemy in self.enemies.items():
+            if enemy.is_alive:
+                self.enemy_grid.update(enemy_id, enemy.position[0], enemy.position[1])
+            else:
+                self.enemy_grid.remove(enemy_id)
+        if len(self.enemy_grid) > len(self.enemies):
+            for enemy_id in self.enemy_grid.ids() - self.enemies.keys():
+                self.enemy_grid.remove(enemy_id)
+    
+    def get_visible_entities(self, player_id: str) -> Optional[Tuple[set, set]]:
+        """
+        Retorna (player_ids, enemy_ids) dentro do raio de interesse do player.
+        None quando o mapa não filtra por área (todos veem tudo).
+        """
+        if not self.interest_radius:
+            return None
+        player = self.players.get(player_id)
+        if player is None:
+            return set(), set()
+        x, y = player.position[0], player.position[1]
+        visible_players = self.player_grid.query(x, y, self.interest_radius)
+        visible_players.add(player_id)
+        visible_enemies = self.enemy_grid.query(x, y, self.interest_radius)
+        return visible_players, visible_enemies
+    
     def damage_enemy(self, enemy_id: str, damage: int, attacker_id: str) -> Optional[list]:
         """Aplica dano a um inimigo. Retorna lista de eventos ou None"""
         if enemy_id not in self.enemies:
@@ -335,6 +476,8 @@ class MapInstance:
         print(f"[DAMAGE_DEBUG] [MAP:{self.map_name}] Aplicando {damage} dano no {enemy.enemy_type} {enemy_id}")
         died = enemy.take_damage(damage)
         print(f"[DAMAGE_DEBUG] [MAP:{self.map_name}] Resultado: died={died}")
+        if self.worker is not None:
+            self._worker_commands.append((enemy_id, damage))
 
         # Eventos a serem emitidos para os clientes
         events = []
@@ -391,6 +534,91 @@ class MapInstance:
             print(f"[DAMAGE] [MAP:{self.map_name}] Inimigo {enemy_id} recebeu {damage} dano (HP: {enemy.hp})")
             return [{"type": "enemy_update", **enemy.get_sync_data(), "attacker_id": attacker_id}]
     
+    # ======= WORKER =======
+    def take_worker_request(self) -> tuple:
+        """Argumentos do próximo passo no worker: (dt, visão dos players, dano recebido)"""
+        commands, self._worker_commands = self._worker_commands, []
+        return (self.sim_dt, self.get_enemy_view(), commands)
+    
+    def apply_worker_step(self, updated: List[dict], hits: List[Tuple[str, str]], revived: List[dict]) -> List[dict]:
+        """Aplica no espelho o resultado de um passo do worker. Retorna os inimigos alterados"""
+        # Dano recebido no gateway depois do envio do passo ainda está na fila (o worker não
+        # o viu): o hp/is_alive da resposta é anterior e reviveria um inimigo já morto e pago
+        damaged = {enemy_id for enemy_id, _ in self._worker_commands}
+        if damaged:
+            updated = [data for data in updated if data["enemy_id"] not in damaged]
+        for data in updated:
+            enemy = self.enemies.get(data["enemy_id"])
+            if enemy is not None:
+                enemy.apply_sync_data(data)
+        # Golpes resolvidos aqui no combat (precisa dos ServerPlayer)
+        for enemy_id, player_id in hits:
+            enemy = self.enemies.get(enemy_id)
+            if enemy is not None:
+                enemy.set_pending_hit(player_id)
+        for data in revived:
+            enemy = self.enemies.get(data["enemy_id"])
+            if enemy is not None:
+                enemy.apply_sync_data(data)
+        self._worker_revived.extend(revived)
+        return updated
+    
+    def to_snapshot(self) -> dict:
+        """Estado dos inimigos e da fila de respawn (tempos restantes) para o snapshot do mundo"""
+        if self.worker is not None:
+            # A fila de respawn e os timers de ataque estão no worker
+            snapshot = self.worker.fetch_snapshot(self.map_name)
+            if snapshot is not None:
+                return snapshot
+        now = time.time()
+        return {
+            "enemies": [enemy.get_sync_data() for enemy in self.enemies.values()],
+            "respawn": [
+                {"enemy_id": info["enemy_id"], "remaining": max(0.0, info["respawn_time"] - now)}
+                for info in self.respawn_queue
+            ],
+        }
+
+    def restore_snapshot(self, data: dict, exact: bool = False, elapsed: float = 0.0) -> None:
+        """Reaplica to_snapshot() sobre os inimigos recém-criados do mapa.
+        exact: o conjunto de inimigos passa a ser o do snapshot (cria os que faltam,
+        remove os que sobram), como ao montar o mapa num worker
+        elapsed: segundos desde o snapshot; descontados dos respawns pendentes
+        (os vencidos revivem já, sem simular o intervalo)"""
+        if exact:
+            listed = {enemy_data.get("enemy_id") for enemy_data in data.get("enemies", [])}
+            for enemy_id in [enemy_id for enemy_id in self.enemies if enemy_id not in listed]:
+                del self.enemies[enemy_id]
+        for enemy_data in data.get("enemies", []):
+            enemy = self.enemies.get(enemy_data.get("enemy_id"))
+            if enemy is None and exact:
+                enemy_class = ENEMY_TYPES.get(enemy_data.get("enemy_type"))
+                if enemy_class is not None:
+                    enemy = enemy_class(enemy_data["enemy_id"], (enemy_data["x"], enemy_data["y"]), self.map_name)
+                    self.enemies[enemy.enemy_id] = enemy
+            if enemy is not None:
+                enemy.restore_state(enemy_data)
+        now = time.time()
+        self.respawn_queue = []
+        for info in data.get("respawn", []):
+            enemy = self.enemies.get(info.get("enemy_id"))
+            if enemy is not None and not enemy.is_alive:
+                self.respawn_queue.append({
+                    "enemy_id": enemy.enemy_id,
+                    "enemy_ref": enemy,
+                    "respawn_time": now + float(info.get("remaining", 0.0)) - elapsed,
+                })
+        # Respawn vencido durante a hibernação: reviver agora
+        self.respawn_queue = [info for info in self.respawn_queue if info["respawn_time"] > now]
+        # Morto sem respawn agendado: reviver agora
+        queued = {info["enemy_id"] for info in self.respawn_queue}
+        for enemy in self.enemies.values():
+            if not enemy.is_alive and enemy.enemy_id not in queued:
+                enemy.revive()
+        self._refresh_enemy_grid()
+        if self.worker is not None:
+            self.worker.restore(self.map_name, data)
+
     def get_enemy(self, enemy_id: str) -> Optional[MultiplayerEnemy]:
         """Retorna uma instância de inimigo"""
         return self.enemies.get(enemy_id)
@@ -399,12 +627,12 @@ class MapInstance:
         """Verifica se o mapa está vazio (sem players)"""
         return len(self.players) == 0
     
-    def should_hibernate(self, hibernate_timeout: float = 300.0) -> bool:
+    def should_hibernate(self, hibernate_timeout: float = DEFAULT_HIBERNATE_TIMEOUT) -> bool:
         """
         Verifica se o mapa deve hibernar (sem atividade por muito tempo)
         hibernate_timeout: tempo em segundos (padrão 5 minutos)
         """
-        return self.is_empty() and (time.time() - self.last_activity > hibernate_timeout)
+        return self.is_empty() and (time.monotonic() - self.last_activity > hibernate_timeout)
     
     def get_status(self) -> dict:
         """Retorna status do mapa para debugging"""
@@ -414,8 +642,10 @@ class MapInstance:
             "enemies_count": len(self.enemies),
             "active": self.active,
             "created_at": self.created_at,
-            "last_activity": self.last_activity,
-            "age_seconds": time.time() - self.created_at
+            "idle_seconds": time.monotonic() - self.last_activity,
+            "age_seconds": time.time() - self.created_at,
+            "sim_hz": self.sim_hz,
+            "send_hz": self.send_hz
         }
 
 
@@ -424,10 +654,18 @@ class MapManager:
     Gerenciador central de todas as instâncias de mapa.
     """
     
-    def __init__(self):
+    def __init__(self, tick_rate: float = DEFAULT_TICK_RATE, worker_pool=None):
         print(f"[MAP_MANAGER] [MAP_MANAGER] Inicializando MapManager...")
+        self.tick_rate = tick_rate  # frequência do servidor (base das frequências por mapa)
+        self.worker_pool = worker_pool  # MapWorkerPool opcional: inimigos de alguns mapas em outros processos
         self.maps: Dict[str, MapInstance] = {}
         self.available_maps = ["Cidade", "Floresta"]  # Mapas disponíveis
+        self.profiler = None  # TickProfiler opcional: tempo de cada mapa por fase
+        self.hibernate_timeout = DEFAULT_HIBERNATE_TIMEOUT
+        # map_name -> (pack_snapshot() do mapa descarregado, time.monotonic() da hibernação)
+        self.hibernated: Dict[str, Tuple[bytes, float]] = {}
+        self.hibernations = 0
+        self.wakeups = 0
         print(f"[MAP_MANAGER] [MAP_MANAGER] MapManager inicializado. Maps dict: {list(self.maps.keys())}")
     
     def get_or_create_map(self, map_name: str) -> MapInstance:
@@ -442,18 +680,31 @@ class MapManager:
         
         if map_name not in self.maps:
             print(f"[MAP_MANAGER] [MAP_MANAGER] Criando nova MapInstance para '{map_name}'...")
-            self.maps[map_name] = MapInstance(map_name)
+            self.maps[map_name] = MapInstance(map_name, self.tick_rate)
             print(f"[SUCCESS] [MAP_MANAGER] MapInstance '{map_name}' criada com sucesso!")
+            self._wake_map(self.maps[map_name])
+            if self.worker_pool is not None and self.worker_pool.attach(self.maps[map_name]):
+                print(f"[MAP_MANAGER] Inimigos de '{map_name}' simulados em processo worker")
         else:
             print(f"[REUSE] [MAP_MANAGER] MapInstance '{map_name}' já existe, retornando existente")
         
         return self.maps[map_name]
     
+    def adopt_map(self, map_instance: MapInstance) -> None:
+        """Instala uma MapInstance montada fora do manager (warm restart) no lugar da atual, sem players"""
+        map_name = map_instance.map_name
+        if map_name in self.maps and self.worker_pool is not None:
+            self.worker_pool.detach(map_name)
+        self.maps[map_name] = map_instance
+        if self.worker_pool is not None and self.worker_pool.attach(map_instance):
+            print(f"[MAP_MANAGER] Inimigos de '{map_name}' simulados em processo worker")
+    
     def get_map(self, map_name: str) -> Optional[MapInstance]:
         """Retorna instância do mapa sem criar"""
         return self.maps.get(map_name)
     
-    def move_player(self, player_id: str, from_map: str, to_map: str, player_name: str, store=None, character_id=None) -> Tuple[Optional[dict], bool]:
+    def move_player(self, player_id: str, from_map: str, to_map: str, player_name: str, store=None,
+                    character: Optional[CharacterRecord] = None) -> Tuple[Optional[dict], bool]:
         """
         Move um player entre mapas.
         Retorna (spawn_position, success)
@@ -466,7 +717,7 @@ class MapManager:
         
         # Adicionar ao mapa destino
         target_map = self.get_or_create_map(to_map)
-        spawn_position = target_map.add_player(player_id, player_name, store, character_id)
+        spawn_position = target_map.add_player(player_id, player_name, store, character)
         
         print(f"[LAUNCH] [MAP_MANAGER] Player {player_name} movido: {from_map} -> {to_map}")
         
@@ -478,44 +729,123 @@ class MapManager:
                 for map_name, map_instance in self.maps.items()}
     
     def cleanup_empty_maps(self):
-        """Remove mapas vazios (hibernação)"""
+        """Hiberna mapas vazios: estado serializado (ver to_snapshot) e MapInstance descarregada"""
         maps_to_remove = []
         
         for map_name, map_instance in self.maps.items():
-            if map_instance.should_hibernate():
+            if map_instance.should_hibernate(self.hibernate_timeout):
                 maps_to_remove.append(map_name)
         
         for map_name in maps_to_remove:
-            print(f"[HIBERNATE] [MAP_MANAGER] Hibernando mapa vazio: {map_name}")
+            blob = pack_snapshot(self.maps[map_name].to_snapshot())
+            if self.worker_pool is not None:
+                self.worker_pool.detach(map_name)
             del self.maps[map_name]
+            self.hibernated[map_name] = (blob, time.monotonic())
+            self.hibernations += 1
+            if self.profiler is not None:
+                self.profiler.forget_map(map_name)
+            print(f"[HIBERNATE] [MAP_MANAGER] Mapa vazio hibernado: {map_name} ({len(blob)} bytes)")
+    
+    def _wake_map(self, map_instance: MapInstance) -> None:
+        """Mapa recém-criado: reaplica o estado da hibernação (se houver), com os
+        respawns avançados pelo tempo hibernado (relógio monotônico, não o do cabeçalho)"""
+        entry = self.hibernated.pop(map_instance.map_name, None)
+        if entry is not None:
+            blob, hibernated_at = entry
+            snapshot = unpack_snapshot(blob)
+            if snapshot is not None:
+                elapsed = max(0.0, time.monotonic() - hibernated_at)
+                map_instance.restore_snapshot(snapshot, elapsed=elapsed)
+                self.wakeups += 1
+                print(f"[HIBERNATE] [MAP_MANAGER] Mapa {map_instance.map_name} restaurado após {elapsed:.0f}s")
+    
+    def snapshot_all_maps(self) -> Dict[str, dict]:
+        """to_snapshot() de todos os mapas, inclusive os hibernados (com os respawns já avançados)"""
+        snapshots = {map_name: map_instance.to_snapshot() for map_name, map_instance in self.maps.items()}
+        now = time.monotonic()
+        for map_name, (blob, hibernated_at) in self.hibernated.items():
+            snapshot = unpack_snapshot(blob)
+            if snapshot is None:
+                continue
+            snapshot.pop("age")
+            elapsed = max(0.0, now - hibernated_at)
+            snapshot["respawn"] = [
+                {**info, "remaining": max(0.0, float(info.get("remaining", 0.0)) - elapsed)}
+                for info in snapshot.get("respawn", [])
+            ]
+            snapshots[map_name] = snapshot
+        return snapshots
+    
+    def get_hibernation_stats(self) -> dict:
+        return {
+            "hibernated": list(self.hibernated),
+            "hibernated_bytes": sum(len(blob) for blob, _ in self.hibernated.values()),
+            "hibernations": self.hibernations,
+            "wakeups": self.wakeups,
+            "simulating": sum(1 for map_instance in self.maps.values() if map_instance.players),
+        }
     
-    def update_all_enemies(self, delta_time: float) -> Dict[str, List[dict]]:
+    def begin_tick(self, tick: int) -> None:
+        """Decide quais mapas simulam neste tick do servidor (ver MapInstance.begin_tick)"""
+        for map_instance in self.maps.values():
+            map_instance.begin_tick(tick)
+    
+    def _simulating_maps(self):
+        return [(map_name, map_instance) for map_name, map_instance in self.maps.items() if map_instance.sim_due]
+    
+    def _run_per_map(self, phase: str, step, maps=None) -> Dict[str, List[dict]]:
+        """Roda step(map_instance) nos mapas que simulam neste tick (ou em `maps`), com o
+        tempo de cada mapa no profiler. Retorna {map_name: resultado} só dos resultados não vazios"""
+        results = {}
+        profiler = self.profiler
+        for map_name, map_instance in (self._simulating_maps() if maps is None else maps):
+            started = time.perf_counter()
+            result = step(map_instance)
+            if profiler is not None:
+                profiler.add_map_time(map_name, phase, time.perf_counter() - started)
+            if result:
+                results[map_name] = result
+        return results
+    
+    async def update_all_enemies(self) -> Dict[str, List[dict]]:
         """
-        Atualiza inimigos em todos os mapas ativos.
+        Atualiza inimigos nos mapas que simulam neste tick (cada um com o seu sim_dt).
+        Mapas com worker: o passo é enviado antes e coletado depois dos mapas locais
+        (worker e servidor simulam ao mesmo tempo); a espera pelos workers não bloqueia
+        o event loop e vai até step_budget do intervalo do tick.
         Retorna {map_name: [enemies_updates]}
         """
-        all_updates = {}
-        
-        for map_name, map_instance in self.maps.items():
-            updates = map_instance.update_enemies(delta_time)
-            if updates:  # Só incluir se houver updates
-                all_updates[map_name] = updates
-        
+        simulating = self._simulating_maps()
+        remote = [map_instance for _, map_instance in simulating if map_instance.worker is not None]
+        pending = self.worker_pool.submit(remote) if self.worker_pool is not None else None
+        local = [(map_name, map_instance) for map_name, map_instance in simulating if map_instance.worker is None]
+        all_updates = self._run_per_map(
+            "enemies", lambda map_instance: map_instance.update_enemies(map_instance.sim_dt), local
+        )
+        if pending:
+            budget = self.worker_pool.step_budget / self.tick_rate
+            for map_name, (updates, elapsed) in (await self.worker_pool.collect(pending, budget)).items():
+                if self.profiler is not None:
+                    self.profiler.add_map_time(map_name, "enemies", elapsed)
+                if updates:
+                    all_updates[map_name] = updates
         return all_updates
     
-    def update_all_players(self, delta_time: float) -> Dict[str, List[dict]]:
+    def resolve_all_combat(self) -> Dict[str, List[dict]]:
+        """Golpes de inimigos nos mapas que simulam neste tick. Retorna {map_name: [eventos]}"""
+        return self._run_per_map("combat", MapInstance.resolve_combat)
+    
+    def process_all_respawns(self) -> Dict[str, List[dict]]:
+        """Mortes e revivals nos mapas que simulam neste tick. Retorna {map_name: [inimigos revividos]}"""
+        return self._run_per_map("respawns", MapInstance.process_respawns)
+    
+    def update_all_players(self) -> Dict[str, List[dict]]:
         """
-        Atualiza players em todos os mapas ativos.
+        Atualiza players nos mapas que simulam neste tick (cada um com o seu sim_dt).
         Retorna {map_name: [players_updates]}
         """
-        all_updates = {}
-        
-        for map_name, map_instance in self.maps.items():
-            updates = map_instance.update_players(delta_time)
-            if updates:  # Só incluir se houver updates
-                all_updates[map_name] = updates
-        
-        return all_updates
+        return self._run_per_map("players", lambda map_instance: map_instance.update_players(map_instance.sim_dt))
     
     def process_player_input(self, player_id: str, input_data: dict) -> bool:
         """
@@ -528,6 +858,18 @@ class MapManager:
                 return True
         return False
     
+    def process_pending_inputs(self, pending: Dict[str, dict]) -> int:
+        """
+        Aplica os inputs acumulados {player_id: entrada} em uma passada pelos mapas.
+        Retorna quantos players foram encontrados.
+        """
+        applied = 0
+        for map_instance in self.maps.values():
+            for player_id in pending.keys() & map_instance.players.keys():
+                if map_instance.apply_pending_input(player_id, pending[player_id]):
+                    applied += 1
+        return applied
+    
     def get_players_in_map(self, map_name: str) -> List[dict]:
         """Retorna players de um mapa específico"""
         if map_name in self.maps:
@@ -15,6 +15,16 @@ STANDARD_LEFT_BOUNDARY = -542.0   # Expandido para dar mais espaço de movimento
 STANDARD_RIGHT_BOUNDARY = 200.0   # Fechado para reservar espaço HUD
 STANDARD_CEILING = -200.0          # Teto padrão
 
+# AREA OF INTEREST - raio (unidades do mundo) em que cada cliente recebe
+# players/inimigos. None = sem filtro (o mapa inteiro cabe na tela)
+DEFAULT_INTEREST_RADIUS = None
+
+# FREQUÊNCIAS POR MAPA - simulação (sim_hz) e envio de snapshots (send_hz).
+# Arredondadas para um divisor da frequência do servidor (maps/tick_scheduler.py).
+# Ex.: "Floresta" sim 60 / send 20; "Cidade" (sem inimigos) sim 30 / send 10.
+DEFAULT_SIM_HZ = 60
+DEFAULT_SEND_HZ = 60
+
 # CONFIGURAÇÕES DE MAPAS
 MAP_CONFIGS = {
     "Cidade": {
@@ -24,7 +34,10 @@ MAP_CONFIGS = {
             "max_x": STANDARD_RIGHT_BOUNDARY,
             "min_y": STANDARD_CEILING,
             "ground_y": 265.0  # Alinhado ao caminho de terra
-        }
+        },
+        "interest_radius": DEFAULT_INTEREST_RADIUS,
+        "sim_hz": DEFAULT_SIM_HZ,
+        "send_hz": DEFAULT_SEND_HZ
     },
     "Floresta": {
         "spawn_position": {"x": -200, "y": 265},
@@ -33,7 +46,10 @@ MAP_CONFIGS = {
             "max_x": STANDARD_RIGHT_BOUNDARY,
             "min_y": STANDARD_CEILING,
             "ground_y": 265.0  # Ground level da floresta (alinhado com cidade)
-        }
+        },
+        "interest_radius": DEFAULT_INTEREST_RADIUS,
+        "sim_hz": DEFAULT_SIM_HZ,
+        "send_hz": DEFAULT_SEND_HZ
     }
 }
 
@@ -51,8 +67,18 @@ def get_map_boundaries(map_name: str) -> dict:
     }
     return MAP_CONFIGS.get(map_name, {}).get("boundaries", default_boundaries)
 
+def get_map_interest_radius(map_name: str):
+    """Retorna o raio de interesse do mapa (None = todos veem tudo)"""
+    return MAP_CONFIGS.get(map_name, {}).get("interest_radius", DEFAULT_INTEREST_RADIUS)
+
+def get_map_tick_rates(map_name: str) -> tuple:
+    """Retorna (sim_hz, send_hz) do mapa"""
+    config = MAP_CONFIGS.get(map_name, {})
+    return config.get("sim_hz", DEFAULT_SIM_HZ), config.get("send_hz", DEFAULT_SEND_HZ)
+
 def add_new_map_config(map_name: str, spawn_pos: dict, ground_level: float, 
-                      custom_boundaries: dict = None) -> None:
+                      custom_boundaries: dict = None, interest_radius: float = None,
+                      sim_hz: float = DEFAULT_SIM_HZ, send_hz: float = DEFAULT_SEND_HZ) -> None:
     """
     Adiciona configuração para um novo mapa seguindo o template padrão
     
@@ -61,6 +87,8 @@ def add_new_map_config(map_name: str, spawn_pos: dict, ground_level: float,
         spawn_pos: {"x": float, "y": float}
         ground_level: Nível Y do chão do mapa
         custom_boundaries: Boundaries customizadas (opcional)
+        interest_radius: Raio de interesse para mapas maiores que a tela (opcional)
+        sim_hz / send_hz: Frequência de simulação e de envio de snapshots do mapa
     """
     if custom_boundaries is None:
         boundaries = {
@@ -77,12 +105,17 @@ def add_new_map_config(map_name: str, spawn_pos: dict, ground_level: float,
     
     MAP_CONFIGS[map_name] = {
         "spawn_position": spawn_pos,
-        "boundaries": boundaries
+        "boundaries": boundaries,
+        "interest_radius": interest_radius,
+        "sim_hz": sim_hz,
+        "send_hz": send_hz
     }
     
     print(f"[MAP_CONFIG] Novo mapa adicionado: {map_name}")
     print(f"  Spawn: {spawn_pos}")
     print(f"  Boundaries: {boundaries}")
+    if interest_radius:
+        print(f"  Interest radius: {interest_radius}")
 
 def validate_map_layout(map_name: str) -> bool:
     """
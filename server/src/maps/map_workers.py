@@ -0,0 +1,348 @@
+import asyncio
+import multiprocessing
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from net.metrics import LatencyHistogram
+
+# Espera máxima pela resposta de um worker antes de considerá-lo travado (segundos)
+DEFAULT_WORKER_TIMEOUT = 2.0
+# Fração do intervalo do tick que a fase enemies espera pelos passos dos workers
+DEFAULT_STEP_BUDGET = 0.5
+
+
+class MapWorkerError(RuntimeError):
+    pass
+
+
+def _step_map(map_instance, dt: float, players_view: Dict[str, dict], commands: List[Tuple[str, int]]):
+    """Um passo dos inimigos de um mapa no worker: dano recebido, IA, golpes e respawns"""
+    started = time.perf_counter()
+    for enemy_id, damage in commands:
+        enemy = map_instance.enemies.get(enemy_id)
+        if enemy is not None and enemy.is_alive:
+            enemy.take_damage(damage)
+    updated = map_instance.update_enemies(dt, players_view)
+    hits = []
+    for enemy in map_instance.enemies.values():
+        player_id = enemy.consume_pending_hit()
+        if player_id:
+            hits.append((enemy.enemy_id, player_id))
+    revived = map_instance.process_respawns()
+    return updated, hits, revived, time.perf_counter() - started
+
+
+def _worker_main(conn) -> None:
+    """Loop do processo worker: mantém os MapInstance dos seus mapas (só inimigos) e responde a cada pedido"""
+    from maps.map_instance import MapInstance
+
+    maps = {}
+    while True:
+        try:
+            op, payload = conn.recv()
+        except (EOFError, OSError):
+            break
+        try:
+            if op == "step":
+                reply = {name: _step_map(maps[name], *args) for name, args in payload.items() if name in maps}
+            elif op == "attach":
+                map_name, tick_rate, snapshot = payload
+                map_instance = MapInstance(map_name, tick_rate)
+                map_instance.restore_snapshot(snapshot, exact=True)
+                maps[map_name] = map_instance
+                reply = len(map_instance.enemies)
+            elif op == "restore":
+                map_name, snapshot = payload
+                maps[map_name].restore_snapshot(snapshot, exact=True)
+                reply = True
+            elif op == "snapshot":
+                reply = maps[payload].to_snapshot()
+            elif op == "detach":
+                reply = maps.pop(payload, None) is not None
+            elif op == "stop":
+                conn.send(("ok", True))
+                break
+            else:
+                raise ValueError(f"Operação desconhecida: {op}")
+            conn.send(("ok", reply))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+class _MapWorker:
+    """Um processo worker e o lado do servidor do seu pipe"""
+
+    __slots__ = ("index", "process", "conn", "maps", "alive", "steps", "errors", "late_steps",
+                 "in_flight", "step_time")
+
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.maps: Dict[str, object] = {}  # map_name -> MapInstance (espelho no servidor)
+        self.alive = True
+        self.steps = 0
+        self.errors = 0
+        self.late_steps = 0  # passos que não responderam dentro do prazo do tick
+        self.in_flight: Optional[float] = None  # perf_counter do envio do passo ainda sem resposta
+        self.step_time = LatencyHistogram()  # ida e volta de um passo (envio até a resposta)
+
+
+class MapWorkerPool:
+    """
+    Simulação dos inimigos em processos separados, um processo por grupo de mapas.
+
+    O servidor (gateway) continua dono dos websockets, dos players (física, inputs,
+    persistência) e de um espelho dos inimigos de cada mapa, usado por interest,
+    snapshots, deltas e combate. A cada passo de simulação o gateway envia pelo
+    pipe a posição dos players e o dano recebido pelos inimigos desde o último
+    passo; o worker roda IA, golpes e respawns e devolve os dados de sync dos
+    inimigos alterados, os golpes concluídos e os revividos, que o gateway aplica
+    no espelho. Os pedidos saem para todos os workers antes de esperar qualquer
+    resposta, então grupos diferentes simulam em paralelo (inclusive com os mapas
+    locais, simulados enquanto isso).
+
+    A espera pelas respostas não bloqueia o event loop (add_reader no pipe) e tem
+    prazo de `step_budget` do intervalo do tick. Cada resposta é aplicada no
+    espelho de uma vez, sem await no meio: nenhum handler vê um passo aplicado
+    pela metade. Um worker que perde o prazo fica com o passo em andamento, os
+    mapas dele seguem com o espelho como está neste tick e a resposta atrasada é
+    aplicada no tick em que chegar. Um worker que falha ou passa `timeout` sem
+    responder é descartado e os mapas dele voltam a simular no processo do
+    servidor a partir do espelho.
+    """
+
+    def __init__(self, groups: Iterable[Iterable[str]], timeout: float = DEFAULT_WORKER_TIMEOUT,
+                 step_budget: float = DEFAULT_STEP_BUDGET):
+        self.groups = [list(group) for group in groups if group]
+        self.timeout = timeout
+        self.step_budget = step_budget
+        self.assignment: Dict[str, int] = {}
+        for index, group in enumerate(self.groups):
+            for map_name in group:
+                if map_name in self.assignment:
+                    raise ValueError(f"Mapa {map_name} em mais de um grupo de workers")
+                self.assignment[map_name] = index
+        self.workers: List[_MapWorker] = []
+        self.fallbacks = 0  # mapas que voltaram para o processo do servidor
+
+    def start(self) -> None:
+        # spawn (não fork): o filho não herda sockets nem o event loop do servidor
+        context = multiprocessing.get_context("spawn")
+        for index in range(len(self.groups)):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_main, args=(child_conn,),
+                                      name=f"map-worker-{index}", daemon=True)
+            process.start()
+            child_conn.close()
+            self.workers.append(_MapWorker(index, process, parent_conn))
+
+    def hosts(self, map_name: str) -> bool:
+        index = self.assignment.get(map_name)
+        return index is not None and index < len(self.workers) and self.workers[index].alive
+
+    # ======= PIPE =======
+    def _call(self, worker: _MapWorker, op: str, payload):
+        """Pedido síncrono (attach, snapshot, ...): raro, fora do caminho do tick"""
+        if worker.in_flight is not None:
+            # A resposta do passo em andamento vem antes no pipe: aplicar agora
+            self._finish_step(worker, self._receive(worker, "step"))
+        worker.conn.send((op, payload))
+        return self._receive(worker, op)
+
+    def _receive(self, worker: _MapWorker, op: str):
+        if not worker.conn.poll(self.timeout):
+            raise MapWorkerError(f"worker {worker.index} sem resposta para {op} em {self.timeout}s")
+        status, reply = worker.conn.recv()
+        if status != "ok":
+            raise MapWorkerError(f"worker {worker.index} falhou em {op}: {reply}")
+        return reply
+
+    def _fail(self, worker: _MapWorker, error: Exception) -> None:
+        """Descarta o worker: os mapas dele passam a simular localmente a partir do espelho"""
+        print(f"[MAP_WORKER][ERROR] {error}; mapas {list(worker.maps)} voltam para o servidor")
+        worker.alive = False
+        worker.errors += 1
+        worker.in_flight = None
+        for map_instance in worker.maps.values():
+            map_instance.worker = None
+        self.fallbacks += len(worker.maps)
+        worker.maps.clear()
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
+        if worker.process.is_alive():
+            worker.process.terminate()
+
+    # ======= MAPAS =======
+    def attach(self, map_instance) -> bool:
+        """Passa a simulação dos inimigos do mapa para o worker do seu grupo (estado atual do espelho)"""
+        if not self.hosts(map_instance.map_name):
+            return False
+        worker = self.workers[self.assignment[map_instance.map_name]]
+        try:
+            self._call(worker, "attach", (map_instance.map_name, map_instance.tick_rate, map_instance.to_snapshot()))
+        except (MapWorkerError, OSError, EOFError) as e:
+            self._fail(worker, e)
+            return False
+        worker.maps[map_instance.map_name] = map_instance
+        map_instance.worker = self
+        return True
+
+    def detach(self, map_name: str) -> None:
+        index = self.assignment.get(map_name)
+        worker = self.workers[index] if index is not None and index < len(self.workers) else None
+        if worker is None or map_name not in worker.maps:
+            return
+        worker.maps.pop(map_name).worker = None
+        try:
+            self._call(worker, "detach", map_name)
+        except (MapWorkerError, OSError, EOFError) as e:
+            self._fail(worker, e)
+
+    def _worker_of(self, map_name: str) -> Optional[_MapWorker]:
+        index = self.assignment.get(map_name)
+        if index is None or index >= len(self.workers):
+            return None
+        worker = self.workers[index]
+        return worker if worker.alive and map_name in worker.maps else None
+
+    def fetch_snapshot(self, map_name: str) -> Optional[dict]:
+        """Estado completo do mapa no worker (inimigos + fila de respawn); None se indisponível"""
+        worker = self._worker_of(map_name)
+        if worker is None:
+            return None
+        try:
+            return self._call(worker, "snapshot", map_name)
+        except (MapWorkerError, OSError, EOFError) as e:
+            self._fail(worker, e)
+            return None
+
+    def restore(self, map_name: str, snapshot: dict) -> None:
+        worker = self._worker_of(map_name)
+        if worker is None:
+            return
+        try:
+            self._call(worker, "restore", (map_name, snapshot))
+        except (MapWorkerError, OSError, EOFError) as e:
+            self._fail(worker, e)
+
+    # ======= PASSO =======
+    def submit(self, map_instances) -> list:
+        """Envia o passo de cada mapa ao seu worker (sem esperar). Retorna os workers que collect() espera
+        (inclusive os que ainda não responderam o passo anterior; esses não recebem passo novo)"""
+        payloads: Dict[int, dict] = {}
+        for map_instance in map_instances:
+            worker = self._worker_of(map_instance.map_name)
+            if worker is not None and worker.in_flight is None:
+                payloads.setdefault(worker.index, {})[map_instance.map_name] = map_instance.take_worker_request()
+        pending = []
+        now = time.perf_counter()
+        for worker in self.workers:
+            if not worker.alive:
+                continue
+            if worker.in_flight is not None:
+                if now - worker.in_flight > self.timeout:
+                    self._fail(worker, MapWorkerError(f"worker {worker.index} sem resposta para step em {self.timeout}s"))
+                else:
+                    pending.append(worker)
+            elif worker.index in payloads:
+                try:
+                    worker.conn.send(("step", payloads[worker.index]))
+                except OSError as e:
+                    self._fail(worker, e)
+                    continue
+                worker.in_flight = now
+                pending.append(worker)
+        return pending
+
+    async def _wait_reply(self, worker: _MapWorker, timeout: float) -> bool:
+        """Espera (sem bloquear o event loop) até haver resposta no pipe ou acabar o prazo"""
+        if worker.conn.poll(0):
+            return True
+        if timeout <= 0:
+            return False
+        loop = asyncio.get_running_loop()
+        fd = worker.conn.fileno()
+        ready = loop.create_future()
+        try:
+            loop.add_reader(fd, lambda: ready.done() or ready.set_result(True))
+        except NotImplementedError:
+            # Event loop sem add_reader (ProactorEventLoop no Windows): poll numa thread
+            return await loop.run_in_executor(None, worker.conn.poll, timeout)
+        try:
+            await asyncio.wait_for(ready, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(fd)
+
+    def _finish_step(self, worker: _MapWorker, reply: dict) -> Dict[str, Tuple[List[dict], float]]:
+        """Aplica a resposta de um passo no espelho dos mapas (de uma vez, sem await)"""
+        worker.steps += 1
+        worker.step_time.record(time.perf_counter() - worker.in_flight)
+        worker.in_flight = None
+        results = {}
+        for map_name, (updated, hits, revived, elapsed) in reply.items():
+            map_instance = worker.maps.get(map_name)
+            if map_instance is not None:
+                results[map_name] = (map_instance.apply_worker_step(updated, hits, revived), elapsed)
+        return results
+
+    async def collect(self, pending: list, timeout: float) -> Dict[str, Tuple[List[dict], float]]:
+        """Espera as respostas até `timeout` segundos a partir de agora e aplica cada uma no espelho.
+        Quem perder o prazo continua em andamento (aplicado num tick seguinte).
+        Retorna {map_name: (inimigos alterados, segundos de simulação no worker)}"""
+        deadline = time.monotonic() + timeout
+        results = {}
+        for worker in pending:
+            # Pode ter sido descartado ou drenado por _call enquanto esperávamos outro worker
+            if not worker.alive or worker.in_flight is None:
+                continue
+            if not await self._wait_reply(worker, deadline - time.monotonic()):
+                worker.late_steps += 1
+                continue
+            if not worker.alive or worker.in_flight is None:
+                continue
+            try:
+                reply = self._receive(worker, "step")
+            except (MapWorkerError, OSError, EOFError) as e:
+                self._fail(worker, e)
+                continue
+            results.update(self._finish_step(worker, reply))
+        return results
+
+    def close(self) -> None:
+        for worker in self.workers:
+            if worker.alive:
+                try:
+                    self._call(worker, "stop", None)
+                except (MapWorkerError, OSError, EOFError):
+                    pass
+                worker.alive = False
+                for map_instance in worker.maps.values():
+                    map_instance.worker = None
+                worker.conn.close()
+            worker.process.join(timeout=self.timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": len(self.workers),
+            "fallbacks": self.fallbacks,
+            "per_worker": [
+                {
+                    "maps": list(worker.maps),
+                    "alive": worker.alive,
+                    "steps": worker.steps,
+                    "errors": worker.errors,
+                    "late_steps": worker.late_steps,
+                    "step_ms": worker.step_time.summary(),
+                }
+                for worker in self.workers
+            ],
+        }
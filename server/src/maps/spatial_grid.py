@@ -0,0 +1,65 @@
+import math
+from typing import Dict, Set, Tuple, Hashable
+
+
+class SpatialGrid:
+    """
+    Grade uniforme para consultas de vizinhança (area of interest).
+    Cada entidade fica em exatamente uma célula; consultar um raio
+    visita só as células que o círculo cobre.
+    """
+
+    def __init__(self, cell_size: float = 256.0):
+        self.cell_size = float(cell_size)
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._entities: Dict[Hashable, Tuple[Tuple[int, int], float, float]] = {}
+
+    def _cell_of(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+
+    def update(self, entity_id: Hashable, x: float, y: float) -> None:
+        """Insere ou move uma entidade"""
+        cell = self._cell_of(x, y)
+        previous = self._entities.get(entity_id)
+        if previous is not None and previous[0] != cell:
+            self._discard_from_cell(entity_id, previous[0])
+        if previous is None or previous[0] != cell:
+            self._cells.setdefault(cell, set()).add(entity_id)
+        self._entities[entity_id] = (cell, x, y)
+
+    def remove(self, entity_id: Hashable) -> None:
+        previous = self._entities.pop(entity_id, None)
+        if previous is not None:
+            self._discard_from_cell(entity_id, previous[0])
+
+    def _discard_from_cell(self, entity_id: Hashable, cell: Tuple[int, int]) -> None:
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(entity_id)
+            if not members:
+                del self._cells[cell]
+
+    def query(self, x: float, y: float, radius: float) -> Set[Hashable]:
+        """Entidades a até `radius` de (x, y)"""
+        min_cx, min_cy = self._cell_of(x - radius, y - radius)
+        max_cx, max_cy = self._cell_of(x + radius, y + radius)
+        radius_sq = radius * radius
+        result = set()
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for entity_id in self._cells.get((cx, cy), ()):
+                    _, ex, ey = self._entities[entity_id]
+                    dx = ex - x
+                    dy = ey - y
+                    if dx * dx + dy * dy <= radius_sq:
+                        result.add(entity_id)
+        return result
+
+    def ids(self) -> Set[Hashable]:
+        return set(self._entities)
+
+    def __contains__(self, entity_id: Hashable) -> bool:
+        return entity_id in self._entities
+
+    def __len__(self) -> int:
+        return len(self._entities)
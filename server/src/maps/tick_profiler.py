@@ -0,0 +1,108 @@
+import json
+import os
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from net.metrics import LatencyHistogram, RollingHistogram
+
+# Janela dos percentis "recentes" (segundos) e em quantas fatias ela gira
+DEFAULT_PROFILE_WINDOW = 60.0
+DEFAULT_PROFILE_SLICES = 6
+
+
+class TickProfiler:
+    """
+    Orçamento do tick: quanto do intervalo 1/tick_rate cada fase e cada mapa consomem.
+
+    - Por tick: tempo total (janela móvel e desde o início) e overruns (tick que
+      levou mais que o intervalo: a simulação está no limite de CPU, não da rede).
+    - Por fase (inputs, players, ..., send): tempo de parede na janela móvel.
+    - Por mapa e fase: quem chama add_map_time soma o tempo do mapa no tick
+      atual; no fim do tick a soma vira uma amostra (um mapa = uma amostra por tick).
+
+    O tempo de envio aqui é só o de montar/enfileirar as mensagens; a escrita nos
+    sockets corre nas tarefas das filas de saída (métricas em "outbound").
+    """
+
+    def __init__(self, tick_rate: float, phases: Iterable[str],
+                 window: float = DEFAULT_PROFILE_WINDOW, slices: int = DEFAULT_PROFILE_SLICES):
+        self.target_hz = tick_rate
+        self.budget = 1.0 / tick_rate
+        self.window = window
+        self.slices = slices
+        self.tick_time = RollingHistogram(window, slices)
+        self.tick_time_total = LatencyHistogram()
+        self.phase_time: Dict[str, RollingHistogram] = {name: RollingHistogram(window, slices) for name in phases}
+        self.map_time: Dict[str, Dict[str, RollingHistogram]] = {}
+        self._map_pending: Dict[Tuple[str, str], float] = {}
+        self.overruns = 0
+        self.worst_overrun = 0.0  # segundos além do orçamento no pior tick
+        self.started_at = time.time()
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        self.phase_time[phase].record(seconds)
+
+    def add_map_time(self, map_name: str, phase: str, seconds: float) -> None:
+        key = (map_name, phase)
+        self._map_pending[key] = self._map_pending.get(key, 0.0) + seconds
+
+    def end_tick(self, seconds: float) -> None:
+        """Fecha o tick: tempo total, overrun e as somas por mapa"""
+        now = time.monotonic()
+        self.tick_time.record(seconds, now)
+        self.tick_time_total.record(seconds)
+        if seconds > self.budget:
+            self.overruns += 1
+            self.worst_overrun = max(self.worst_overrun, seconds - self.budget)
+        if self._map_pending:
+            for (map_name, phase), total in self._map_pending.items():
+                phases = self.map_time.get(map_name)
+                if phases is None:
+                    phases = self.map_time[map_name] = {}
+                histogram = phases.get(phase)
+                if histogram is None:
+                    histogram = phases[phase] = RollingHistogram(self.window, self.slices)
+                histogram.record(total, now)
+            self._map_pending.clear()
+
+    def forget_map(self, map_name: str) -> None:
+        """Mapa removido: descarta as séries dele"""
+        self.map_time.pop(map_name, None)
+
+    def recent_rate(self) -> float:
+        """Ticks por segundo dentro da janela móvel"""
+        span = self.tick_time.span()
+        return self.tick_time.merged().count / span if span > 0 else 0.0
+
+    def get_stats(self) -> dict:
+        recent = self.tick_time.merged()
+        span = self.tick_time.span()
+        return {
+            "window_s": self.window,
+            "budget_ms": round(self.budget * 1000.0, 3),
+            "recent_hz": round(recent.count / span, 2) if span > 0 else 0.0,
+            "overruns": self.overruns,
+            "worst_overrun_ms": round(self.worst_overrun * 1000.0, 3),
+            "tick_ms": recent.summary(),
+            "tick_ms_total": self.tick_time_total.summary(),
+            # Fração do orçamento usada em média na janela (1.0 = sem folga)
+            "load": round(recent.mean / self.budget, 3),
+            "phases_ms": {name: histogram.summary() for name, histogram in self.phase_time.items()
+                          if histogram.merged().count},
+            "maps_ms": {map_name: {phase: histogram.summary() for phase, histogram in phases.items()}
+                        for map_name, phases in self.map_time.items()},
+        }
+
+    def dump(self, path: str, extra: Optional[dict] = None) -> None:
+        """Grava as estatísticas em JSON (escrita atômica: arquivo temporário + rename)"""
+        report = {
+            "started_at": self.started_at,
+            "dumped_at": time.time(),
+            **(extra or {}),
+            "profile": self.get_stats(),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -0,0 +1,117 @@
+import asyncio
+import inspect
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .tick_profiler import TickProfiler
+
+# Frequência da simulação (ticks por segundo)
+DEFAULT_TICK_RATE = 60
+# Máximo de ticks executados em sequência para alcançar o cronograma; o atraso
+# além disso é descartado (o mundo "pula" esses frames em vez de acelerar)
+DEFAULT_MAX_CATCH_UP = 5
+
+# Fases do tick, sempre nesta ordem
+TICK_PHASES = ("inputs", "players", "enemies", "combat", "respawns", "encode", "send", "housekeeping")
+# Fases de rede: num catch-up rodam só no último tick da sequência (um envio com o estado mais novo)
+OUTPUT_PHASES = ("encode", "send")
+
+
+class TickScheduler:
+    """
+    Relógio autoritativo da simulação em passo fixo.
+
+    O tick N está agendado para start + N * dt (tempo monotônico); o sleep é até o
+    próximo horário do cronograma, não "dt depois do fim do trabalho", então a taxa
+    real não cai com a carga. Se o loop atrasar, executa os ticks devidos em
+    sequência (no máximo max_catch_up; o resto é contado em `skipped` e descartado).
+
+    Cada tick roda as fases registradas na ordem de TICK_PHASES; callbacks recebem
+    (tick, dt) e podem ser corrotinas. Os tempos de tick e de cada fase vão para o
+    `profiler` (TickProfiler), que também recebe os tempos por mapa das fases.
+    """
+
+    def __init__(self, tick_rate: float = DEFAULT_TICK_RATE, max_catch_up: int = DEFAULT_MAX_CATCH_UP,
+                 phases: Tuple[str, ...] = TICK_PHASES):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_catch_up = max(1, max_catch_up)
+        self.phase_names = phases
+        self._phases: Dict[str, List[Callable]] = {name: [] for name in phases}
+        self.tick = 0
+
+        # Métricas
+        self.profiler = TickProfiler(tick_rate, phases)
+        self.late_ticks = 0     # ticks executados como catch-up (atrasados)
+        self.skipped = 0        # ticks descartados por exceder max_catch_up
+        self.errors = 0
+        self.started_at: Optional[float] = None
+
+    def add_phase(self, name: str, callback: Callable) -> None:
+        if name not in self._phases:
+            raise ValueError(f"Fase desconhecida: {name}")
+        self._phases[name].append(callback)
+
+    async def run_tick(self, output: bool = True) -> None:
+        """Executa um tick completo (sem as fases de rede se output=False)"""
+        self.tick += 1
+        tick_started = time.perf_counter()
+        for name in self.phase_names:
+            callbacks = self._phases[name]
+            if not callbacks or (not output and name in OUTPUT_PHASES):
+                continue
+            started = time.perf_counter()
+            for callback in callbacks:
+                try:
+                    result = callback(self.tick, self.dt)
+                    if inspect.isawaitable(result):
+                        await result
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[TICK][ERROR] Fase {name} (tick {self.tick}): {e}")
+            self.profiler.record_phase(name, time.perf_counter() - started)
+        self.profiler.end_tick(time.perf_counter() - tick_started)
+
+    async def run(self, is_running: Callable[[], bool]) -> None:
+        """Loop até is_running() ficar falso"""
+        self.started_at = time.monotonic()
+        next_tick = self.started_at
+        while is_running():
+            now = time.monotonic()
+            if now < next_tick:
+                await asyncio.sleep(next_tick - now)
+                continue
+
+            due = int((now - next_tick) / self.dt) + 1
+            steps = min(due, self.max_catch_up)
+            if due > steps:
+                # Atraso grande (ex.: GC, disco): descartar em vez de rodar em rajada
+                self.skipped += due - steps
+                next_tick += (due - steps) * self.dt
+            self.late_ticks += steps - 1
+            for step in range(steps):
+                await self.run_tick(output=step == steps - 1)
+                next_tick += self.dt
+            # Ceder o loop mesmo quando atrasado (clientes/handlers não podem esperar o catch-up)
+            await asyncio.sleep(0)
+
+    @property
+    def achieved_rate(self) -> float:
+        """Ticks por segundo desde o início (inclui descartados como não executados)"""
+        if self.started_at is None:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.tick / elapsed if elapsed > 0 else 0.0
+
+    def get_stats(self) -> dict:
+        return {
+            "tick": self.tick,
+            "target_hz": self.tick_rate,
+            "achieved_hz": round(self.achieved_rate, 2),
+            "late_ticks": self.late_ticks,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            **self.profiler.get_stats(),
+        }
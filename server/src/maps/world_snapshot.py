@@ -0,0 +1,85 @@
+import json
+import os
+import struct
+import time
+import zlib
+from typing import Optional, Dict, Any
+
+# Arquivo: cabeçalho fixo + JSON compactado com zlib
+#   magic(6s) version(H) created_at(d) crc32(I) payload_len(I)
+SNAPSHOT_MAGIC = b"ALLYWS"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<6sHdII")
+
+# Snapshot mais velho que isso é ignorado no startup (o mundo recomeça do zero)
+DEFAULT_SNAPSHOT_MAX_AGE = 300.0
+# Permissão do arquivo do snapshot (contém o segredo HMAC dos tokens de retomada)
+SNAPSHOT_FILE_MODE = 0o600
+
+
+def pack_snapshot(data: Dict[str, Any]) -> bytes:
+    """Cabeçalho + JSON compactado (o formato do arquivo, também usado em memória pelos mapas hibernados)"""
+    payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 6)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, time.time(), zlib.crc32(payload), len(payload))
+    return header + payload
+
+
+def unpack_snapshot(data: bytes, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Decodifica pack_snapshot(). Retorna None se está corrompido, é de outra versão
+    ou passou de max_age segundos (None = sem limite, nem checa a idade). A idade
+    (relógio de parede, pode ser negativa sem max_age) vai em ["age"].
+    """
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, created_at, crc, length = _HEADER.unpack_from(data)
+    payload = data[_HEADER.size:_HEADER.size + length]
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or len(payload) != length:
+        return None
+    if zlib.crc32(payload) != crc:
+        return None
+    age = time.time() - created_at
+    if max_age is not None:
+        if age < 0:
+            # Relógio voltou desde a gravação: idade desconhecida
+            print(f"[SNAPSHOT] Snapshot ignorado (criado {-age:.0f}s no futuro)")
+            return None
+        if age > max_age:
+            print(f"[SNAPSHOT] Snapshot ignorado (idade {age:.0f}s > {max_age:.0f}s)")
+            return None
+    try:
+        snapshot = json.loads(zlib.decompress(payload).decode("utf-8"))
+    except (zlib.error, ValueError):
+        return None
+    snapshot["age"] = age
+    return snapshot
+
+
+def write_world_snapshot(path: str, world: Dict[str, Any]) -> int:
+    """Grava o snapshot de forma atômica (arquivo temporário + fsync + rename). Retorna o tamanho em bytes.
+    O arquivo leva o segredo dos tokens de retomada: só o dono do processo lê (0600)"""
+    data = pack_snapshot(world)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), SNAPSHOT_FILE_MODE)
+    # O modo do os.open só vale na criação: um .tmp que sobrou de antes pode ter outro
+    os.chmod(tmp_path, SNAPSHOT_FILE_MODE)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def read_world_snapshot(path: str, max_age: float = DEFAULT_SNAPSHOT_MAX_AGE) -> Optional[Dict[str, Any]]:
+    """
+    Lê um snapshot válido e recente. Retorna None se não existe, está corrompido,
+    é de outra versão ou passou de max_age segundos.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return unpack_snapshot(data, max_age)
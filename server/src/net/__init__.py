@@ -0,0 +1,17 @@
+"""
+Camada de rede do servidor: negociação de protocolo e codecs de mensagens
+"""
+
+from .protocol import PROTOCOL_VERSION, ENCODING_JSON, ENCODING_BINARY, negotiate
+from .snapshot_codec import SNAPSHOT_TYPES, encode_snapshot, decode_snapshot
+from .subscriptions import MapSubscriptions
+from .outbound import OutboundMessage, OutboundQueue
+from .dispatcher import MessageDispatcher
+from .metrics import LatencyHistogram
+
+__all__ = [
+    'PROTOCOL_VERSION', 'ENCODING_JSON', 'ENCODING_BINARY', 'negotiate',
+    'SNAPSHOT_TYPES', 'encode_snapshot', 'decode_snapshot',
+    'MapSubscriptions', 'OutboundMessage', 'OutboundQueue',
+    'MessageDispatcher', 'LatencyHistogram',
+]
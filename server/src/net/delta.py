@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Quantos ticks de histórico manter por mapa (~1s a 60 Hz)
+DEFAULT_HISTORY_SIZE = 64
+# Intervalo (em ticks) entre keyframes completos para cada cliente
+KEYFRAME_INTERVAL = 120
+
+
+def diff_record(baseline: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Campos de current que diferem do baseline (todos, se não há baseline)"""
+    if baseline is None:
+        return dict(current)
+    return {key: value for key, value in current.items() if baseline.get(key) != value}
+
+
+class SnapshotHistory:
+    """
+    Histórico curto de snapshots completos de um mapa, indexado por tick.
+    Cada cliente recebe apenas o que mudou desde o snapshot que ele confirmou
+    (snapshot_ack), ou um keyframe completo quando o baseline não existe mais.
+    """
+
+    def __init__(self, size: int = DEFAULT_HISTORY_SIZE):
+        self.size = size
+        self._snapshots: "OrderedDict[int, Dict[str, Dict[str, dict]]]" = OrderedDict()
+
+    def record(self, tick: int, players: Dict[str, dict], enemies: Dict[str, dict]) -> None:
+        self._snapshots[tick] = {"players": players, "enemies": enemies}
+        while len(self._snapshots) > self.size:
+            self._snapshots.popitem(last=False)
+
+    def has(self, tick: Optional[int]) -> bool:
+        return tick is not None and tick in self._snapshots
+
+    @property
+    def latest_tick(self) -> Optional[int]:
+        if not self._snapshots:
+            return None
+        return next(reversed(self._snapshots))
+
+    def build_delta(self, tick: int, baseline_tick: Optional[int],
+                    visible: Optional[Dict[str, Dict[str, int]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Monta a mensagem snapshot_delta do tick contra baseline_tick.
+        baseline_tick None (ou fora do histórico) = keyframe completo.
+        visible ({"players"/"enemies": {entity_id: tick de entrada}}) restringe o delta
+        à área de interesse do cliente; entidades que entraram depois do baseline
+        vão completas.
+        Retorna None se não há nada a enviar.
+        """
+        current = self._snapshots.get(tick)
+        if current is None:
+            return None
+        baseline = self._snapshots.get(baseline_tick) if baseline_tick is not None else None
+        keyframe = baseline is None
+
+        message: Dict[str, Any] = {
+            "type": "snapshot_delta",
+            "tick": tick,
+            "baseline": None if keyframe else baseline_tick,
+            "keyframe": keyframe,
+        }
+        has_changes = keyframe
+        for kind in ("players", "enemies"):
+            current_records = current[kind]
+            base_records = {} if keyframe else baseline[kind]
+            entered = visible[kind] if visible is not None else None
+            changed = {}
+            for entity_id, record in current_records.items():
+                base_record = base_records.get(entity_id)
+                if entered is not None:
+                    if entity_id not in entered:
+                        continue
+                    if not keyframe and entered[entity_id] > baseline_tick:
+                        base_record = None
+                fields = diff_record(base_record, record)
+                if fields:
+                    changed[entity_id] = fields
+            removed = [entity_id for entity_id in base_records if entity_id not in current_records]
+            message[kind] = changed
+            message[f"removed_{kind}"] = removed
+            if changed or removed:
+                has_changes = True
+
+        return message if has_changes else None
@@ -0,0 +1,116 @@
+import inspect
+import time
+from typing import Dict, Any, Callable, Optional
+
+from .metrics import LatencyHistogram
+
+
+class MessageStats:
+    """Contadores de um tipo de mensagem recebida"""
+
+    __slots__ = ("count", "bytes", "invalid", "errors", "latency")
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.invalid = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self) -> dict:
+        latency = self.latency.summary()
+        return {
+            "count": self.count,
+            "bytes": self.bytes,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "p50_ms": latency["p50"],
+            "p99_ms": latency["p99"],
+            "max_ms": latency["max"],
+            "total_ms": round(self.latency.total * 1000.0, 3),
+        }
+
+
+class MessageDispatcher:
+    """
+    Tabela de handlers por tipo de mensagem.
+    Cada rota pode declarar campos obrigatórios ({campo: tipo}); mensagens que não
+    batem com o esquema são contadas e descartadas sem chegar ao handler.
+    Mede quantidade, bytes e tempo de processamento por tipo.
+    """
+
+    UNKNOWN = "<unknown>"
+
+    def __init__(self):
+        self._routes: Dict[str, tuple] = {}
+        self.stats: Dict[str, MessageStats] = {}
+
+    def register(self, message_type: str, handler: Callable,
+                 required: Optional[Dict[str, Any]] = None) -> None:
+        """handler(websocket, data) - síncrono ou corrotina"""
+        self._routes[message_type] = (handler, dict(required or {}))
+        self.stats.setdefault(message_type, MessageStats())
+
+    def handles(self, message_type: str) -> bool:
+        return message_type in self._routes
+
+    @property
+    def message_types(self):
+        """Tipos registrados (view viva: inclui rotas registradas depois)"""
+        return self._routes.keys()
+
+    @staticmethod
+    def validate(data: Dict[str, Any], required: Dict[str, Any]) -> Optional[str]:
+        """Retorna a descrição do problema ou None se a mensagem é válida"""
+        for field, expected in required.items():
+            if field not in data:
+                return f"campo obrigatório ausente: {field}"
+            if expected is not None and not isinstance(data[field], expected):
+                return f"campo {field} com tipo inválido: {type(data[field]).__name__}"
+        return None
+
+    async def dispatch(self, websocket, data: Dict[str, Any], size: int = 0) -> bool:
+        """
+        Encaminha a mensagem ao handler do seu tipo.
+        Retorna False para tipos desconhecidos ou mensagens inválidas.
+        Exceções do handler são contadas e propagadas.
+        """
+        message_type = data.get("type")
+        route = self._routes.get(message_type)
+        if route is None:
+            stats = self.stats.setdefault(self.UNKNOWN, MessageStats())
+            stats.count += 1
+            stats.bytes += size
+            return False
+
+        handler, required = route
+        stats = self.stats[message_type]
+        stats.count += 1
+        stats.bytes += size
+        if required and self.validate(data, required) is not None:
+            stats.invalid += 1
+            return False
+
+        started = time.perf_counter()
+        try:
+            result = handler(websocket, data)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.latency.record(time.perf_counter() - started)
+        return True
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Estatísticas por tipo (apenas tipos que já receberam mensagens)"""
+        return {
+            message_type: stats.to_dict()
+            for message_type, stats in self.stats.items()
+            if stats.count
+        }
+
+    def reset_stats(self) -> None:
+        for message_type in self.stats:
+            self.stats[message_type] = MessageStats()
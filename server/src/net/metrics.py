@@ -0,0 +1,133 @@
+import bisect
+import time
+from typing import List, Optional
+
+# Limites superiores dos buckets em segundos: ~1 µs até ~17 s, razão 1.25
+# (erro relativo máximo de 25% em qualquer percentil)
+_BUCKET_BOUNDS: List[float] = []
+_bound = 1e-6
+while _bound < 17.0:
+    _BUCKET_BOUNDS.append(_bound)
+    _bound *= 1.25
+_BUCKET_BOUNDS.append(float("inf"))
+
+
+class LatencyHistogram:
+    """
+    Histograma de durações com buckets logarítmicos fixos.
+    Registrar é O(log n) e não guarda amostras; percentis retornam
+    o limite superior do bucket (ou o máximo observado).
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * len(_BUCKET_BOUNDS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Percentil p (0-100) em segundos"""
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(self.count * p / 100.0)))
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(_BUCKET_BOUNDS[i], self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Soma as amostras de outro histograma neste"""
+        for i, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                self.counts[i] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+
+    def reset(self) -> None:
+        self.counts = [0] * len(_BUCKET_BOUNDS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def summary(self, scale: float = 1000.0) -> dict:
+        """Resumo em milissegundos (por padrão)"""
+        return {
+            "count": self.count,
+            "mean": round(self.mean * scale, 3),
+            "p50": round(self.percentile(50) * scale, 3),
+            "p95": round(self.percentile(95) * scale, 3),
+            "p99": round(self.percentile(99) * scale, 3),
+            "max": round(self.max * scale, 3),
+        }
+
+
+class RollingHistogram:
+    """
+    Histograma das amostras dos últimos `window` segundos: um anel de `slices`
+    LatencyHistogram, cada um cobrindo window/slices segundos. Ao girar, a fatia
+    mais antiga é zerada, então a janela efetiva varia entre window*(slices-1)/slices
+    e window. As consultas somam as fatias (não guarda amostras individuais).
+    """
+
+    __slots__ = ("window", "slice_seconds", "_slices", "_current", "_slice_started", "_started")
+
+    def __init__(self, window: float = 60.0, slices: int = 6):
+        self.window = window
+        self.slice_seconds = window / max(1, slices)
+        self._slices = [LatencyHistogram() for _ in range(max(1, slices))]
+        self._current = 0
+        self._slice_started = time.monotonic()
+        self._started: Optional[float] = None  # primeira amostra (a janela começa nela)
+
+    def _rotate(self, now: float) -> None:
+        elapsed = now - self._slice_started
+        if elapsed < self.slice_seconds:
+            return
+        steps = min(len(self._slices), int(elapsed / self.slice_seconds))
+        for _ in range(steps):
+            self._current = (self._current + 1) % len(self._slices)
+            self._slices[self._current].reset()
+        self._slice_started += int(elapsed / self.slice_seconds) * self.slice_seconds
+
+    def record(self, seconds: float, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        if self._started is None:
+            self._started = self._slice_started = now
+        self._rotate(now)
+        self._slices[self._current].record(seconds)
+
+    def merged(self) -> LatencyHistogram:
+        self._rotate(time.monotonic())
+        histogram = LatencyHistogram()
+        for window_slice in self._slices:
+            histogram.merge(window_slice)
+        return histogram
+
+    def span(self) -> float:
+        """Segundos cobertos pelas fatias atuais (para taxas: count / span)"""
+        if self._started is None:
+            return 0.0
+        now = time.monotonic()
+        self._rotate(now)
+        covered = (len(self._slices) - 1) * self.slice_seconds + (now - self._slice_started)
+        return min(covered, now - self._started)
+
+    def summary(self, scale: float = 1000.0) -> dict:
+        return self.merged().summary(scale)
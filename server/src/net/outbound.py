@@ -0,0 +1,287 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable
+
+import websockets
+
+from .protocol import ENCODING_JSON, ENCODING_BINARY
+from .snapshot_codec import SNAPSHOT_TYPES, encode_snapshot, encode_batch
+
+# Mensagens de estado: uma versão pendente substitui (mescla) a anterior do mesmo tipo.
+# Todas as outras (player_damage, level_up, enemy_death...) são eventos: mantêm a ordem e
+# nunca são descartados com a conexão aberta.
+STATE_MESSAGE_TYPES = ("players_update", "enemies_update", "players_list", "snapshot_delta")
+
+# Limites padrão por conexão
+DEFAULT_MAX_MESSAGES = 256          # evento que não cabe além disso desconecta o cliente
+DEFAULT_MAX_BYTES = 512 * 1024      # orçamento de bytes pendentes
+DEFAULT_MAX_LATENCY = 2.0           # idade máxima (s) da mensagem mais antiga na fila
+DEFAULT_SLOW_GRACE = 5.0            # tempo (s) acima do orçamento antes de desconectar
+
+
+class OutboundMessage:
+    """
+    Mensagem a ser enviada para um ou mais clientes.
+    Os frames (JSON/binário) são gerados sob demanda e reaproveitados
+    por todas as filas que recebem a mesma mensagem.
+    """
+
+    __slots__ = ("data", "_frames")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._frames: Dict[str, Any] = {}
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.data.get("type")
+
+    def frame(self, encoding: str = ENCODING_JSON):
+        """Retorna o frame codificado para o encoding do cliente (com cache)"""
+        if encoding == ENCODING_BINARY and self.type not in SNAPSHOT_TYPES:
+            encoding = ENCODING_JSON
+        cached = self._frames.get(encoding)
+        if cached is None:
+            if encoding == ENCODING_BINARY:
+                cached = encode_snapshot(self.data)
+            else:
+                cached = json.dumps(self.data)
+            self._frames[encoding] = cached
+        return cached
+
+    def merged_with(self, newer: "OutboundMessage") -> "OutboundMessage":
+        """Combina duas mensagens de estado do mesmo tipo (a mais nova vence por entidade)"""
+        message_type = self.type
+        if message_type == "players_update":
+            players = dict(self.data.get("players") or {})
+            players.update(newer.data.get("players") or {})
+            return OutboundMessage({**newer.data, "players": players})
+        if message_type == "enemies_update":
+            enemies = {e.get("enemy_id"): e for e in (self.data.get("enemies") or [])}
+            for e in newer.data.get("enemies") or []:
+                enemies[e.get("enemy_id")] = e
+            return OutboundMessage({**newer.data, "enemies": list(enemies.values())})
+        # players_list é o estado completo; snapshot_delta mais novo é relativo a um
+        # baseline já confirmado pelo cliente, então substitui o anterior
+        return newer
+
+
+def build_batch_frame(tick: int, frames: list, encoding: str = ENCODING_JSON):
+    """Envelope de lote: um único frame com todas as mensagens do tick"""
+    if encoding == ENCODING_BINARY:
+        return encode_batch(tick, frames)
+    return '{"type": "batch", "tick": %d, "messages": [%s]}' % (tick, ", ".join(frames))
+
+
+class OutboundQueue:
+    """
+    Fila de saída limitada de uma conexão, drenada por uma task escritora própria.
+    Os loops de tick só enfileiram; um cliente lento nunca segura a simulação.
+    """
+
+    def __init__(self, websocket,
+                 max_messages: int = DEFAULT_MAX_MESSAGES,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_latency: float = DEFAULT_MAX_LATENCY,
+                 slow_grace: float = DEFAULT_SLOW_GRACE,
+                 on_evict: Optional[Callable[["OutboundQueue", str], None]] = None):
+        self.websocket = websocket
+        self.encoding = ENCODING_JSON
+        # Modo lote: acumula até end_tick() e envia tudo em um único frame
+        self.batching = False
+        self._tick = 0
+        self._tick_ready = False
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.slow_grace = slow_grace
+        self.on_evict = on_evict
+
+        # Cada entrada: [message, size, enqueued_at]
+        self._pending = deque()
+        self._state_entries: Dict[str, list] = {}
+        self._pending_bytes = 0
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self._over_budget_since: Optional[float] = None
+        self.closed = False
+
+        # Métricas
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.sent_batches = 0
+        self.evicted = False
+
+    # ======= CICLO DE VIDA =======
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._writer())
+
+    def close(self) -> None:
+        """Para a task escritora e descarta o que estiver pendente"""
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._pending.clear()
+        self._state_entries.clear()
+        self._pending_bytes = 0
+        self._idle.set()
+
+    def end_tick(self, tick: int) -> None:
+        """Marca o fim de um tick: no modo lote, libera o envio do envelope"""
+        self._tick = tick
+        self._tick_ready = True
+        if self._pending:
+            self._wakeup.set()
+
+    async def flush(self, timeout: float = 1.0) -> bool:
+        """Aguarda a fila esvaziar. Retorna False se estourou o timeout"""
+        self._tick_ready = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # ======= ENFILEIRAMENTO =======
+    def put(self, message: OutboundMessage) -> bool:
+        """Enfileira uma mensagem. Retorna False se foi descartada (fila fechada ou cliente desconectado)"""
+        if self.closed:
+            return False
+
+        now = time.monotonic()
+        message_type = message.type
+
+        if message_type in STATE_MESSAGE_TYPES:
+            entry = self._state_entries.get(message_type)
+            if entry is not None:
+                # Latest-state-wins: mescla na entrada ainda não enviada
+                merged = entry[0].merged_with(message)
+                size = len(merged.frame(self.encoding))
+                self._pending_bytes += size - entry[1]
+                entry[0] = merged
+                entry[1] = size
+                self.coalesced += 1
+                self._check_budget(now)
+                return True
+        elif len(self._pending) >= self.max_messages or self._pending_bytes >= self.max_bytes * 2:
+            # Evento sem espaço: perdê-lo deixaria o cliente com estado errado para sempre.
+            # Desconecta já; ao reconectar ele recebe o estado completo
+            self.dropped += 1
+            self._evict(f"fila de eventos cheia: {len(self._pending)} mensagens, {self._pending_bytes} bytes pendentes")
+            return False
+
+        size = len(message.frame(self.encoding))
+        entry = [message, size, now]
+        self._pending.append(entry)
+        if message_type in STATE_MESSAGE_TYPES:
+            self._state_entries[message_type] = entry
+        self._pending_bytes += size
+        self._idle.clear()
+        if not self.batching:
+            self._wakeup.set()
+        self._check_budget(now)
+        return True
+
+    def _check_budget(self, now: float) -> None:
+        """Desconecta clientes que ficam acima do orçamento de bytes/latência por muito tempo"""
+        oldest_age = now - self._pending[0][2] if self._pending else 0.0
+        over_budget = self._pending_bytes > self.max_bytes or oldest_age > self.max_latency
+        if not over_budget:
+            self._over_budget_since = None
+            return
+        if self._over_budget_since is None:
+            self._over_budget_since = now
+            if oldest_age > self.max_latency:
+                # Conta a partir do momento em que a mensagem mais antiga estourou a latência
+                self._over_budget_since = self._pending[0][2] + self.max_latency
+        if now - self._over_budget_since > self.slow_grace:
+            self._evict(f"cliente lento: {self._pending_bytes} bytes pendentes, atraso {oldest_age:.1f}s")
+
+    def _evict(self, reason: str) -> None:
+        if self.evicted:
+            return
+        self.evicted = True
+        websocket = self.websocket
+        self.close()
+        if self.on_evict:
+            self.on_evict(self, reason)
+        asyncio.ensure_future(websocket.close(code=1008, reason="slow consumer"))
+
+    # ======= ESCRITA =======
+    async def _writer(self):
+        try:
+            while True:
+                if not self._pending:
+                    self._idle.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                if self.batching:
+                    if not self._tick_ready:
+                        self._wakeup.clear()
+                        await self._wakeup.wait()
+                        continue
+                    self._tick_ready = False
+                    await self._send_batch()
+                    continue
+
+                entry = self._pending.popleft()
+                message, size = entry[0], entry[1]
+                if self._state_entries.get(message.type) is entry:
+                    del self._state_entries[message.type]
+                self._pending_bytes -= size
+
+                await self.websocket.send(message.frame(self.encoding))
+                self.sent_messages += 1
+                self.sent_bytes += size
+        except asyncio.CancelledError:
+            pass
+        except websockets.exceptions.ConnectionClosed:
+            # A task de leitura (register_client) cuida do unregister
+            self.closed = True
+            self._idle.set()
+        except Exception as e:
+            self._evict(f"erro no envio: {e}")
+
+    async def _send_batch(self):
+        """Envia tudo o que está pendente como um único envelope do tick atual"""
+        entries = list(self._pending)
+        self._pending.clear()
+        self._state_entries.clear()
+        self._pending_bytes = 0
+
+        frame = build_batch_frame(self._tick, [entry[0].frame(self.encoding) for entry in entries], self.encoding)
+        await self.websocket.send(frame)
+        self.sent_messages += len(entries)
+        self.sent_batches += 1
+        self.sent_bytes += len(frame)
+
+    # ======= MÉTRICAS =======
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._pending_bytes
+
+    def get_stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "pending_bytes": self._pending_bytes,
+            "sent_messages": self.sent_messages,
+            "sent_bytes": self.sent_bytes,
+            "sent_batches": self.sent_batches,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,57 @@
+from typing import Optional, Dict, Any
+
+# Versão 1 = JSON puro (clientes antigos que não enviam "protocol" no login)
+# Versão 2 = suporta snapshots binários opcionais
+PROTOCOL_VERSION = 2
+
+ENCODING_JSON = "json"
+ENCODING_BINARY = "binary"
+
+# Ordem de preferência do servidor quando o cliente aceita mais de um
+SUPPORTED_ENCODINGS = (ENCODING_BINARY, ENCODING_JSON)
+
+# Capacidades opcionais que o cliente pode pedir além do encoding
+FEATURE_BATCH = "batch"  # todas as mensagens de um tick chegam em um único frame
+FEATURE_DELTA = "delta"  # snapshot_delta contra o último tick confirmado (snapshot_ack)
+SUPPORTED_FEATURES: tuple = (FEATURE_BATCH, FEATURE_DELTA)
+
+
+def default_protocol() -> Dict[str, Any]:
+    """Protocolo legado: JSON, sem capacidades extras."""
+    return {"version": 1, "encoding": ENCODING_JSON, "features": []}
+
+
+def negotiate(requested: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Negocia versão/encoding/capacidades a partir do campo "protocol" do login.
+    Exemplo enviado pelo cliente:
+        {"version": 2, "encodings": ["binary", "json"], "features": []}
+    Qualquer coisa inválida cai no protocolo legado (JSON).
+    """
+    if not isinstance(requested, dict):
+        return default_protocol()
+
+    try:
+        client_version = int(requested.get("version", 1))
+    except (TypeError, ValueError):
+        return default_protocol()
+
+    version = min(client_version, PROTOCOL_VERSION)
+    if version < 2:
+        return default_protocol()
+
+    accepted = requested.get("encodings") or [ENCODING_JSON]
+    if not isinstance(accepted, (list, tuple)):
+        accepted = [accepted]
+    encoding = ENCODING_JSON
+    for candidate in SUPPORTED_ENCODINGS:
+        if candidate in accepted:
+            encoding = candidate
+            break
+
+    wanted = requested.get("features") or []
+    if not isinstance(wanted, (list, tuple)):
+        wanted = []
+    features = [f for f in SUPPORTED_FEATURES if f in wanted]
+
+    return {"version": version, "encoding": encoding, "features": features}
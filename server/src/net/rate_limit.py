@@ -0,0 +1,83 @@
+import time
+from typing import Collection, Dict, Optional, Tuple
+
+# Limites por tipo de mensagem: (mensagens por segundo, rajada máxima).
+# "*" vale para qualquer tipo sem entrada própria.
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    "player_input": (120.0, 60.0),
+    # Retransmissões cliente -> mapa
+    "enemy_position_sync": (60.0, 60.0),
+    "player_action": (20.0, 20.0),
+    "enemy_damage": (20.0, 20.0),
+    "enemy_death": (10.0, 10.0),
+    "client_log": (20.0, 50.0),
+    "login": (2.0, 5.0),
+    "register": (2.0, 5.0),
+    "check_character_name": (5.0, 10.0),
+    "create_character": (2.0, 5.0),
+    "resume": (2.0, 5.0),
+    "*": (60.0, 120.0),
+}
+
+
+class TokenBucket:
+    """Balde de tokens clássico: `rate` tokens/s, capacidade `burst`"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float, now: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic() if now is None else now
+
+    def allow(self, cost: float = 1.0, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+
+class RateLimiter:
+    """
+    Limitador de uma conexão: um TokenBucket por tipo de mensagem com limite
+    próprio, criado na primeira mensagem daquele tipo. Tipos sem entrada em
+    `limits` ou fora de `known_types` (os registrados no dispatcher) dividem o
+    balde e o contador "*": o cliente não cria chaves novas inventando tipos.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 known_types: Optional[Collection[str]] = None):
+        self.limits = limits if limits is not None else DEFAULT_RATE_LIMITS
+        self.known_types = known_types
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self.dropped: Dict[str, int] = {}
+
+    def _key(self, message_type: str) -> str:
+        if message_type not in self.limits:
+            return "*"
+        if self.known_types is not None and message_type not in self.known_types:
+            return "*"
+        return message_type
+
+    def allow(self, message_type: str) -> bool:
+        key = self._key(message_type)
+        bucket = self._buckets.get(key, False)
+        if bucket is False:
+            limit = self.limits.get(key)
+            bucket = TokenBucket(*limit) if limit else None
+            self._buckets[key] = bucket
+        if bucket is None or bucket.allow():
+            return True
+        self.dropped[key] = self.dropped.get(key, 0) + 1
+        return False
+
+    @property
+    def total_dropped(self) -> int:
+        return sum(self.dropped.values())
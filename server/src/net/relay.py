@@ -0,0 +1,37 @@
+from typing import Dict, Any, Hashable, List, Tuple
+
+
+class RelayCoalescer:
+    """
+    Acumula mensagens retransmitidas de clientes (ex.: enemy_position_sync) até o
+    fim do tick. Por chave (mapa, entidade) só a versão mais recente é enviada,
+    excluindo o cliente que a originou.
+    """
+
+    def __init__(self):
+        # (map_name, key) -> (websocket de origem, data)
+        self._pending: Dict[Tuple[str, Hashable], Tuple[Any, Dict[str, Any]]] = {}
+        self.received = 0
+        self.coalesced = 0
+        self.sent = 0
+
+    def put(self, map_name: str, key: Hashable, sender, data: Dict[str, Any]) -> None:
+        self.received += 1
+        slot = (map_name, key)
+        if slot in self._pending:
+            self.coalesced += 1
+        self._pending[slot] = (sender, data)
+
+    def drain(self) -> List[Tuple[str, Any, Dict[str, Any]]]:
+        """Retorna [(map_name, sender, data)] e limpa o buffer"""
+        pending, self._pending = self._pending, {}
+        self.sent += len(pending)
+        return [(map_name, sender, data) for (map_name, _), (sender, data) in pending.items()]
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+        }
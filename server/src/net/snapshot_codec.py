@@ -0,0 +1,285 @@
+"""
+Codec binário compacto para snapshots de estado (players_update / enemies_update).
+
+Layout (little-endian):
+    header : u8 versão | u8 tipo | u16 quantidade
+    player : str id | i16 x | i16 y | i16 vx | i16 vy | u8 anim | u8 flags | u16 hp | u16 max_hp
+    enemy  : str id | u8 enemy_type | (mesmos campos de estado do player)
+
+- str = u8 tamanho + bytes utf-8
+- posições e velocidades quantizadas em 1/10 de unidade (mesmo limiar de
+  mudança usado em ServerPlayer.update)
+- flags: bit0 = olhando para a esquerda, bit1 = atacando, bit2 = vivo
+- animações/tipos conhecidos viram índice; desconhecidos usam 255 + str
+
+O nome do player NÃO vai no snapshot binário: o cliente já o recebe em
+players_list / player_connected.
+
+Lote por tick (KIND_BATCH), usado quando o cliente negocia "batch":
+    header : u8 versão | u8 tipo | u16 quantidade | u32 tick
+    parte  : u8 formato (0 = JSON utf-8, 1 = snapshot binário) | u32 tamanho | bytes
+"""
+import json
+import struct
+from typing import Dict, Any, List, Optional, Tuple
+
+CODEC_VERSION = 1
+
+KIND_PLAYERS_UPDATE = 1
+KIND_ENEMIES_UPDATE = 2
+KIND_BATCH = 3
+
+PART_JSON = 0
+PART_BINARY = 1
+
+SNAPSHOT_TYPES = {
+    "players_update": KIND_PLAYERS_UPDATE,
+    "enemies_update": KIND_ENEMIES_UPDATE,
+}
+
+POSITION_SCALE = 10.0
+VELOCITY_SCALE = 10.0
+
+FLAG_FACING_LEFT = 0x01
+FLAG_ATTACKING = 0x02
+FLAG_ALIVE = 0x04
+
+ANIMATIONS = ("idle", "walk", "jump", "attack", "death", "hurt")
+ENEMY_TYPES = ("unknown", "orc", "slime")
+_UNKNOWN_INDEX = 255
+
+_ANIMATION_INDEX = {name: i for i, name in enumerate(ANIMATIONS)}
+_ENEMY_TYPE_INDEX = {name: i for i, name in enumerate(ENEMY_TYPES)}
+
+_HEADER = struct.Struct("<BBH")
+_STATE = struct.Struct("<hhhhBBHH")
+_U8 = struct.Struct("<B")
+_U32 = struct.Struct("<I")
+_PART = struct.Struct("<BI")
+
+_I16_MIN, _I16_MAX = -32768, 32767
+
+
+def _quantize(value: Any, scale: float) -> int:
+    try:
+        q = int(round(float(value) * scale))
+    except (TypeError, ValueError):
+        return 0
+    return max(_I16_MIN, min(_I16_MAX, q))
+
+
+def _u16(value: Any) -> int:
+    try:
+        return max(0, min(0xFFFF, int(value)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _pack_str(out: bytearray, value: Any) -> None:
+    raw = str(value).encode("utf-8")[:255]
+    out += _U8.pack(len(raw))
+    out += raw
+
+
+def _unpack_str(buf: bytes, offset: int) -> Tuple[str, int]:
+    size = buf[offset]
+    start = offset + 1
+    return buf[start:start + size].decode("utf-8"), start + size
+
+
+def _pack_indexed(out: bytearray, value: str, index: Dict[str, int]) -> None:
+    idx = index.get(value)
+    if idx is None:
+        out += _U8.pack(_UNKNOWN_INDEX)
+        _pack_str(out, value)
+    else:
+        out += _U8.pack(idx)
+
+
+def _pack_state(out: bytearray, x, y, vx, vy, animation: str, flags: int, hp, max_hp) -> None:
+    anim_idx = _ANIMATION_INDEX.get(animation, _UNKNOWN_INDEX)
+    out += _STATE.pack(
+        _quantize(x, POSITION_SCALE),
+        _quantize(y, POSITION_SCALE),
+        _quantize(vx, VELOCITY_SCALE),
+        _quantize(vy, VELOCITY_SCALE),
+        anim_idx,
+        flags,
+        _u16(hp),
+        _u16(max_hp),
+    )
+    if anim_idx == _UNKNOWN_INDEX:
+        _pack_str(out, animation)
+
+
+def _unpack_state(buf: bytes, offset: int) -> Tuple[tuple, int]:
+    x, y, vx, vy, anim_idx, flags, hp, max_hp = _STATE.unpack_from(buf, offset)
+    offset += _STATE.size
+    if anim_idx == _UNKNOWN_INDEX:
+        animation, offset = _unpack_str(buf, offset)
+    else:
+        animation = ANIMATIONS[anim_idx] if anim_idx < len(ANIMATIONS) else "idle"
+    state = (
+        x / POSITION_SCALE, y / POSITION_SCALE,
+        vx / VELOCITY_SCALE, vy / VELOCITY_SCALE,
+        animation, flags, hp, max_hp,
+    )
+    return state, offset
+
+
+def _player_flags(p: Dict[str, Any]) -> int:
+    flags = 0
+    try:
+        if float(p.get("facing", 1.0)) < 0:
+            flags |= FLAG_FACING_LEFT
+    except (TypeError, ValueError):
+        pass
+    if p.get("is_attacking"):
+        flags |= FLAG_ATTACKING
+    if p.get("is_alive", True):
+        flags |= FLAG_ALIVE
+    return flags
+
+
+def _enemy_flags(e: Dict[str, Any]) -> int:
+    flags = 0
+    if e.get("facing_left"):
+        flags |= FLAG_FACING_LEFT
+    if e.get("is_attacking"):
+        flags |= FLAG_ATTACKING
+    if e.get("is_alive", True):
+        flags |= FLAG_ALIVE
+    return flags
+
+
+def encode_players(players: Dict[str, Dict[str, Any]]) -> bytes:
+    """Codifica {player_id: sync_data} (formato de players_update)."""
+    records = list(players.items())[:0xFFFF]
+    out = bytearray(_HEADER.pack(CODEC_VERSION, KIND_PLAYERS_UPDATE, len(records)))
+    for player_id, p in records:
+        pos = p.get("position") or {}
+        vel = p.get("velocity") or {}
+        _pack_str(out, player_id)
+        _pack_state(
+            out,
+            pos.get("x", 0.0), pos.get("y", 0.0),
+            vel.get("x", 0.0), vel.get("y", 0.0),
+            str(p.get("animation", "idle")),
+            _player_flags(p),
+            p.get("hp", 0), p.get("max_hp", 0),
+        )
+    return bytes(out)
+
+
+def encode_enemies(enemies: List[Dict[str, Any]]) -> bytes:
+    """Codifica [sync_data] de inimigos (formato de enemies_update)."""
+    records = enemies[:0xFFFF]
+    out = bytearray(_HEADER.pack(CODEC_VERSION, KIND_ENEMIES_UPDATE, len(records)))
+    for e in records:
+        _pack_str(out, e.get("enemy_id", ""))
+        _pack_indexed(out, str(e.get("enemy_type", "unknown")), _ENEMY_TYPE_INDEX)
+        _pack_state(
+            out,
+            e.get("x", 0.0), e.get("y", 0.0),
+            e.get("velocity_x", 0.0), e.get("velocity_y", 0.0),
+            str(e.get("animation", "idle")),
+            _enemy_flags(e),
+            e.get("hp", 0), e.get("max_hp", 0),
+        )
+    return bytes(out)
+
+
+def encode_snapshot(data: Dict[str, Any]) -> Optional[bytes]:
+    """Codifica uma mensagem de snapshot. Retorna None se o tipo não tiver formato binário."""
+    kind = SNAPSHOT_TYPES.get(data.get("type"))
+    if kind == KIND_PLAYERS_UPDATE:
+        return encode_players(data.get("players") or {})
+    if kind == KIND_ENEMIES_UPDATE:
+        return encode_enemies(data.get("enemies") or [])
+    return None
+
+
+def encode_batch(tick: int, frames: List[Any]) -> bytes:
+    """Empacota frames já codificados (str JSON ou bytes binários) em um único frame de lote."""
+    frames = frames[:0xFFFF]
+    out = bytearray(_HEADER.pack(CODEC_VERSION, KIND_BATCH, len(frames)))
+    out += _U32.pack(tick & 0xFFFFFFFF)
+    for frame in frames:
+        if isinstance(frame, (bytes, bytearray)):
+            out += _PART.pack(PART_BINARY, len(frame))
+            out += frame
+        else:
+            raw = frame.encode("utf-8")
+            out += _PART.pack(PART_JSON, len(raw))
+            out += raw
+    return bytes(out)
+
+
+def decode_snapshot(buf: bytes) -> Dict[str, Any]:
+    """Decodifica um frame binário de volta para o formato JSON equivalente."""
+    version, kind, count = _HEADER.unpack_from(buf, 0)
+    if version != CODEC_VERSION:
+        raise ValueError(f"Versão de codec não suportada: {version}")
+    offset = _HEADER.size
+
+    if kind == KIND_BATCH:
+        (tick,) = _U32.unpack_from(buf, offset)
+        offset += _U32.size
+        messages = []
+        for _ in range(count):
+            part_format, size = _PART.unpack_from(buf, offset)
+            offset += _PART.size
+            raw = buf[offset:offset + size]
+            offset += size
+            if part_format == PART_BINARY:
+                messages.append(decode_snapshot(raw))
+            else:
+                messages.append(json.loads(raw.decode("utf-8")))
+        return {"type": "batch", "tick": tick, "messages": messages}
+
+    if kind == KIND_PLAYERS_UPDATE:
+        players = {}
+        for _ in range(count):
+            player_id, offset = _unpack_str(buf, offset)
+            (x, y, vx, vy, animation, flags, hp, max_hp), offset = _unpack_state(buf, offset)
+            players[player_id] = {
+                "id": player_id,
+                "position": {"x": x, "y": y},
+                "velocity": {"x": vx, "y": vy},
+                "animation": animation,
+                "facing": -1.0 if flags & FLAG_FACING_LEFT else 1.0,
+                "hp": hp,
+                "max_hp": max_hp,
+                "is_attacking": bool(flags & FLAG_ATTACKING),
+                "is_alive": bool(flags & FLAG_ALIVE),
+            }
+        return {"type": "players_update", "players": players}
+
+    if kind == KIND_ENEMIES_UPDATE:
+        enemies = []
+        for _ in range(count):
+            enemy_id, offset = _unpack_str(buf, offset)
+            type_idx = buf[offset]
+            offset += 1
+            if type_idx == _UNKNOWN_INDEX:
+                enemy_type, offset = _unpack_str(buf, offset)
+            else:
+                enemy_type = ENEMY_TYPES[type_idx] if type_idx < len(ENEMY_TYPES) else "unknown"
+            (x, y, vx, vy, animation, flags, hp, max_hp), offset = _unpack_state(buf, offset)
+            enemies.append({
+                "enemy_id": enemy_id,
+                "enemy_type": enemy_type,
+                "x": x,
+                "y": y,
+                "velocity_x": vx,
+                "velocity_y": vy,
+                "animation": animation,
+                "facing_left": bool(flags & FLAG_FACING_LEFT),
+                "hp": hp,
+                "max_hp": max_hp,
+                "is_attacking": bool(flags & FLAG_ATTACKING),
+                "is_alive": bool(flags & FLAG_ALIVE),
+            })
+        return {"type": "enemies_update", "enemies": enemies}
+
+    raise ValueError(f"Tipo de snapshot desconhecido: {kind}")
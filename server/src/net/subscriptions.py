@@ -0,0 +1,47 @@
+from typing import Dict, Set, Optional, Any, Iterator, Tuple
+
+
+class MapSubscriptions:
+    """
+    Índice mapa -> conexões (websockets) dos players logados.
+    Mantido em login, troca de mapa e desconexão, para que o broadcast
+    por mapa custe O(players do mapa) e não O(clientes do servidor).
+    """
+
+    def __init__(self):
+        self._by_map: Dict[str, Set[Any]] = {}
+        self._map_of: Dict[Any, str] = {}
+
+    def subscribe(self, websocket, map_name: str) -> None:
+        """Inscreve a conexão no mapa (removendo de qualquer mapa anterior)"""
+        self.unsubscribe(websocket)
+        self._by_map.setdefault(map_name, set()).add(websocket)
+        self._map_of[websocket] = map_name
+
+    def unsubscribe(self, websocket) -> Optional[str]:
+        """Remove a conexão do índice. Retorna o mapa em que estava (ou None)"""
+        map_name = self._map_of.pop(websocket, None)
+        if map_name is not None:
+            subscribers = self._by_map.get(map_name)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self._by_map[map_name]
+        return map_name
+
+    def get_subscribers(self, map_name: str) -> Set[Any]:
+        """Conexões inscritas no mapa (não modificar o set retornado)"""
+        return self._by_map.get(map_name, set())
+
+    def get_map(self, websocket) -> Optional[str]:
+        return self._map_of.get(websocket)
+
+    def items(self) -> Iterator[Tuple[str, Set[Any]]]:
+        return iter(list(self._by_map.items()))
+
+    def clear(self) -> None:
+        self._by_map.clear()
+        self._map_of.clear()
+
+    def __len__(self) -> int:
+        return len(self._map_of)
@@ -0,0 +1,65 @@
+from typing import Dict
+
+# Teclas "de borda": um toque entre dois ticks não pode se perder
+EDGE_KEYS = ("jump", "attack")
+INPUT_KEYS = ("move_left", "move_right", "jump", "attack")
+
+
+class InputCollector:
+    """
+    Acumula os inputs recebidos entre dois ticks.
+    Guarda só o estado mais recente por player (o último vence por tecla),
+    lembrando se jump/attack foram pressionados em algum momento, e entrega
+    tudo de uma vez no início do tick.
+    """
+
+    def __init__(self):
+        # player_id -> {"state": {tecla: bool}, "pressed": {tecla}}
+        self._pending: Dict[str, dict] = {}
+        self.received = 0
+        self.coalesced = 0
+        self.applied = 0
+        self.dropped = 0
+
+    def submit(self, player_id: str, input_data: dict) -> None:
+        if not isinstance(input_data, dict):
+            return
+        self.received += 1
+        entry = self._pending.get(player_id)
+        if entry is None:
+            entry = self._pending[player_id] = {"state": {}, "pressed": set()}
+        else:
+            self.coalesced += 1
+        for key in INPUT_KEYS:
+            if key in input_data:
+                value = bool(input_data[key])
+                entry["state"][key] = value
+                if value and key in EDGE_KEYS:
+                    entry["pressed"].add(key)
+
+    def discard(self, player_id: str) -> None:
+        self._pending.pop(player_id, None)
+
+    def drain(self) -> Dict[str, dict]:
+        """Retorna e limpa os inputs pendentes"""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def apply(self, map_manager) -> int:
+        """Aplica os inputs pendentes aos players do MapManager. Retorna quantos foram aplicados"""
+        pending = self.drain()
+        if not pending:
+            return 0
+        applied = map_manager.process_pending_inputs(pending)
+        self.applied += applied
+        self.dropped += len(pending) - applied
+        return applied
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "applied": self.applied,
+            "dropped": self.dropped,
+        }
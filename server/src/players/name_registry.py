@@ -0,0 +1,148 @@
+import hashlib
+import math
+from typing import Iterable, Optional, Set
+
+# Capacidade inicial do filtro de Bloom e taxa de falso positivo desejada
+DEFAULT_BLOOM_CAPACITY = 10_000
+DEFAULT_BLOOM_FP_RATE = 0.01
+
+
+def fold_name(name: str) -> str:
+    """Forma canônica de um nome de personagem (sem espaços nas pontas, case-folded)"""
+    return name.strip().casefold()
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom em um bytearray. `might_contain` False significa "com certeza
+    não está"; True pode ser falso positivo (taxa ~fp_rate até `capacity` itens).
+    As k posições saem de um único blake2b (double hashing).
+    """
+
+    __slots__ = ("capacity", "fp_rate", "num_bits", "num_hashes", "count", "_bits")
+
+    def __init__(self, capacity: int = DEFAULT_BLOOM_CAPACITY, fp_rate: float = DEFAULT_BLOOM_FP_RATE):
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.num_bits = max(64, int(math.ceil(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def might_contain(self, key: str) -> bool:
+        bits = self._bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+class NameRegistry:
+    """
+    Índice em memória dos nomes de personagem, pré-carregado do banco no startup.
+
+    - Nomes em uso: conjunto case-folded, com um filtro de Bloom na frente para o
+      caminho rápido "com certeza livre" (o caso comum enquanto o jogador digita).
+    - Personagens online: conjunto case-folded mantido no login/retomada e no logout.
+
+    As duas consultas são O(1) e não tocam o banco. O registro só cresce:
+    personagens não são apagados pelo servidor.
+    """
+
+    def __init__(self, fp_rate: float = DEFAULT_BLOOM_FP_RATE):
+        self.fp_rate = fp_rate
+        self._taken: Set[str] = set()
+        self._online: Set[str] = set()
+        self._bloom = BloomFilter(DEFAULT_BLOOM_CAPACITY, fp_rate)
+
+        # Métricas
+        self.checks = 0
+        self.bloom_negatives = 0  # respondidas só pelo filtro
+        self.false_positives = 0  # filtro disse "talvez", conjunto disse "livre"
+        self.rebuilds = 0
+
+    def load(self, names: Iterable[str]) -> int:
+        """Substitui o índice pelos nomes do banco. Retorna quantos nomes distintos"""
+        self._taken = {fold_name(name) for name in names if name}
+        self._rebuild_bloom()
+        return len(self._taken)
+
+    def _rebuild_bloom(self) -> None:
+        """Novo filtro com o dobro de folga sobre o total atual (mantém a taxa de falso positivo)"""
+        capacity = max(DEFAULT_BLOOM_CAPACITY, len(self._taken) * 2)
+        self._bloom = BloomFilter(capacity, self.fp_rate)
+        for key in self._taken:
+            self._bloom.add(key)
+        self.rebuilds += 1
+
+    def is_taken(self, name: str) -> bool:
+        key = fold_name(name)
+        self.checks += 1
+        if not self._bloom.might_contain(key):
+            self.bloom_negatives += 1
+            return False
+        if key in self._taken:
+            return True
+        self.false_positives += 1
+        return False
+
+    def claim(self, name: str) -> bool:
+        """Reserva um nome (criação de personagem). False se já estava em uso"""
+        key = fold_name(name)
+        if key in self._taken:
+            return False
+        self._taken.add(key)
+        self._bloom.add(key)
+        if self._bloom.count > self._bloom.capacity:
+            self._rebuild_bloom()
+        return True
+
+    def release(self, name: str) -> None:
+        """Desfaz um claim cuja criação falhou (o filtro fica com o bit: só custa um falso positivo)"""
+        self._taken.discard(fold_name(name))
+
+    # Online
+    def set_online(self, name: Optional[str]) -> None:
+        if name:
+            self._online.add(fold_name(name))
+
+    def set_offline(self, name: Optional[str]) -> None:
+        if name:
+            self._online.discard(fold_name(name))
+
+    def is_online(self, name: str) -> bool:
+        return fold_name(name) in self._online
+
+    def clear_online(self) -> None:
+        self._online.clear()
+
+    def __len__(self) -> int:
+        return len(self._taken)
+
+    def get_stats(self) -> dict:
+        return {
+            "names": len(self._taken),
+            "online": len(self._online),
+            "checks": self.checks,
+            "bloom_negatives": self.bloom_negatives,
+            "false_positives": self.false_positives,
+            "bloom_bytes": self._bloom.size_bytes,
+            "bloom_hashes": self._bloom.num_hashes,
+            "rebuilds": self.rebuilds,
+        }
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from concurrent.futures import Future
+from typing import Optional, List
+
+from .server_player import ServerPlayer
+
+# Intervalo (s) entre checkpoints periódicos dos personagens alterados
+DEFAULT_CHECKPOINT_INTERVAL = 5.0
+# Colunas sempre gravadas em logout/troca de mapa (mesmo sem alteração registrada)
+SESSION_END_FIELDS = ("hp", "pos_x", "pos_y")
+
+
+class PersistenceScheduler:
+    """
+    Persistência write-behind dos personagens online.
+
+    O ServerPlayer só marca os campos alterados (mark_dirty); o scheduler grava,
+    a cada `interval` segundos, apenas as colunas alteradas dos personagens sujos
+    (no máximo um UPDATE em characters e um em character_attributes por personagem),
+    além de checkpoints imediatos em logout, troca de mapa e desligamento.
+    O volume de escrita depende do número de personagens, não da intensidade do combate.
+    """
+
+    def __init__(self, store, interval: float = DEFAULT_CHECKPOINT_INTERVAL):
+        self.store = store
+        self.interval = interval
+        self._next_checkpoint = time.monotonic() + interval
+
+        # Métricas
+        self.checkpoints = 0
+        self.players_flushed = 0
+        self.writes = 0
+        self.failed = 0
+        self.last_batch = 0
+        self.max_batch = 0
+        self.last_lag_ms = 0.0  # maior idade de alteração no último checkpoint
+        self.max_lag_ms = 0.0
+
+    def maybe_checkpoint(self, map_manager) -> int:
+        """Chamado a cada tick; grava os personagens sujos quando o intervalo venceu"""
+        now = time.monotonic()
+        if now < self._next_checkpoint:
+            return 0
+        self._next_checkpoint = now + self.interval
+        return self.checkpoint(map_manager)
+
+    def checkpoint(self, map_manager, force_fields: tuple = (), reason: str = "checkpoint") -> int:
+        """
+        Grava os personagens sujos de todos os mapas (todos, se houver force_fields).
+        Retorna quantos foram gravados
+        """
+        now = time.monotonic()
+        batch = 0
+        lag = 0.0
+        for map_name, map_instance in map_manager.maps.items():
+            for server_player in map_instance.players.values():
+                if server_player.is_dirty:
+                    lag = max(lag, now - server_player.dirty_since)
+                elif not force_fields:
+                    continue
+                if self.flush_player(server_player, map_name, force_fields, reason):
+                    batch += 1
+
+        self.checkpoints += 1
+        self.last_batch = batch
+        self.max_batch = max(self.max_batch, batch)
+        self.last_lag_ms = lag * 1000.0
+        self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+        return batch
+
+    def flush_player(self, server_player: ServerPlayer, map_name: Optional[str] = None,
+                     force_fields: tuple = (), reason: str = "checkpoint") -> List:
+        """
+        Grava as colunas alteradas de um personagem (mais `force_fields`).
+        Com map_name a coluna `map` vai junto. Retorna os resultados das escritas
+        (Futures no AsyncStore), vazio se não havia nada para gravar.
+        reason vai para o store (histórico no JournalStore).
+        """
+        if not server_player.store or not server_player.character_id:
+            return []
+        state, attrs = server_player.collect_dirty(force_fields)
+        if not state and not attrs:
+            return []
+        dirty_fields = list(state) + list(attrs)
+        if map_name and state:
+            state["map"] = map_name
+
+        try:
+            results = self.store.save_character(server_player.character_id, state, attrs, reason)
+        except Exception as e:
+            self._write_failed(server_player, dirty_fields, e)
+            return []
+
+        futures = [result for result in results if isinstance(result, Future)]
+        if futures:
+            self._watch_futures(server_player, dirty_fields, futures)
+        self.writes += bool(state) + bool(attrs)
+        self.players_flushed += 1
+        return results
+
+    def _write_failed(self, server_player: ServerPlayer, dirty_fields: List[str], error: BaseException) -> None:
+        self.failed += 1
+        # Devolver os campos para a próxima tentativa
+        server_player.mark_dirty(*dirty_fields)
+        print(f"[PERSIST][ERROR] Falha ao gravar {server_player.name}: {error}")
+
+    def _watch_futures(self, server_player: ServerPlayer, dirty_fields: List[str], futures: List[Future]) -> None:
+        """Escritas assíncronas (AsyncStore/ShardedStore): a falha do commit só aparece no Future.
+        O callback roda na thread escritora; o tratamento volta para o event loop (dono do player)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        reported = []
+
+        def on_done(future: Future) -> None:
+            if future.cancelled() or future.exception() is None or reported:
+                return
+            reported.append(True)  # uma falha por gravação, mesmo com estado e atributos falhando
+            if loop is None:
+                self._write_failed(server_player, dirty_fields, future.exception())
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(self._write_failed, server_player, dirty_fields, future.exception())
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def flush_session_end(self, server_player: ServerPlayer, map_name: str, reason: str = "logout") -> List:
+        """Checkpoint de logout/troca de mapa: sempre inclui mapa, posição e HP"""
+        return self.flush_player(server_player, map_name, SESSION_END_FIELDS, reason)
+
+    def get_stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "checkpoints": self.checkpoints,
+            "players_flushed": self.players_flushed,
+            "writes": self.writes,
+            "failed": self.failed,
+            "last_batch": self.last_batch,
+            "max_batch": self.max_batch,
+            "last_lag_ms": round(self.last_lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+        }
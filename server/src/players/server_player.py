@@ -1,5 +1,11 @@
 import time
-from typing import Optional
+from typing import Optional, Dict, Tuple
+
+from db.records import CharacterRecord
+
+# Colunas persistidas (write-behind): tabela characters e character_attributes
+STATE_FIELDS = ("level", "xp", "xp_max", "attr_points", "hp", "hp_max", "pos_x", "pos_y")
+ATTRIBUTE_FIELDS = ("strength", "defense", "intelligence", "vitality")
 
 
 class ServerPlayer:
@@ -8,11 +14,21 @@ class ServerPlayer:
     Processa input, física e lógica no servidor (server-authoritative).
     """
 
-    def __init__(self, player_id: str, player_name: str, spawn_pos: dict, store=None, character_id=None):
+    def __init__(self, player_id: str, player_name: str, spawn_pos: dict, store=None,
+                 character: Optional[CharacterRecord] = None):
+        """
+        character: registro já hidratado do banco (o construtor não acessa o banco);
+        sem ele o player usa valores padrão e não é persistido.
+        store: usado apenas para gravar (PersistenceScheduler)
+        """
         self.player_id = player_id
         self.name = player_name
         self.store = store
-        self.character_id = character_id
+        self.character = character
+        self.character_id = character.character_id if character else None
+        # Campos alterados desde o último flush (ver PersistenceScheduler)
+        self._dirty = set()
+        self._dirty_since: Optional[float] = None
         # Posição interna (mantém compatibilidade com código existente)
         self.posicaon = [float(spawn_pos.get("x", 0.0)), float(spawn_pos.get("y", 0.0))]
         self.velocity = [0.0, 0.0]
@@ -40,8 +56,9 @@ class ServerPlayer:
         self.max_hp = self.vitality * 20
         self.hp = self.max_hp
         
-        # Carregar dados salvos do banco de dados se disponível
-        self._load_from_database()
+        # Aplicar dados do personagem (carregados do banco pelo chamador)
+        if character is not None:
+            self._apply_character(character)
         self.is_alive = True
         self.animation = "idle"
         self.facing_left = False
@@ -94,6 +111,7 @@ class ServerPlayer:
     def recalc_max_hp(self) -> None:
         self.max_hp = int(self.vitality) * 20
         self.hp = min(self.hp, self.max_hp)
+        self.mark_dirty("hp", "hp_max")
 
     def gain_xp(self, amount: int) -> bool:
         print(f"[XP_GAIN] {self.name} ganhou {amount} XP! (Atual: {self.xp} -> {self.xp + amount})")
@@ -113,106 +131,110 @@ class ServerPlayer:
             print(f"[LEVEL_UP] {self.name} subiu para Level {self.level}! HP restaurado: {self.hp}/{self.max_hp}")
             leveled = True
         
-        # Auto-save no banco de dados
-        self.auto_save()
+        # Persistido pelo PersistenceScheduler no próximo flush
+        self.mark_dirty("xp")
+        if leveled:
+            self.mark_dirty("level", "xp_max", "attr_points", "hp")
         return leveled
 
-    def auto_save(self):
-        """Salva automaticamente o estado do personagem no banco de dados"""
-        print(f"[AUTO_SAVE] Tentando salvar {self.name} - store: {self.store is not None}, character_id: {self.character_id}")
-        if self.store and self.character_id:
-            try:
-                print(f"[AUTO_SAVE] Salvando estado: Level={self.level}, XP={self.xp}, HP={self.hp}")
-                # Salvar estado básico
-                self.store.save_character_state(self.character_id, {
-                    "level": self.level,
-                    "xp": self.xp,
-                    "xp_max": self.xp_max,
-                    "attr_points": self.attribute_points,
-                    "hp": self.hp,
-                    "hp_max": self.max_hp,
-                    "pos_x": self.position[0],
-                    "pos_y": self.position[1]
-                })
-                print(f"[AUTO_SAVE] Estado salvo com sucesso!")
-                
-                # Salvar atributos
-                self.store.save_character_attributes(self.character_id, {
-                    "strength": self.strength,
-                    "defense": self.defense_attr,
-                    "intelligence": self.intelligence,
-                    "vitality": self.vitality
-                })
-                print(f"[AUTO_SAVE] Atributos salvos com sucesso!")
-                print(f"[AUTO_SAVE] Personagem {self.name} salvo completamente! Level: {self.level}, XP: {self.xp}")
-            except Exception as e:
-                import traceback
-                print(f"[ERROR] Falha ao salvar personagem {self.name}: {e}")
-                print(f"[ERROR] Traceback: {traceback.format_exc()}")
-        else:
-            print(f"[AUTO_SAVE] ERRO: Não salvou {self.name} - store: {self.store is not None}, character_id: {self.character_id}")
-
-    def _load_from_database(self):
-        """Carrega dados salvos do banco de dados se disponível"""
-        if not self.store or not self.character_id:
-            print(f"[LOAD] {self.name}: Usando valores padrão (sem banco ou character_id)")
-            return
-            
-        try:
-            print(f"[LOAD] Carregando dados salvos para {self.name} (character_id: {self.character_id})")
-            
-            # Carregar dados do personagem diretamente pelo character_id
-            char = self.store.get_character_by_id(self.character_id)
-            
-            # Carregar atributos do personagem
-            attrs_row = self.store.conn.execute(
-                "SELECT * FROM character_attributes WHERE character_id=?",
-                (self.character_id,),
-            ).fetchone()
-            attrs = dict(attrs_row) if attrs_row else None
-            
-            if char:
-                # Carregar stats do personagem
-                self.level = char.get("level", 1)
-                self.xp = char.get("xp", 0) 
-                self.xp_max = char.get("xp_max", 100)
-                self.attribute_points = char.get("attr_points", 0)
-                self.hp = char.get("hp", 100)
-                self.max_hp = char.get("hp_max", 100)
-                
-                print(f"[LOAD] Stats carregados: Level={self.level}, XP={self.xp}, HP={self.hp}, AttrPts={self.attribute_points}")
-                
-            if attrs:
-                # Carregar atributos do personagem  
-                self.strength = attrs.get("strength", 5)
-                self.defense_attr = attrs.get("defense", 5)
-                self.intelligence = attrs.get("intelligence", 5)
-                self.vitality = attrs.get("vitality", 5)
-                
-                print(f"[LOAD] Atributos carregados: STR={self.strength}, DEF={self.defense_attr}, INT={self.intelligence}, VIT={self.vitality}")
-                
-                # Recalcular HP máximo baseado na vitalidade carregada
-                if not char:  # Se não carregou HP do char, calcular baseado na vitalidade
-                    self.max_hp = self.vitality * 20
-                    self.hp = self.max_hp
-                else:
-                    # Se carregou HP do char, garantir que HP máximo bate com vitalidade
-                    calculated_max_hp = self.vitality * 20
-                    if self.max_hp != calculated_max_hp:
-                        print(f"[LOAD] Ajustando HP máximo: {self.max_hp} -> {calculated_max_hp} (baseado em VIT={self.vitality})")
-                        self.max_hp = calculated_max_hp
-                        # Não deixar HP atual maior que o máximo
-                        if self.hp > self.max_hp:
-                            self.hp = self.max_hp
-                    
-            print(f"[LOAD] {self.name} carregado com sucesso do banco de dados!")
-            print(f"[LOAD] Estado final: Level={self.level}, XP={self.xp}/{self.xp_max}, HP={self.hp}/{self.max_hp}, AttrPts={self.attribute_points}")
-            
-        except Exception as e:
-            import traceback
-            print(f"[LOAD] ERRO ao carregar {self.name}: {e}")
-            print(f"[LOAD] Traceback: {traceback.format_exc()}")
-            print(f"[LOAD] Usando valores padrão para {self.name}")
+    # ======= PERSISTÊNCIA (write-behind) =======
+    def mark_dirty(self, *fields: str) -> None:
+        if not self._dirty:
+            self._dirty_since = time.monotonic()
+        self._dirty.update(fields)
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self._dirty)
+
+    @property
+    def dirty_since(self) -> Optional[float]:
+        return self._dirty_since if self._dirty else None
+
+    def persisted_values(self) -> Dict[str, object]:
+        """Valor atual de cada coluna persistida"""
+        return {
+            "level": self.level,
+            "xp": self.xp,
+            "xp_max": self.xp_max,
+            "attr_points": self.attribute_points,
+            "hp": self.hp,
+            "hp_max": self.max_hp,
+            "pos_x": self.position[0],
+            "pos_y": self.position[1],
+            "strength": self.strength,
+            "defense": self.defense_attr,
+            "intelligence": self.intelligence,
+            "vitality": self.vitality,
+        }
+
+    def collect_dirty(self, force_fields: Tuple[str, ...] = ()) -> Tuple[dict, dict]:
+        """
+        Retorna (estado, atributos) só com as colunas alteradas (mais force_fields)
+        e limpa o rastreamento.
+        """
+        fields = self._dirty | set(force_fields)
+        self._dirty = set()
+        self._dirty_since = None
+        if not fields:
+            return {}, {}
+        values = self.persisted_values()
+        state = {field: values[field] for field in STATE_FIELDS if field in fields}
+        attrs = {field: values[field] for field in ATTRIBUTE_FIELDS if field in fields}
+        return state, attrs
+
+    def _apply_character(self, character: CharacterRecord) -> None:
+        """Copia stats e atributos do registro do personagem"""
+        self.level = character.level
+        self.xp = character.xp
+        self.xp_max = character.xp_max
+        self.attribute_points = character.attr_points
+        self.hp = character.hp
+        self.strength = character.strength
+        self.defense_attr = character.defense
+        self.intelligence = character.intelligence
+        self.vitality = character.vitality
+        # HP máximo sempre derivado da vitalidade; HP atual não passa do máximo
+        self.max_hp = self.vitality * 20
+        if character.hp_max != self.max_hp:
+            print(f"[LOAD] Ajustando HP máximo: {character.hp_max} -> {self.max_hp} (baseado em VIT={self.vitality})")
+        self.hp = min(self.hp, self.max_hp)
+
+    def to_character_record(self) -> Optional[CharacterRecord]:
+        """Registro com o estado atual (ex.: para recriar o player em outro mapa sem reler o banco)"""
+        if self.character is None:
+            return None
+        return CharacterRecord(
+            self.character.character_id, self.character.user_id, self.character.name,
+            self.character.character_type, level=self.level, xp=self.xp, xp_max=self.xp_max,
+            attr_points=self.attribute_points, map_name=self.character.map_name,
+            pos_x=self.position[0], pos_y=self.position[1], hp=self.hp, hp_max=self.max_hp,
+            strength=self.strength, defense=self.defense_attr, intelligence=self.intelligence,
+            vitality=self.vitality, username=self.character.username,
+        )
+
+    def to_snapshot(self) -> Optional[dict]:
+        """Estado completo para o snapshot do mundo (None para players sem personagem)"""
+        record = self.to_character_record()
+        if record is None:
+            return None
+        return {
+            "player_id": self.player_id,
+            "name": self.name,
+            "character": record.to_dict(),
+            "is_alive": self.is_alive,
+            "facing_left": self.facing_left,
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: dict, spawn_pos: dict, store=None) -> "ServerPlayer":
+        character = CharacterRecord(**data["character"])
+        server_player = cls(data["player_id"], data["name"], spawn_pos, store, character)
+        if character.pos_x is not None and character.pos_y is not None:
+            server_player.position = [character.pos_x, character.pos_y]
+        server_player.is_alive = bool(data.get("is_alive", server_player.hp > 0))
+        server_player.facing_left = bool(data.get("facing_left", False))
+        return server_player
 
     def add_attribute_point(self, attr: str) -> bool:
         if self.attribute_points <= 0:
@@ -230,8 +252,8 @@ class ServerPlayer:
             return False
         self.attribute_points -= 1
         
-        # Auto-save após gastar ponto de atributo
-        self.auto_save()
+        # Persistido pelo PersistenceScheduler no próximo flush
+        self.mark_dirty(attr, "attr_points")
         return True
 
     def to_stats_dict(self) -> dict:
@@ -336,6 +358,8 @@ class ServerPlayer:
 
         # Mudanças relevantes
         pos_changed = (abs(self.posicaon[0] - old_pos[0]) > 0.1 or abs(self.posicaon[1] - old_pos[1]) > 0.1)
+        if pos_changed:
+            self.mark_dirty("pos_x", "pos_y")
         vel_changed = (abs(self.velocity[0] - old_vel[0]) > 1.0 or abs(self.velocity[1] - old_vel[1]) > 1.0)
         anim_changed = (self.animation != old_anim)
         facing_changed = (self.facing_left != old_facing)
@@ -374,6 +398,8 @@ class ServerPlayer:
         final_damage = max(0, int(damage) - self.get_damage_reduction())
         self.last_damage_taken = final_damage
         self.hp = max(0, self.hp - final_damage)
+        if final_damage:
+            self.mark_dirty("hp")
         if self.hp <= 0:
             self.is_alive = False
             self.animation = "death"
@@ -418,6 +444,7 @@ class ServerPlayer:
         self.hp = self.max_hp
         self.is_alive = True
         self.animation = "idle"
+        self.mark_dirty("hp", "pos_x", "pos_y")
         self.is_attacking = False
         self.attack_cooldown = 0.0
         print(f"[RESPAWN] Player {self.name} ({self.player_id}) respawnou em {self.posicaon}")